@@ -0,0 +1,86 @@
+"""Memory of AnalyzeStep's aggregation as history grows: collect-then-groupby vs. MetricsAccumulator.
+
+    python -m benchmarks.bench_aggregation --chunks 10 40 160 --rows 50000
+
+Chunks arrive in date order, as AnalyzeStep reads them from the store, so the
+accumulator seals each finished day. Memory is the tracemalloc peak (pandas and
+NumPy buffers) plus, for the accumulator, the native hash sets and sums it
+reports in `nbytes`; timings include tracemalloc's overhead.
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from spotify_sentiment.core.aggregation import MetricsAccumulator
+
+TOPICS = [f"topic_{i}" for i in range(5)]
+WORDS = [f"word_{i}" for i in range(60)]
+
+
+def make_chunk(i: int, rows: int, matches: float, shows: int = 20000, days_per_chunk: int = 20):
+    rng = np.random.default_rng(i)
+    days = pd.Timestamp("2020-01-01") + pd.to_timedelta(i * days_per_chunk + rng.integers(0, days_per_chunk, rows), unit="D")
+    chunk = pd.DataFrame({"date": days, "rank": rng.integers(1, 200, rows),
+                          "sentiment_score": rng.random(rows),
+                          "showUri": pd.Series(rng.integers(0, shows, rows)).map("spotify:show:{}".format)})
+    n = int(rows * matches)
+    rows_idx = np.sort(rng.integers(0, rows, n)).astype(np.int32)
+    return chunk, rows_idx, rng.integers(0, len(TOPICS), n).astype(np.int32), rng.integers(0, len(WORDS), n).astype(np.int32)
+
+
+def collect(n_chunks, rows, matches):
+    matched, date_max = [], []
+    for i in range(n_chunks):
+        chunk, idx, topics, words = make_chunk(i, rows, matches)
+        date_max.append(chunk.groupby("date")["rank"].max())
+        m = chunk.iloc[idx].reset_index(drop=True)
+        m["topic"] = pd.Categorical.from_codes(topics, categories=TOPICS)
+        m["matched_word"] = pd.Categorical.from_codes(words, categories=WORDS)
+        matched.append(m)
+    df = pd.concat(matched, ignore_index=True)
+    df["popularity"] = (df["date"].map(pd.concat(date_max).groupby(level=0).max()) + 1) - df["rank"]
+    agg = {"sentiment_score": "mean", "popularity": "mean", "showUri": "count"}
+    df.drop_duplicates(subset=["showUri", "topic", "date"]).groupby(["topic", "date"], observed=True).agg(agg)
+    df.drop_duplicates(subset=["showUri", "topic", "matched_word", "date"]).groupby(["topic", "matched_word", "date"], observed=True).agg(agg)
+    return 0
+
+
+def accumulate(n_chunks, rows, matches):
+    acc = MetricsAccumulator(TOPICS, WORDS)
+    for i in range(n_chunks):
+        chunk, idx, topics, words = make_chunk(i, rows, matches)
+        rows = acc.encode(chunk)
+        acc.observe(rows)
+        acc.add(rows.take(idx), topics, words)
+        acc.seal(chunk["date"].max().normalize())
+    acc.topic_metrics(), acc.word_metrics()
+    return acc.nbytes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, nargs="+", default=[10, 40, 160])
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--matches", type=float, default=0.5, help="matches per row")
+    args = parser.parse_args()
+
+    print(f"{args.rows:,} rows per chunk, {args.matches} matches per row")
+    print(f"{'chunks':>7} {'collect MB':>11} {'accumulate MB':>14} {'collect s':>10} {'accumulate s':>13}")
+    for n in args.chunks:
+        cells = []
+        for fn in (collect, accumulate):
+            tracemalloc.start()
+            t0 = time.perf_counter()
+            native = fn(n, args.rows, args.matches)
+            t = time.perf_counter() - t0
+            peak = tracemalloc.get_traced_memory()[1] + native
+            tracemalloc.stop()
+            cells += [peak / 2**20, t]
+        print(f"{n:>7} {cells[0]:>11.1f} {cells[2]:>14.1f} {cells[1]:>10.2f} {cells[3]:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
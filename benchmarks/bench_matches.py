@@ -0,0 +1,73 @@
+"""Bytes per keyword match held by AnalyzeStep: pandas rows vs. MetricsAccumulator.encode().
+
+    python -m benchmarks.bench_matches --rows 200000
+    python -m benchmarks.bench_matches --rows 1m --hit-rate 0.05
+
+Chunks of a seeded synthetic corpus (benchmarks.corpus) are read as text, like
+the sentiment store hands them over, given a random sentiment_score and scanned
+for the exact TOPIC_DEFINITIONS keywords. Per match, it compares
+  - full rows: every column of the matched rows plus topic and matched_word strings,
+  - metric rows: `chunk.iloc[row_idx]` of the four columns the aggregation reads,
+  - encoded: EncodedRows.take(row_idx) plus the int32 topic and keyword ids.
+Pandas sizes are memory_usage(deep=True), so string buffers are counted in full.
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+import fast_scanner
+from benchmarks.corpus import SIZES, generate
+from spotify_sentiment.core.aggregation import MetricsAccumulator
+from spotify_sentiment.core.config import settings
+
+METRIC_COLUMNS = ["date", "rank", "sentiment_score", "showUri"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=lambda v: SIZES.get(v.lower()) or int(v), default=200_000)
+    parser.add_argument("--hit-rate", type=float, default=0.3)
+    parser.add_argument("--chunk-rows", type=int, default=50_000)
+    args = parser.parse_args()
+
+    patterns = {topic: sorted({w.lower() for w in words}) for topic, words in settings.TOPIC_DEFINITIONS.items()}
+    scanner = fast_scanner.Scanner(patterns)
+    acc = MetricsAccumulator(scanner.topics, scanner.words)
+    topics, words = np.array(scanner.topics, dtype=object), np.array(scanner.words, dtype=object)
+    rng = np.random.default_rng(0)
+    matches, full, metric, encoded, t_rows, t_encoded = 0, 0, 0, 0, 0.0, 0.0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = generate(Path(tmp) / "corpus.csv", args.rows, args.hit_rate)
+        for chunk in pd.read_csv(path, chunksize=args.chunk_rows, dtype=str):
+            chunk["sentiment_score"] = rng.uniform(-1, 1, len(chunk)).round(4).astype(str)
+            row_idx, topic_ids, word_ids = scanner.scan_arrow([pa.array(chunk[c]) for c in ("episodeName", "description")], n_threads=0)
+            matches += len(row_idx)
+
+            rows = chunk.iloc[row_idx].assign(topic=topics[topic_ids], matched_word=words[word_ids])
+            full += rows.memory_usage(deep=True).sum()
+
+            parsed = chunk[METRIC_COLUMNS].assign(date=pd.to_datetime(chunk["date"], errors="coerce"),
+                                                  rank=pd.to_numeric(chunk["rank"], errors="coerce"),
+                                                  sentiment_score=pd.to_numeric(chunk["sentiment_score"]))
+            t1 = time.perf_counter()
+            rows = parsed.iloc[row_idx]
+            metric += rows.memory_usage(deep=True).sum() + topic_ids.nbytes + word_ids.nbytes
+            t2 = time.perf_counter()
+            rows = acc.encode(parsed).take(row_idx)
+            encoded += rows.nbytes + topic_ids.nbytes + word_ids.nbytes
+            t_rows, t_encoded = t_rows + t2 - t1, t_encoded + time.perf_counter() - t2
+
+    print(f"{args.rows:,} rows, {matches:,} matches ({matches / args.rows:.2f} per row), chunks of {args.chunk_rows:,}")
+    print(f"{'representation':<14} {'B/match':>8} {'MB':>8} {'build s':>8}")
+    for name, nbytes, seconds in (("full rows", full, None), ("metric rows", metric, t_rows), ("encoded", encoded, t_encoded)):
+        print(f"{name:<14} {nbytes / matches:>8.1f} {nbytes / 2**20:>8.1f} {'' if seconds is None else f'{seconds:.2f}':>8}")
+
+
+if __name__ == "__main__":
+    main()
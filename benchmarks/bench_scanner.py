@@ -0,0 +1,147 @@
+"""Aho-Corasick vs. reference n-gram scanner as the keyword count grows.
+
+``Scanner`` compiles its patterns once, so its column excludes the per-call
+compile that ``scan_chunks`` still pays.
+
+    python -m benchmarks.bench_scanner --rows 50000
+    python -m benchmarks.bench_scanner --rows 500000 --threads 1 2 4 8 16
+    python -m benchmarks.bench_scanner --rows 50000 --prescan
+    python -m benchmarks.bench_scanner --rows 50000 --memo --unique 0.05 0.2 1.0
+"""
+import argparse
+import os
+import random
+import string
+import time
+import tracemalloc
+
+import fast_scanner
+
+
+def _word(rng: random.Random) -> str:
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9)))
+
+
+def make_corpus(rows: int, n_keywords: int, seed: int = 0):
+    rng = random.Random(seed)
+    vocab = [_word(rng) for _ in range(max(5000, n_keywords))]
+    keywords = set()
+    while len(keywords) < n_keywords:
+        keywords.add(" ".join(rng.choice(vocab) for _ in range(rng.choice((1, 1, 1, 2, 3)))))
+    keywords = sorted(keywords)
+    topics = {f"topic_{t}": keywords[t::5] for t in range(5)}
+    texts = [" ".join(rng.choice(vocab) for _ in range(rng.randint(20, 120))) + ", " + rng.choice(keywords)
+             for _ in range(rows)]
+    return texts, topics
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def thread_scaling(rows: int, n_keywords: int, threads: list, repeat: int):
+    texts, topics = make_corpus(rows, n_keywords)
+    scanner = fast_scanner.Scanner(topics)
+    print(f"{rows:,} rows, {n_keywords:,} keywords, {os.cpu_count()} CPUs")
+    print(f"{'threads':>8} {'rows/s':>12} {'speedup':>8} {'efficiency':>11}")
+    t_serial = _best_of(lambda: scanner.scan(texts, n_threads=1), repeat)
+    for n in threads:
+        t = t_serial if n == 1 else _best_of(lambda: scanner.scan(texts, n_threads=n), repeat)
+        speedup = t_serial / t
+        print(f"{n:>8} {rows / t:>12,.0f} {speedup:>7.2f}x {speedup / n:>10.0%}")
+
+
+def prescan(rows: int, n_keywords: int, repeat: int):
+    """Per-chunk cost from text columns to matches: pandas concat/lower/tolist vs. in-place Arrow."""
+    import pandas as pd
+    import pyarrow as pa
+
+    texts, topics = make_corpus(rows, n_keywords)
+    names = [t[:40].upper() for t in texts]
+    chunk = pd.DataFrame({"episodeName": pd.array(names, dtype="string[pyarrow]"),
+                          "description": pd.array(texts, dtype="string[pyarrow]")})
+    scanner = fast_scanner.Scanner(topics)
+
+    def via_pandas():
+        ctx = (chunk["episodeName"].fillna("") + " " + chunk["description"].fillna("")).str.lower()
+        return scanner.scan(ctx.tolist())
+
+    def via_arrow():
+        return scanner.scan_arrow([pa.array(chunk["episodeName"]), pa.array(chunk["description"])])
+
+    print(f"{rows:,} rows, {n_keywords:,} keywords")
+    print(f"{'path':>8} {'ms/chunk':>10} {'peak py heap MB':>16}")
+    for name, fn in (("pandas", via_pandas), ("arrow", via_arrow)):
+        t = _best_of(fn, repeat)
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{name:>8} {t * 1000:>10.1f} {peak / 2**20:>16.1f}")
+
+
+def memo(rows: int, n_keywords: int, uniques: list, chunks: int = 10):
+    """Scanning every row vs. ScanMemo over a run of chunks that repeat a pool of episode texts."""
+    import pyarrow as pa
+    from spotify_sentiment.core.cache import ScanMemo
+
+    texts, topics = make_corpus(rows, n_keywords)
+    scanner = fast_scanner.Scanner(topics)
+    print(f"{chunks} chunks of {rows:,} rows, {n_keywords:,} keywords")
+    print(f"{'unique':>7} {'every row s':>12} {'memo s':>8} {'speedup':>8} {'scanned':>8}")
+    for unique in uniques:
+        rng = random.Random(1)
+        pool = texts[:max(1, int(rows * unique))]
+        run = [[pa.array([t[:40] for t in picks]), pa.array(picks)]
+               for picks in ([rng.choice(pool) for _ in range(rows)] for _ in range(chunks))]
+        t0 = time.perf_counter()
+        for columns in run: scanner.scan_arrow(columns)
+        t_all = time.perf_counter() - t0
+        m = ScanMemo(scanner, maxsize=rows * chunks)
+        t0 = time.perf_counter()
+        for columns in run: m.scan_arrow(columns)
+        t_memo = time.perf_counter() - t0
+        print(f"{unique:>7.0%} {t_all:>12.2f} {t_memo:>8.2f} {t_all / t_memo:>7.2f}x {m.scanned / m.rows:>8.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--keywords", type=int, nargs="+", default=[25, 100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--threads", type=int, nargs="+",
+                        help="report Scanner.scan scaling over these thread counts instead")
+    parser.add_argument("--prescan", action="store_true",
+                        help="compare the pandas pre-scan path with in-place Arrow scanning")
+    parser.add_argument("--memo", action="store_true",
+                        help="compare scanning every row with the per-text ScanMemo")
+    parser.add_argument("--unique", type=float, nargs="+", default=[0.05, 0.2, 1.0],
+                        help="--memo: distinct texts as a share of the rows in a chunk")
+    args = parser.parse_args()
+
+    if args.memo:
+        return memo(args.rows, min(args.keywords), args.unique)
+    if args.prescan:
+        return prescan(args.rows, min(args.keywords), args.repeat)
+    if args.threads:
+        return thread_scaling(args.rows, max(args.keywords), args.threads, args.repeat)
+
+    print(f"{'keywords':>9} {'ngram rows/s':>14} {'aho-corasick rows/s':>20} {'Scanner rows/s':>15} {'speedup':>8}")
+    for n in args.keywords:
+        texts, topics = make_corpus(args.rows, n)
+        assert fast_scanner.scan_chunks(texts, topics) == fast_scanner._scan_chunks_ngram(texts, topics)
+        t_ref = _best_of(lambda: fast_scanner._scan_chunks_ngram(texts, topics), args.repeat)
+        t_ac = _best_of(lambda: fast_scanner.scan_chunks(texts, topics), args.repeat)
+        scanner = fast_scanner.Scanner(topics)
+        t_sc = _best_of(lambda: scanner.scan(texts), args.repeat)
+        print(f"{n:>9,} {args.rows / t_ref:>14,.0f} {args.rows / t_ac:>20,.0f} {args.rows / t_sc:>15,.0f} "
+              f"{t_ref / t_sc:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
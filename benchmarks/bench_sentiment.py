@@ -0,0 +1,66 @@
+"""SentimentStep throughput against the scoring engine and the number of VADER worker processes.
+
+    python -m benchmarks.bench_sentiment --rows 200000 --engines native nltk --workers 1 2 4 8
+
+Every run is checked against the first one (the native engine, serial, by default).
+"""
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+from loguru import logger
+
+from spotify_sentiment.core.config import settings
+from spotify_sentiment.core.store import SentimentStore
+from spotify_sentiment.pipeline.steps_sentiment import SentimentStep
+
+WORDS = ("great love amazing happy best good wonderful bad awful hate terrible sad worst boring "
+         "not never very really extremely but podcast episode show story interview news talk").split()
+
+
+def make_raw_csv(path: Path, rows: int, unique_ratio: float, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    n_unique = max(1, int(rows * unique_ratio))
+    descs = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(15, 80))) + rng.choice([".", "!", "!!!", "?"])
+             for _ in range(n_unique)]
+    pd.DataFrame({
+        "date": [f"2024-01-{1 + i * 28 // rows:02d}" for i in range(rows)],
+        "rank": [1 + i % 200 for i in range(rows)],
+        "description": [rng.choice(descs) for _ in range(rows)],
+    }).to_csv(path, index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--unique-ratio", type=float, default=0.3)
+    parser.add_argument("--engines", nargs="+", default=["native", "nltk"], choices=["native", "nltk"])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    logger.remove()
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        settings.RAW_DATA, settings.MANIFEST = tmp / "raw.csv", tmp / "manifest.json"
+        make_raw_csv(settings.RAW_DATA, args.rows, args.unique_ratio)
+        print(f"{args.rows:,} rows, {args.unique_ratio:.0%} unique descriptions")
+        print(f"{'engine':>7} {'workers':>8} {'rows/s':>10} {'speedup':>8} {'identical':>10}")
+        first, t_first = None, None
+        for engine in args.engines:
+            for n in args.workers:
+                settings.SENTIMENT_ENGINE, settings.SENTIMENT_WORKERS = engine, n
+                settings.SENTIMENT_DATA = tmp / f"sentiment_{engine}_{n}"
+                settings.SENTIMENT_CACHE = tmp / f"cache_{engine}_{n}.sqlite"
+                t0 = time.perf_counter()
+                SentimentStep().execute()
+                t = time.perf_counter() - t0
+                out = SentimentStore(settings.SENTIMENT_DATA).dataset().to_table()
+                first, t_first = (out, t) if first is None else (first, t_first)
+                print(f"{engine:>7} {n:>8} {args.rows / t:>10,.0f} {t_first / t:>7.2f}x {str(out.equals(first)):>10}")
+
+
+if __name__ == "__main__":
+    main()
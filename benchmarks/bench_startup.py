@@ -0,0 +1,77 @@
+"""CLI cold start: import cost of the entry point and time to the first log line of each step.
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --steps visualize analyze --budget-ms 1500
+
+Every measurement is a fresh interpreter, run in an empty working directory so
+no step finds data to work on; a step's process is stopped as soon as it logs
+"Starting Phase". Exits with status 1 when a step's best time is over --budget-ms.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import spotify_sentiment
+
+CLI = "spotify_sentiment.presentation.cli"
+SRC = os.path.dirname(os.path.dirname(spotify_sentiment.__file__))
+
+
+def _env():
+    return dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [SRC, os.environ.get("PYTHONPATH")])))
+
+
+def import_times(module: str, top: int):
+    """(cumulative µs of `module`, the `top` imports with the most self time) from -X importtime."""
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                         capture_output=True, text=True, env=_env(), check=True).stderr
+    rows = []
+    for line in out.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line: continue
+        self_us, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(self_us), int(cumulative), name.strip()))
+    total = next(c for _, c, n in rows if n == module)
+    return total, sorted(rows, reverse=True)[:top]
+
+
+def time_to_first_log(step: str, cwd: str) -> float:
+    t0 = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-u", "-m", CLI, "--step", step], cwd=cwd, env=_env(),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    try:
+        for line in proc.stderr:
+            if "Starting Phase" in line: return time.perf_counter() - t0
+        raise RuntimeError(f"--step {step} exited without logging a phase (status {proc.wait()})")
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--steps", nargs="+", default=["download", "sentiment", "analyze", "visualize"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=8, help="heaviest imports to list")
+    parser.add_argument("--budget-ms", type=float, default=2000)
+    args = parser.parse_args()
+
+    total, heaviest = import_times(CLI, args.top)
+    print(f"import {CLI}: {total / 1000:.0f} ms")
+    for self_us, cumulative, name in heaviest:
+        print(f"  {self_us / 1000:>7.1f} ms self {cumulative / 1000:>8.1f} ms cumulative  {name}")
+
+    print(f"\n{'step':>10} {'first log ms':>13} {'budget':>7}")
+    over = False
+    with tempfile.TemporaryDirectory() as cwd:
+        for step in args.steps:
+            best = min(time_to_first_log(step, cwd) for _ in range(args.repeat)) * 1000
+            over |= best > args.budget_ms
+            print(f"{step:>10} {best:>13.0f} {'ok' if best <= args.budget_ms else 'OVER':>7}")
+    sys.exit(1 if over else 0)
+
+
+if __name__ == "__main__":
+    main()
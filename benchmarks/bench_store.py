@@ -0,0 +1,92 @@
+"""sentiment_results.csv vs. the date-partitioned Parquet store: disk size and read time.
+
+    python -m benchmarks.bench_store --rows 1000000 --days 90
+
+Each read only pulls what AnalyzeStep needs: the six columns of a full run, and
+the same columns restricted to the newest day for an incremental run.
+"""
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.bench_scanner import _best_of
+from spotify_sentiment.core.store import SentimentStore, convert_csv
+from spotify_sentiment.pipeline.steps_analyze import METRIC_COLUMNS, TEXT_COLUMNS
+
+WORDS = ("the economy and inflation new ai startup founder climate carbon talk great music daily news "
+         "interview story life episode podcast show best weekly markets protein diet").split()
+
+
+def make_sentiment_csv(path: Path, rows: int, days: int, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    per_day = max(1, rows // days)
+    episodes = [(f"spotify:show:{rng.randrange(5000)}", f"spotify:episode:{i}",
+                 " ".join(rng.choices(WORDS, k=rng.randint(2, 6))).title(),
+                 " ".join(rng.choices(WORDS, k=rng.randint(20, 90))))
+                for i in range(max(1, rows // 8))]
+    picks = [rng.choice(episodes) for _ in range(rows)]
+    pd.DataFrame({
+        "date": [(pd.Timestamp("2024-01-01") + pd.Timedelta(days=min(i // per_day, days - 1))).strftime("%Y-%m-%d") for i in range(rows)],
+        "rank": [1 + i % 200 for i in range(rows)],
+        "region": [rng.choice(("us", "gb", "de", "br", "au")) for _ in range(rows)],
+        "chartRankMove": [rng.choice(("UP", "DOWN", "SAME", "NEW")) for _ in range(rows)],
+        "episodeUri": [p[1] for p in picks],
+        "showUri": [p[0] for p in picks],
+        "episodeName": [p[2] for p in picks],
+        "description": [p[3] for p in picks],
+        "duration_ms": [rng.randrange(600_000, 7_200_000) for _ in range(rows)],
+        "explicit": [rng.random() < 0.2 for _ in range(rows)],
+        "sentiment_score": [rng.random() for _ in range(rows)],
+    }).to_csv(path, index=False)
+
+
+def _size(path: Path) -> int:
+    return path.stat().st_size if path.is_file() else sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    cols = TEXT_COLUMNS + METRIC_COLUMNS
+    with tempfile.TemporaryDirectory() as tmp:
+        csv, store = Path(tmp) / "sentiment_results.csv", SentimentStore(Path(tmp) / "sentiment_results")
+        make_sentiment_csv(csv, args.rows, args.days)
+        t0 = time.perf_counter()
+        convert_csv(csv, store, args.chunk_size)
+        t_convert = time.perf_counter() - t0
+        last = (pd.Timestamp("2024-01-01") + pd.Timedelta(days=args.days - 2)).strftime("%Y-%m-%d")
+
+        def csv_count():
+            with open(csv, "rb") as f: return sum(1 for _ in f) - 1
+
+        def csv_read(after=None):
+            n = 0
+            for chunk in pd.read_csv(csv, usecols=cols, chunksize=args.chunk_size, low_memory=False):
+                n += len(chunk if after is None else chunk[pd.to_datetime(chunk["date"]) > pd.Timestamp(after)])
+            return n
+
+        def store_read(after=None):
+            return sum(t.num_rows for t in store.read(cols, after=after, rows=args.chunk_size))
+
+        assert csv_read() == store_read() and csv_read(last) == store_read(last) == store.num_rows(last)
+        print(f"{args.rows:,} rows over {args.days} days; conversion took {t_convert:.1f}s")
+        print(f"{'':>18} {'csv':>10} {'parquet':>10} {'ratio':>7}")
+        print(f"{'disk MB':>18} {_size(csv) / 2**20:>10.1f} {_size(store.path) / 2**20:>10.1f} {_size(csv) / _size(store.path):>6.1f}x")
+        for name, a, b in (("row count s", csv_count, store.num_rows),
+                           ("full read s", csv_read, store_read),
+                           ("newest day s", lambda: csv_read(last), lambda: store_read(last))):
+            t_csv, t_store = _best_of(a, args.repeat), _best_of(b, args.repeat)
+            print(f"{name:>18} {t_csv:>10.3f} {t_store:>10.3f} {t_csv / t_store:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Seeded synthetic spotify_podcasts.csv with the raw dataset's columns.
+
+    python -m benchmarks.corpus --rows 1000000 --out data/spotify_podcasts.csv
+    python -m benchmarks.corpus --rows 10000000 --hit-rate 0.05 --out /tmp/large.csv
+
+Each day holds one chart per region; chart entries are drawn from a fixed pool of
+episodes with a long-tailed popularity, so the same episodes (and descriptions)
+come back day after day as they do in the real charts. `--hit-rate` is the share
+of episodes whose description mentions at least one TOPIC_DEFINITIONS keyword;
+the filler vocabulary never contains one. Same arguments, same file.
+"""
+import argparse
+import string
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from spotify_sentiment.core.config import settings
+
+SIZES = {"100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+REGIONS = ("us", "gb", "de", "br", "au", "ca", "in")
+MOVES = ("UP", "DOWN", "SAME", "NEW", "RE-ENTRY")
+
+
+def _vocabulary(rng: np.random.Generator, size: int, banned: set) -> np.ndarray:
+    syllables = [c + v for c in "bcdfghklmnprstvwz" for v in "aeiou"] + ["th", "st", "ng", "er", "an"]
+    words = set()
+    while len(words) < size:
+        word = "".join(rng.choice(syllables, rng.integers(1, 4)))
+        if word not in banned: words.add(word)
+    return np.array(sorted(words), dtype=object)
+
+
+def _texts(rng: np.random.Generator, vocab: np.ndarray, n: int, low: int, high: int) -> list:
+    lengths = rng.integers(low, high + 1, n)
+    words = vocab[rng.integers(0, len(vocab), int(lengths.sum()))]
+    ends = np.cumsum(lengths)
+    return [" ".join(words[e - k:e]) for e, k in zip(ends, lengths)]
+
+
+def episode_pool(n: int, hit_rate: float, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    keywords = np.array(sorted({w for words in settings.TOPIC_DEFINITIONS.values() for w in words}), dtype=object)
+    vocab = _vocabulary(rng, 6000, {t for k in keywords for t in k.lower().split()})
+
+    descriptions = _texts(rng, vocab, n, 15, 120)
+    for i in np.flatnonzero(rng.random(n) < hit_rate):
+        words = descriptions[i].split(" ")
+        for kw in rng.choice(keywords, rng.integers(1, 3)):
+            kw = kw.title() if rng.random() < 0.2 else kw
+            words.insert(int(rng.integers(0, len(words) + 1)), kw)
+        descriptions[i] = " ".join(words)
+    descriptions = np.array(descriptions, dtype=object)
+    descriptions[rng.random(n) < 0.01] = None  # the raw data has episodes without a description
+
+    alphabet = np.array(list(string.ascii_letters + string.digits))
+    uris = ["".join(row) for row in alphabet[rng.integers(0, len(alphabet), (n, 22))]]
+    shows = rng.integers(0, max(1, n // 15), n)
+    return pd.DataFrame({
+        "episodeUri": [f"spotify:episode:{u}" for u in uris],
+        "showUri": [f"spotify:show:{s:022d}" for s in shows],
+        "episodeName": [t.title() for t in _texts(rng, vocab, n, 2, 8)],
+        "description": descriptions,
+        "duration_ms": rng.integers(300_000, 10_800_000, n),
+        "explicit": rng.random(n) < 0.15,
+    })
+
+
+def generate(path: Path, rows: int, hit_rate: float = 0.3, seed: int = 0, days: int = 365,
+             reuse: int = 10, chunk_rows: int = 500_000) -> Path:
+    """Writes `rows` chart entries over `days` days; every episode appears about `reuse` times."""
+    rng = np.random.default_rng(seed + 1)
+    pool = episode_pool(max(100, rows // reuse), hit_rate, seed)
+    weights = 1.0 / (np.arange(len(pool)) + 10.0) ** 0.7
+    weights /= weights.sum()
+
+    per_day = max(len(REGIONS), -(-rows // days))
+    chart = per_day // len(REGIONS)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", newline="") as out:
+        for start in range(0, rows, chunk_rows):
+            i = np.arange(start, min(rows, start + chunk_rows))
+            day, slot = i // per_day, i % per_day
+            picks = pool.iloc[rng.choice(len(pool), len(i), p=weights)].reset_index(drop=True)
+            frame = pd.DataFrame({
+                "date": (pd.Timestamp("2024-01-01") + pd.to_timedelta(day, unit="D")).strftime("%Y-%m-%d"),
+                "rank": np.minimum(slot // len(REGIONS), chart - 1) + 1,
+                "region": np.array(REGIONS)[slot % len(REGIONS)],
+                "chartRankMove": np.array(MOVES)[rng.integers(0, len(MOVES), len(i))],
+            })
+            frame = pd.concat([frame, picks], axis=1)[["date", "rank", "region", "chartRankMove", "episodeUri", "showUri",
+                                                       "episodeName", "description", "duration_ms", "explicit"]]
+            frame.to_csv(out, index=False, header=start == 0)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=lambda v: SIZES.get(v.lower()) or int(v), default=100_000,
+                        help="row count, or one of " + ", ".join(SIZES))
+    parser.add_argument("--hit-rate", type=float, default=0.3, help="share of episodes mentioning a topic keyword")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--reuse", type=int, default=10, help="average chart appearances per episode")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=Path, default=settings.RAW_DATA)
+    args = parser.parse_args()
+    generate(args.out, args.rows, args.hit_rate, args.seed, args.days, args.reuse)
+    print(f"{args.rows:,} rows -> {args.out} ({args.out.stat().st_size / 1e6:,.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""Throughput and peak memory of each pipeline stage on a synthetic corpus, with regression checks.
+
+    python -m benchmarks.suite run --rows 1m --out baseline.json
+    python -m benchmarks.suite run --rows 1m --benches scan analyze --out current.json
+    python -m benchmarks.suite compare baseline.json current.json --tolerance 0.1
+
+`run` generates (or reuses) a benchmarks.corpus file and runs every bench in a
+fresh interpreter inside a scratch working directory, so data/ and assets/ are
+the scratch ones and peak RSS belongs to that bench alone (worker processes
+included). Benches run in pipeline order and each one reads what the previous
+one wrote; end_to_end starts from an empty directory. Topic keywords are the
+exact seeds unless --expand is given, which needs the embeddings model.
+`compare` exits with status 1 when a bench lost more than --tolerance of its
+rows/sec or grew its peak RSS by more than that.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCHES = ["scan", "sentiment", "aggregation", "analyze", "visualize", "end_to_end"]
+DEPENDS = {"aggregation": ["sentiment"], "analyze": ["sentiment"], "visualize": ["sentiment", "analyze"]}
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux and bytes on macOS; children covers pool workers that have exited.
+    scale = 1 if sys.platform == "darwin" else 1024
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return peak * scale / 2**20
+
+
+def _raw_text_columns():
+    import pyarrow.csv as pv
+    from spotify_sentiment.core.config import settings
+    from spotify_sentiment.pipeline.steps_analyze import TEXT_COLUMNS
+    convert = pv.ConvertOptions(include_columns=TEXT_COLUMNS, column_types={c: "string" for c in TEXT_COLUMNS})
+    table = pv.read_csv(settings.RAW_DATA, convert_options=convert)
+    return table, [table.column(c).combine_chunks() for c in TEXT_COLUMNS]
+
+
+def bench_scan():
+    """Keyword scanning of the raw text columns, CSV parsing excluded."""
+    import fast_scanner
+    from spotify_sentiment.core.config import settings
+    from spotify_sentiment.core.vocabulary import topic_patterns
+    table, texts = _raw_text_columns()
+    scanner = fast_scanner.Scanner(topic_patterns())
+    t0 = time.perf_counter()
+    for start in range(0, table.num_rows, settings.CHUNK_SIZE):
+        scanner.scan_arrow([c.slice(start, settings.CHUNK_SIZE) for c in texts], n_threads=settings.SCAN_THREADS)
+    return time.perf_counter() - t0, table.num_rows
+
+
+def bench_sentiment():
+    from spotify_sentiment.core.config import settings
+    from spotify_sentiment.core.store import SentimentStore
+    from spotify_sentiment.pipeline.steps_sentiment import SentimentStep
+    t0 = time.perf_counter()
+    SentimentStep().execute()
+    return time.perf_counter() - t0, SentimentStore(settings.SENTIMENT_DATA).num_rows()
+
+
+def bench_aggregation():
+    """MetricsAccumulator alone: the matches are found up front and not timed."""
+    import pandas as pd
+    import fast_scanner
+    from spotify_sentiment.core.aggregation import MetricsAccumulator
+    from spotify_sentiment.core.config import settings
+    from spotify_sentiment.core.store import SentimentStore
+    from spotify_sentiment.core.vocabulary import topic_patterns
+    from spotify_sentiment.pipeline.steps_analyze import COLUMNS, METRIC_COLUMNS, TEXT_COLUMNS
+    scanner = fast_scanner.Scanner(topic_patterns())
+    chunks = []
+    for table in SentimentStore(settings.SENTIMENT_DATA).read(COLUMNS, rows=settings.CHUNK_SIZE):
+        matches = scanner.scan_arrow([table.column(c).combine_chunks() for c in TEXT_COLUMNS], n_threads=settings.SCAN_THREADS)
+        chunk = table.select(METRIC_COLUMNS).to_pandas()
+        chunk["date"] = pd.to_datetime(chunk["date"], errors="coerce")
+        chunk["rank"] = pd.to_numeric(chunk["rank"], errors="coerce")
+        chunks.append((chunk, matches))
+
+    t0 = time.perf_counter()
+    metrics = MetricsAccumulator(scanner.topics, scanner.words)
+    for chunk, (row_idx, topic_ids, word_ids) in chunks:
+        rows = metrics.encode(chunk)
+        metrics.observe(rows)
+        if len(row_idx): metrics.add(rows.take(row_idx), topic_ids, word_ids)
+        if chunk["date"].notna().any(): metrics.seal(chunk["date"].max().normalize())
+    if metrics.matched: metrics.topic_metrics(), metrics.word_metrics()
+    return time.perf_counter() - t0, sum(len(c) for c, _ in chunks)
+
+
+def bench_analyze():
+    from spotify_sentiment.core.config import settings
+    from spotify_sentiment.core.store import SentimentStore
+    from spotify_sentiment.pipeline.steps_analyze import AnalyzeStep
+    t0 = time.perf_counter()
+    AnalyzeStep().execute()
+    return time.perf_counter() - t0, SentimentStore(settings.SENTIMENT_DATA).num_rows()
+
+
+def bench_visualize():
+    """Every chart drawn from scratch; rows are word metric rows."""
+    import pandas as pd
+    from spotify_sentiment.core.config import settings
+    from spotify_sentiment.pipeline.steps_visualize import VisualizeStep
+    shutil.rmtree(settings.ASSETS_DIR, ignore_errors=True)
+    t0 = time.perf_counter()
+    VisualizeStep().execute()
+    return time.perf_counter() - t0, len(pd.read_csv(settings.WORD_METRICS, usecols=["date"]))
+
+
+def bench_end_to_end():
+    """Sentiment, analyze and visualize from an empty data directory; rows are raw rows."""
+    from spotify_sentiment.core.config import settings
+    from spotify_sentiment.core.store import SentimentStore
+    from spotify_sentiment.pipeline.runner import PipelineRunner
+    from spotify_sentiment.pipeline.steps_analyze import AnalyzeStep
+    from spotify_sentiment.pipeline.steps_sentiment import SentimentStep
+    from spotify_sentiment.pipeline.steps_visualize import VisualizeStep
+    t0 = time.perf_counter()
+    PipelineRunner([SentimentStep(), AnalyzeStep(), VisualizeStep()]).execute_all()
+    return time.perf_counter() - t0, SentimentStore(settings.SENTIMENT_DATA).num_rows()
+
+
+def _workdir(root: Path, corpus: Path) -> Path:
+    (root / "data").mkdir(parents=True)
+    (root / "data" / "spotify_podcasts.csv").symlink_to(corpus.resolve())
+    return root
+
+
+def _run_child(name: str, cwd: Path, expand: bool) -> dict:
+    root = Path(__file__).resolve().parent.parent
+    env = dict(os.environ, USE_EXACT_MATCH_ONLY="false" if expand else "true",
+               PYTHONPATH=os.pathsep.join(filter(None, [str(root), str(root / "src"), os.environ.get("PYTHONPATH")])))
+    proc = subprocess.run([sys.executable, "-m", "benchmarks.suite", "child", name], cwd=cwd, env=env,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    if proc.returncode: raise RuntimeError(f"bench {name} failed:\n{proc.stderr[-4000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _git_revision() -> str:
+    try: return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+                               cwd=Path(__file__).parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError): return ""
+
+
+def run(args) -> dict:
+    from benchmarks.corpus import generate
+    corpus = args.corpus_dir / f"spotify_podcasts_{args.rows}_{args.hit_rate}_{args.seed}.csv"
+    if not corpus.exists():
+        print(f"Generating {args.rows:,} rows into {corpus}", flush=True)
+        generate(corpus.with_suffix(".tmp"), args.rows, args.hit_rate, args.seed)
+        os.replace(corpus.with_suffix(".tmp"), corpus)
+
+    # Benches reuse the output of the stages before them, so those run too even when not requested.
+    plan = [b for b in BENCHES if b in args.benches or any(b in DEPENDS.get(r, ()) for r in args.benches)]
+    best = {}
+    for _ in range(args.repeat):
+        with tempfile.TemporaryDirectory() as tmp:
+            stages, e2e = _workdir(Path(tmp) / "stages", corpus), _workdir(Path(tmp) / "e2e", corpus)
+            for name in plan:
+                result = _run_child(name, e2e if name == "end_to_end" else stages, args.expand)
+                if name not in args.benches: continue
+                print(f"{name:>12} {result['rows_per_sec']:>14,.0f} rows/s {result['peak_rss_mb']:>9,.0f} MB peak RSS "
+                      f"({result['seconds']:.2f}s)", flush=True)
+                # Best time and lowest peak over the repeats.
+                old = best.get(name, result)
+                best[name] = {**min(old, result, key=lambda r: r["seconds"]), "peak_rss_mb": min(old["peak_rss_mb"], result["peak_rss_mb"])}
+    return {
+        "meta": {"rows": args.rows, "hit_rate": args.hit_rate, "seed": args.seed, "repeat": args.repeat,
+                 "expand": args.expand, "git": _git_revision(), "python": platform.python_version(),
+                 "platform": platform.platform(), "cpus": os.cpu_count(), "created": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "results": best,
+    }
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> bool:
+    """Prints both runs side by side; True when any bench regressed beyond `tolerance`."""
+    if baseline["meta"]["rows"] != current["meta"]["rows"] or baseline["meta"]["cpus"] != current["meta"]["cpus"]:
+        print(f"warning: runs differ in rows or CPUs ({baseline['meta']['rows']:,}/{baseline['meta']['cpus']} vs "
+              f"{current['meta']['rows']:,}/{current['meta']['cpus']})")
+    print(f"{'bench':>12} {'rows/s base':>13} {'rows/s now':>13} {'change':>8} {'RSS base':>9} {'RSS now':>9} {'change':>8}")
+    regressed = False
+    for name in [b for b in BENCHES if b in baseline["results"] and b in current["results"]]:
+        old, new = baseline["results"][name], current["results"][name]
+        speed = new["rows_per_sec"] / old["rows_per_sec"] - 1
+        rss = new["peak_rss_mb"] / old["peak_rss_mb"] - 1
+        flags = [f for f, bad in (("SLOWER", speed < -tolerance), ("MORE MEMORY", rss > tolerance)) if bad]
+        regressed |= bool(flags)
+        print(f"{name:>12} {old['rows_per_sec']:>13,.0f} {new['rows_per_sec']:>13,.0f} {speed:>+8.1%} "
+              f"{old['peak_rss_mb']:>8,.0f}M {new['peak_rss_mb']:>8,.0f}M {rss:>+8.1%}  {' '.join(flags)}")
+    return regressed
+
+
+def main():
+    from benchmarks.corpus import SIZES
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_run = sub.add_parser("run")
+    p_run.add_argument("--rows", type=lambda v: SIZES.get(v.lower()) or int(v), default=SIZES["100k"])
+    p_run.add_argument("--hit-rate", type=float, default=0.3)
+    p_run.add_argument("--seed", type=int, default=0)
+    p_run.add_argument("--benches", nargs="+", choices=BENCHES, default=BENCHES)
+    p_run.add_argument("--repeat", type=int, default=1, help="best time of this many runs, each in a fresh directory")
+    p_run.add_argument("--expand", action="store_true", help="expand topic keywords with the embeddings model")
+    p_run.add_argument("--corpus-dir", type=Path, default=Path(tempfile.gettempdir()) / "spotify-sentiment-bench")
+    p_run.add_argument("--out", type=Path, help="write the results here as JSON")
+    p_cmp = sub.add_parser("compare")
+    p_cmp.add_argument("baseline", type=Path)
+    p_cmp.add_argument("current", type=Path)
+    p_cmp.add_argument("--tolerance", type=float, default=0.1, help="allowed relative loss before flagging")
+    p_child = sub.add_parser("child")
+    p_child.add_argument("name", choices=BENCHES)
+    args = parser.parse_args()
+
+    if args.command == "child":
+        seconds, rows = globals()[f"bench_{args.name}"]()
+        print(json.dumps({"seconds": seconds, "rows": rows, "rows_per_sec": rows / max(seconds, 1e-9),
+                          "peak_rss_mb": _peak_rss_mb()}))
+    elif args.command == "run":
+        results = run(args)
+        if args.out:
+            args.out.write_text(json.dumps(results, indent=2))
+            print(f"Results written to {args.out}")
+    else:
+        sys.exit(1 if compare(json.loads(args.baseline.read_text()), json.loads(args.current.read_text()), args.tolerance) else 0)
+
+
+if __name__ == "__main__":
+    main()
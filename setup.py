@@ -11,7 +11,16 @@ ext_modules = [
         ["src/cpp/fast_scanner.cpp"],
         include_dirs=[get_pybind_include()],
         language="c++",
-        extra_compile_args=["-O3", "-std=c++17"]
+        extra_compile_args=["-O3", "-std=c++17", "-pthread"],
+        extra_link_args=["-pthread"],
+    ),
+    Extension(
+        "fast_vader",
+        ["src/cpp/fast_vader.cpp"],
+        include_dirs=[get_pybind_include()],
+        language="c++",
+        extra_compile_args=["-O3", "-std=c++17", "-pthread"],
+        extra_link_args=["-pthread"],
     ),
 ]
 
@@ -1,21 +1,779 @@
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
+#include <pybind11/numpy.h>
+#include <algorithm>
+#include <array>
+#include <atomic>
+#include <cstdint>
+#include <cstring>
+#include <exception>
+#include <iterator>
+#include <map>
+#include <memory>
 #include <string>
+#include <thread>
 #include <string_view>
 #include <vector>
 #include <unordered_map>
 #include <cctype>
+#include <climits>
 #include <tuple>
 
 namespace py = pybind11;
 
+namespace {
+
+inline bool is_word_byte(unsigned char c) { return std::isalnum(c) != 0; }
+
+struct FoldTable {
+    std::array<unsigned char, 128> lower{};
+    FoldTable() {
+        for (int c = 0; c < 128; ++c) lower[c] = is_word_byte(c) ? static_cast<unsigned char>(std::tolower(c)) : 0;
+    }
+};
+const FoldTable fold_table;
+
+// Reads the character at p[c], advances c past it and returns its word byte,
+// or 0 for a separator.  `split` is set when the token must end right after
+// this character.
+template <bool Fold>
+inline unsigned char read_byte(const unsigned char* p, size_t n, size_t& c, bool& split) {
+    const unsigned char b = p[c++];
+    if (!Fold) return is_word_byte(b) ? b : 0;
+    if (b < 0x80) return fold_table.lower[b];
+    if (b == 0xE2 && c + 1 < n && p[c] == 0x84 && p[c + 1] == 0xAA) {  // U+212A KELVIN SIGN
+        c += 2;
+        return 'k';
+    }
+    if (b == 0xC4 && c < n && p[c] == 0xB0) {  // U+0130 LATIN CAPITAL LETTER I WITH DOT ABOVE
+        c += 1;
+        split = true;
+        return 'i';
+    }
+    return 0;
+}
+
+// A keyword can only ever match if it has the shape of the token stream the
+// scanner sees: alnum runs separated by exactly one space.
+bool is_matchable(const std::string& word) {
+    if (word.empty() || word.front() == ' ' || word.back() == ' ') return false;
+    bool prev_space = false;
+    for (unsigned char c : word) {
+        if (c == ' ') {
+            if (prev_space) return false;
+            prev_space = true;
+        } else if (!is_word_byte(c)) {
+            return false;
+        } else {
+            prev_space = false;
+        }
+    }
+    return true;
+}
+
+// Byte-level Aho-Corasick automaton over the canonical token stream
+// " tok0 tok1 tok2", i.e. every token prefixed by a single space.  Keywords are
+// compiled as " " + keyword, so a hit always starts on a token boundary; hits
+// are only reported after the last byte of a token, so they also end on one.
+// The goto function is fully resolved into a dense DFA over the bytes that
+// occur in the keywords, which makes the walk branch-free and allocation-free.
+class Matcher {
+public:
+    struct Hit {
+        uint32_t start_token;
+        uint32_t n_tokens;
+        int32_t keyword;
+    };
+
+    explicit Matcher(const std::vector<std::string>& keywords) {
+        byte_class_.fill(0);
+        for (const auto& word : keywords) {
+            if (!is_matchable(word)) continue;
+            byte_class_[' '] = 1;
+            for (unsigned char c : word) byte_class_[c] = 1;
+        }
+        n_classes_ = 1;
+        for (auto& cls : byte_class_) if (cls) cls = static_cast<uint8_t>(n_classes_++);
+
+        add_state();
+        for (size_t k = 0; k < keywords.size(); ++k) {
+            const std::string& word = keywords[k];
+            if (!is_matchable(word)) continue;
+            int32_t s = step_trie(0, ' ');
+            uint32_t n_tokens = 1;
+            for (unsigned char c : word) {
+                s = step_trie(s, c);
+                if (c == ' ') ++n_tokens;
+            }
+            keyword_[s] = static_cast<int32_t>(k);
+            n_tokens_[s] = n_tokens;
+        }
+        build_links();
+    }
+
+    // Position in the token stream of one row.  A row can be fed in several
+    // segments (episode name, then description); a segment boundary acts as
+    // a separator, exactly like the space the texts used to be joined with.
+    struct Cursor {
+        int32_t state = 0;
+        uint32_t token = 0;
+    };
+
+    // Appends the hits of one segment to `hits`.  With Fold the text is
+    // lower-cased on the fly the way Python's str.lower() would affect the
+    // scan: ASCII letters, KELVIN SIGN -> "k" and DOTTED CAPITAL I -> "i"
+    // followed by a (non-alnum) combining dot.  That dot ends the token, so
+    // "İnflation" scans as "i nflation"; pandas 3's Arrow-backed str.lower()
+    // folds the same letter to a plain "i" and would find "inflation".
+    template <bool Fold>
+    void feed(std::string_view text, Cursor& cur, std::vector<Hit>& hits) const {
+        const auto* p = reinterpret_cast<const unsigned char*>(text.data());
+        const size_t n = text.size();
+        const int32_t* next = next_.data();
+        const size_t n_classes = n_classes_;
+        const uint8_t space = byte_class_[' '];
+        int32_t s = cur.state;
+        size_t c = 0;
+        while (c < n) {
+            bool split = false;
+            unsigned char b = read_byte<Fold>(p, n, c, split);
+            if (!b) continue;
+            s = next[s * n_classes + space];
+            for (;;) {
+                s = next[s * n_classes + byte_class_[b]];
+                if (split || c >= n) break;
+                b = read_byte<Fold>(p, n, c, split);
+                if (!b) break;
+            }
+            for (int32_t o = keyword_[s] >= 0 ? s : out_link_[s]; o > 0; o = out_link_[o]) {
+                hits.push_back({cur.token + 1 - n_tokens_[o], n_tokens_[o], keyword_[o]});
+            }
+            ++cur.token;
+        }
+        cur.state = s;
+    }
+
+    // Orders the hits of one row by start token and then by length -- the
+    // order the n-gram scanner used to produce.
+    static void order(std::vector<Hit>& hits, size_t first) {
+        if (hits.size() - first < 2) return;
+        std::sort(hits.begin() + first, hits.end(), [](const Hit& a, const Hit& b) {
+            return a.start_token != b.start_token ? a.start_token < b.start_token : a.n_tokens < b.n_tokens;
+        });
+    }
+
+    void scan(std::string_view text, std::vector<Hit>& hits) const {
+        const size_t first = hits.size();
+        Cursor cur;
+        feed<false>(text, cur, hits);
+        order(hits, first);
+    }
+
+private:
+    int32_t add_state() {
+        next_.insert(next_.end(), n_classes_, -1);
+        keyword_.push_back(-1);
+        n_tokens_.push_back(0);
+        return static_cast<int32_t>(keyword_.size() - 1);
+    }
+
+    int32_t step_trie(int32_t s, unsigned char c) {
+        size_t slot = static_cast<size_t>(s) * n_classes_ + byte_class_[c];
+        if (next_[slot] < 0) {
+            int32_t t = add_state();
+            next_[slot] = t;
+        }
+        return next_[slot];
+    }
+
+    void build_links() {
+        const size_t n = keyword_.size();
+        std::vector<int32_t> fail(n, 0);
+        out_link_.assign(n, 0);
+        std::vector<int32_t> queue;
+        queue.reserve(n);
+        for (size_t a = 0; a < n_classes_; ++a) {
+            int32_t& t = next_[a];
+            if (t < 0) t = 0;
+            else queue.push_back(t);
+        }
+        for (size_t q = 0; q < queue.size(); ++q) {
+            const int32_t s = queue[q];
+            const int32_t f = fail[s];
+            out_link_[s] = keyword_[f] >= 0 ? f : out_link_[f];
+            for (size_t a = 0; a < n_classes_; ++a) {
+                int32_t& t = next_[s * n_classes_ + a];
+                const int32_t via_fail = next_[f * n_classes_ + a];
+                if (t < 0) {
+                    t = via_fail;
+                } else {
+                    fail[t] = via_fail;
+                    queue.push_back(t);
+                }
+            }
+        }
+    }
+
+    std::array<uint8_t, 256> byte_class_{};
+    size_t n_classes_ = 1;
+    std::vector<int32_t> next_;
+    std::vector<int32_t> keyword_;
+    std::vector<uint32_t> n_tokens_;
+    std::vector<int32_t> out_link_;
+};
+
+// Hands a vector over to NumPy without copying; the capsule frees it.
+template <class T>
+py::array_t<T> to_numpy(std::vector<T>&& values) {
+    auto* owned = new std::vector<T>(std::move(values));
+    py::capsule free_when_done(owned, [](void* p) { delete static_cast<std::vector<T>*>(p); });
+    return py::array_t<T>(static_cast<py::ssize_t>(owned->size()), owned->data(), free_when_done);
+}
+
+size_t resolve_threads(int n_threads) {
+    if (n_threads > 0) return static_cast<size_t>(n_threads);
+    return std::max(1u, std::thread::hardware_concurrency());
+}
+
+// Splits [0, n_rows) into contiguous blocks that a pool of threads picks up
+// one at a time.  Every block fills its own buffer and the buffers come back
+// in block order, so concatenating them keeps results in row order no matter
+// how many threads ran.  Must be called without the GIL.
+template <class Part, class ScanBlock>
+std::vector<Part> scan_blocks(size_t n_rows, int n_threads, ScanBlock&& scan_block) {
+    const size_t threads = std::min(resolve_threads(n_threads), std::max<size_t>(1, n_rows / 1024));
+    if (threads <= 1) {
+        std::vector<Part> parts(1);
+        scan_block(0, n_rows, parts[0]);
+        return parts;
+    }
+    const size_t block = (n_rows + threads * 8 - 1) / (threads * 8);
+    const size_t n_blocks = (n_rows + block - 1) / block;
+    std::vector<Part> parts(n_blocks);
+    std::atomic<size_t> next_block{0};
+    std::exception_ptr error;
+    std::atomic<bool> failed{false};
+
+    auto worker = [&]() {
+        try {
+            for (size_t b = next_block++; b < n_blocks && !failed; b = next_block++) {
+                scan_block(b * block, std::min(n_rows, (b + 1) * block), parts[b]);
+            }
+        } catch (...) {
+            if (!failed.exchange(true)) error = std::current_exception();
+        }
+    };
+    std::vector<std::thread> pool;
+    pool.reserve(threads - 1);
+    for (size_t t = 1; t < threads; ++t) pool.emplace_back(worker);
+    worker();
+    for (auto& th : pool) th.join();
+    if (error) std::rethrow_exception(error);
+    return parts;
+}
+
+template <class T>
+std::vector<T> concat(std::vector<std::vector<T>>&& parts) {
+    if (parts.size() == 1) return std::move(parts[0]);
+    size_t total = 0;
+    for (const auto& p : parts) total += p.size();
+    std::vector<T> out;
+    out.reserve(total);
+    for (auto& p : parts) {
+        std::move(p.begin(), p.end(), std::back_inserter(out));
+        std::vector<T>().swap(p);
+    }
+    return out;
+}
+
+// Arrow C data interface structs (https://arrow.apache.org/docs/format/CDataInterface.html).
+struct ArrowSchema {
+    const char* format;
+    const char* name;
+    const char* metadata;
+    int64_t flags;
+    int64_t n_children;
+    ArrowSchema** children;
+    ArrowSchema* dictionary;
+    void (*release)(ArrowSchema*);
+    void* private_data;
+};
+
+struct ArrowArray {
+    int64_t length;
+    int64_t null_count;
+    int64_t offset;
+    int64_t n_buffers;
+    int64_t n_children;
+    const void** buffers;
+    ArrowArray** children;
+    ArrowArray* dictionary;
+    void (*release)(ArrowArray*);
+    void* private_data;
+};
+
+// A string column read in place: Arrow layout (validity bitmap, int32 or
+// int64 offsets, UTF-8 data) over memory that the caller keeps alive.
+struct TextColumn {
+    const char* data = nullptr;
+    const int32_t* offsets32 = nullptr;
+    const int64_t* offsets64 = nullptr;
+    const uint8_t* validity = nullptr;
+    int64_t offset = 0;
+    size_t length = 0;
+
+    std::string_view operator[](size_t i) const {
+        const int64_t j = offset + static_cast<int64_t>(i);
+        if (validity && !((validity[j >> 3] >> (j & 7)) & 1)) return {};
+        const int64_t begin = offsets64 ? offsets64[j] : offsets32[j];
+        const int64_t end = offsets64 ? offsets64[j + 1] : offsets32[j + 1];
+        return {data + begin, static_cast<size_t>(end - begin)};
+    }
+};
+
+struct ViewColumn {
+    std::vector<std::string_view> views;
+    std::string_view operator[](size_t i) const { return views[i]; }
+};
+
+// Exports `obj` through __arrow_c_array__; the returned capsules own the
+// exported memory and must outlive every use of the column.
+TextColumn arrow_column(const py::handle& obj, std::vector<py::object>& keep_alive) {
+    if (!py::hasattr(obj, "__arrow_c_array__")) {
+        throw py::type_error("expected an Arrow string array (an object implementing __arrow_c_array__)");
+    }
+    py::tuple exported = obj.attr("__arrow_c_array__")();
+    py::object schema_capsule = exported[0], array_capsule = exported[1];
+    keep_alive.push_back(schema_capsule);
+    keep_alive.push_back(array_capsule);
+    auto* schema = static_cast<ArrowSchema*>(PyCapsule_GetPointer(schema_capsule.ptr(), "arrow_schema"));
+    auto* array = static_cast<ArrowArray*>(PyCapsule_GetPointer(array_capsule.ptr(), "arrow_array"));
+    if (!schema || !array) throw py::error_already_set();
+
+    const std::string format(schema->format);
+    if ((format != "u" && format != "U") || array->n_buffers != 3) {
+        throw py::type_error("expected an Arrow string or large_string array, got format '" + format + "'");
+    }
+    TextColumn col;
+    col.validity = array->null_count != 0 ? static_cast<const uint8_t*>(array->buffers[0]) : nullptr;
+    if (format == "u") col.offsets32 = static_cast<const int32_t*>(array->buffers[1]);
+    else col.offsets64 = static_cast<const int64_t*>(array->buffers[1]);
+    col.data = static_cast<const char*>(array->buffers[2]);
+    col.offset = array->offset;
+    col.length = static_cast<size_t>(array->length);
+    return col;
+}
+
+inline uint64_t splitmix64(uint64_t x) {
+    x ^= x >> 30; x *= 0xbf58476d1ce4e5b9ULL;
+    x ^= x >> 27; x *= 0x94d049bb133111ebULL;
+    return x ^ (x >> 31);
+}
+
+// 64-bit hash of row i's column values, eight bytes at a time.  Each value is
+// length-prefixed, so ("ab", "c") and ("a", "bc") differ; nulls hash like empty
+// strings, which is how the scanner reads them.
+template <class Column>
+uint64_t hash_row(const std::vector<Column>& columns, size_t i) {
+    uint64_t h = 0x9e3779b97f4a7c15ULL;
+    for (const auto& col : columns) {
+        const std::string_view s = col[i];
+        h = splitmix64(h ^ s.size());
+        size_t k = 0;
+        for (; k + 8 <= s.size(); k += 8) {
+            uint64_t w;
+            std::memcpy(&w, s.data() + k, 8);
+            h = splitmix64(h ^ w);
+        }
+        if (k < s.size()) {
+            uint64_t w = 0;
+            std::memcpy(&w, s.data() + k, s.size() - k);
+            h = splitmix64(h ^ w);
+        }
+    }
+    return h;
+}
+
+}  // namespace
+
+py::array_t<uint64_t> hash_arrow(const py::sequence& columns, int n_threads) {
+    std::vector<py::object> keep_alive;
+    std::vector<TextColumn> cols;
+    for (const auto& obj : columns) cols.push_back(arrow_column(obj, keep_alive));
+    if (cols.empty()) throw py::value_error("hash_arrow needs at least one column");
+    for (const auto& col : cols) {
+        if (col.length != cols[0].length) throw py::value_error("Arrow columns must have the same length");
+    }
+    std::vector<std::vector<uint64_t>> parts;
+    {
+        py::gil_scoped_release release;
+        parts = scan_blocks<std::vector<uint64_t>>(cols[0].length, n_threads, [&](size_t begin, size_t end, std::vector<uint64_t>& out) {
+            out.reserve(end - begin);
+            for (size_t i = begin; i < end; ++i) out.push_back(hash_row(cols, i));
+        });
+    }
+    return to_numpy(concat(std::move(parts)));
+}
+
+using Patterns = std::map<std::string, std::vector<std::string>>;
+
+// Keyword patterns compiled once and reused across chunks.  Topics and
+// keywords get integer ids in sorted order, so the ids compare like the
+// strings they stand for.
+//
+// Several named pattern sets ("profiles") compile into one matcher over the
+// union of their keywords.  Topic ids then run over the profiles in name
+// order and over each profile's topics in name order, so every profile owns a
+// contiguous range of ids and a match's profile is topic_profiles[topic_id].
+// A keyword shared by several profiles is matched once and reported for the
+// topics of each; the matches of one profile, ids shifted to the start of its
+// range, are exactly those a scanner of that profile alone would report.
+class Scanner {
+public:
+    explicit Scanner(const Patterns& patterns) : Scanner(std::map<std::string, Patterns>{{"", patterns}}) {}
+
+    explicit Scanner(const std::map<std::string, Patterns>& profiles) {
+        std::map<std::string, int32_t> word_ids;
+        for (const auto& profile : profiles) {
+            for (const auto& pair : profile.second) {
+                topics_.push_back(pair.first);
+                topic_profiles_.push_back(static_cast<int32_t>(profiles_.size()));
+                for (const auto& word : pair.second) word_ids.emplace(word, 0);
+            }
+            profiles_.push_back(profile.first);
+        }
+        for (auto& pair : word_ids) {
+            pair.second = static_cast<int32_t>(words_.size());
+            words_.push_back(pair.first);
+        }
+        word_topics_.resize(words_.size());
+        int32_t t = 0;
+        for (const auto& profile : profiles) {
+            for (const auto& pair : profile.second) {
+                for (const auto& word : pair.second) {
+                    auto& ids = word_topics_[word_ids[word]];
+                    if (ids.empty() || ids.back() != t) ids.push_back(t);
+                }
+                ++t;
+            }
+        }
+        matcher_ = std::make_unique<Matcher>(words_);
+    }
+
+    py::tuple scan(const py::object& texts, int n_threads, bool fold_case) const {
+        // Reads the UTF-8 of every str in place instead of copying it into
+        // std::string; the list copy keeps the objects alive without the GIL.
+        py::list items = py::reinterpret_steal<py::list>(PySequence_List(texts.ptr()));
+        if (!items) throw py::error_already_set();
+        ViewColumn col;
+        col.views.reserve(items.size());
+        for (const auto& item : items) {
+            Py_ssize_t size = 0;
+            const char* data = nullptr;
+            if (PyUnicode_Check(item.ptr())) {
+                data = PyUnicode_AsUTF8AndSize(item.ptr(), &size);
+                if (!data) throw py::error_already_set();
+            } else if (PyBytes_Check(item.ptr())) {
+                data = PyBytes_AS_STRING(item.ptr());
+                size = PyBytes_GET_SIZE(item.ptr());
+            } else {
+                throw py::type_error("texts must contain only str or bytes");
+            }
+            col.views.emplace_back(data, static_cast<size_t>(size));
+        }
+        return scan_columns(std::vector<ViewColumn>{std::move(col)}, items.size(), n_threads, fold_case);
+    }
+
+    py::tuple scan_arrow(const py::sequence& columns, int n_threads, bool fold_case) const {
+        std::vector<py::object> keep_alive;
+        std::vector<TextColumn> cols;
+        for (const auto& obj : columns) cols.push_back(arrow_column(obj, keep_alive));
+        if (cols.empty()) throw py::value_error("scan_arrow needs at least one column");
+        for (const auto& col : cols) {
+            if (col.length != cols[0].length) throw py::value_error("Arrow columns must have the same length");
+        }
+        return scan_columns(cols, cols[0].length, n_threads, fold_case);
+    }
+
+    py::tuple scan_buffers(const py::buffer& data, const py::buffer& offsets, int n_threads, bool fold_case) const {
+        const py::buffer_info data_info = data.request();
+        const py::buffer_info offsets_info = offsets.request();
+        if (offsets_info.ndim != 1 || offsets_info.itemsize != 8 || offsets_info.strides[0] != 8 ||
+            (offsets_info.format != "q" && offsets_info.format != "l")) {
+            throw py::type_error("offsets must be a contiguous 1-D int64 buffer");
+        }
+        if (offsets_info.size < 1) throw py::value_error("offsets must hold n_rows + 1 entries");
+        const size_t data_size = static_cast<size_t>(data_info.size * data_info.itemsize);
+        TextColumn col;
+        col.data = static_cast<const char*>(data_info.ptr);
+        col.offsets64 = static_cast<const int64_t*>(offsets_info.ptr);
+        col.length = static_cast<size_t>(offsets_info.size - 1);
+        for (size_t i = 0; i < col.length; ++i) {
+            if (col.offsets64[i] < 0 || col.offsets64[i] > col.offsets64[i + 1]) {
+                throw py::value_error("offsets must be non-negative and non-decreasing");
+            }
+        }
+        if (static_cast<size_t>(col.offsets64[col.length]) > data_size) {
+            throw py::value_error("offsets point past the end of the data buffer");
+        }
+        return scan_columns(std::vector<TextColumn>{col}, col.length, n_threads, fold_case);
+    }
+
+    const std::vector<std::string>& topics() const { return topics_; }
+    const std::vector<std::string>& words() const { return words_; }
+    const std::vector<std::string>& profiles() const { return profiles_; }
+    py::array_t<int32_t> topic_profiles() const { return to_numpy(std::vector<int32_t>(topic_profiles_)); }
+
+private:
+    // Row i is the concatenation of columns[c][i] joined by separators.
+    template <class Column>
+    py::tuple scan_columns(const std::vector<Column>& columns, size_t n_rows, int n_threads, bool fold_case) const {
+        if (n_rows > static_cast<size_t>(INT32_MAX)) throw py::value_error("too many rows for int32 row ids");
+        struct Part { std::vector<int32_t> rows, topic_ids, word_ids; };
+        std::vector<Part> parts;
+        {
+            py::gil_scoped_release release;
+            parts = scan_blocks<Part>(n_rows, n_threads, [&](size_t begin, size_t end, Part& out) {
+                std::vector<Matcher::Hit> hits;
+                for (size_t i = begin; i < end; ++i) {
+                    hits.clear();
+                    Matcher::Cursor cur;
+                    for (const auto& col : columns) {
+                        if (fold_case) matcher_->feed<true>(col[i], cur, hits);
+                        else matcher_->feed<false>(col[i], cur, hits);
+                    }
+                    Matcher::order(hits, 0);
+                    for (const auto& hit : hits) {
+                        for (int32_t t : word_topics_[hit.keyword]) {
+                            out.rows.push_back(static_cast<int32_t>(i));
+                            out.topic_ids.push_back(t);
+                            out.word_ids.push_back(hit.keyword);
+                        }
+                    }
+                }
+            });
+        }
+        std::vector<std::vector<int32_t>> rows, topic_ids, word_ids;
+        for (auto& p : parts) {
+            rows.push_back(std::move(p.rows));
+            topic_ids.push_back(std::move(p.topic_ids));
+            word_ids.push_back(std::move(p.word_ids));
+        }
+        return py::make_tuple(to_numpy(concat(std::move(rows))), to_numpy(concat(std::move(topic_ids))),
+                              to_numpy(concat(std::move(word_ids))));
+    }
+
+    std::vector<std::string> topics_;
+    std::vector<std::string> words_;
+    std::vector<std::string> profiles_;
+    std::vector<int32_t> topic_profiles_;
+    std::vector<std::vector<int32_t>> word_topics_;
+    std::unique_ptr<Matcher> matcher_;
+};
+
+// Insert-only open-addressing set of 64-bit keys: one 8-byte slot per key,
+// kept at most half full.  Slot value 0 marks "empty", so key 0 is a flag.
+class KeySet {
+public:
+    bool insert(uint64_t key) {
+        if (key == 0) {
+            const bool fresh = !has_zero_;
+            has_zero_ = true;
+            size_ += fresh;
+            return fresh;
+        }
+        if ((size_ + 1) * 2 > slots_.size()) grow();
+        const size_t mask = slots_.size() - 1;
+        for (size_t i = mix(key) & mask;; i = (i + 1) & mask) {
+            if (slots_[i] == key) return false;
+            if (slots_[i] == 0) {
+                slots_[i] = key;
+                ++size_;
+                return true;
+            }
+        }
+    }
+
+    size_t size() const { return size_; }
+    size_t nbytes() const { return slots_.size() * sizeof(uint64_t); }
+
+    static uint64_t mix(uint64_t x) {  // splitmix64 finalizer
+        x ^= x >> 30; x *= 0xbf58476d1ce4e5b9ULL;
+        x ^= x >> 27; x *= 0x94d049bb133111ebULL;
+        return x ^ (x >> 31);
+    }
+
+private:
+    void grow() {
+        std::vector<uint64_t> old(std::max<size_t>(64, slots_.size() * 2), 0);
+        old.swap(slots_);
+        const size_t mask = slots_.size() - 1;
+        for (uint64_t key : old) {
+            if (key == 0) continue;
+            size_t i = mix(key) & mask;
+            while (slots_[i] != 0) i = (i + 1) & mask;
+            slots_[i] = key;
+        }
+    }
+
+    std::vector<uint64_t> slots_;
+    size_t size_ = 0;
+    bool has_zero_ = false;
+};
+
+// Running per-group sums that reproduce drop_duplicates(keep='first') followed
+// by groupby().mean() bit for bit: a row is dropped when its (group, item) pair
+// was already added, and the remaining values are summed in row order with the
+// same Kahan compensation as pandas' group_mean.  A pair's dedup key packs the
+// group's slot number above the 32-bit item, so distinct pairs never share one.
+// The low `partition_bits` of a group key name its partition; forget() drops a
+// partition's dedup keys once the caller knows no more of its rows will come.
+class GroupAggregator {
+public:
+    GroupAggregator(size_t n_values, int partition_bits) : k_(n_values) {
+        if (k_ == 0) throw py::value_error("n_values must be at least 1");
+        if (partition_bits < 0 || partition_bits > 63) throw py::value_error("partition_bits must be in [0, 63]");
+        partition_mask_ = (uint64_t{1} << partition_bits) - 1;
+    }
+
+    void add(const py::array_t<uint64_t, py::array::c_style | py::array::forcecast>& groups,
+             const py::array_t<uint64_t, py::array::c_style | py::array::forcecast>& items,
+             const py::array_t<double, py::array::c_style | py::array::forcecast>& values,
+             const py::array_t<bool, py::array::c_style | py::array::forcecast>& counted) {
+        const size_t n = static_cast<size_t>(groups.size());
+        if (static_cast<size_t>(items.size()) != n || static_cast<size_t>(counted.size()) != n) {
+            throw py::value_error("groups, items and counted must have the same length");
+        }
+        if (values.ndim() != 2 || static_cast<size_t>(values.shape(0)) != n || static_cast<size_t>(values.shape(1)) != k_) {
+            throw py::value_error("values must have shape (len(groups), n_values)");
+        }
+        const uint64_t* g = groups.data();
+        const uint64_t* it = items.data();
+        const double* v = values.data();
+        const bool* c = counted.data();
+        for (size_t i = 0; i < n; ++i) {
+            if (it[i] >> 32) throw py::value_error("items must be below 2**32");
+        }
+        py::gil_scoped_release release;
+        for (size_t i = 0; i < n; ++i) {
+            auto found = index_.find(g[i]);
+            size_t slot;
+            if (found == index_.end()) {
+                slot = keys_.size();
+                if (slot > UINT32_MAX) throw py::value_error("too many groups for 32-bit slot numbers");
+                index_.emplace(g[i], slot);
+                keys_.push_back(g[i]);
+                counts_.push_back(0);
+                sums_.resize(sums_.size() + k_, 0.0);
+                compensation_.resize(compensation_.size() + k_, 0.0);
+                nobs_.resize(nobs_.size() + k_, 0);
+            } else {
+                slot = found->second;
+            }
+            if (!seen_[g[i] & partition_mask_].insert((static_cast<uint64_t>(slot) << 32) | it[i])) continue;
+            counts_[slot] += c[i];
+            for (size_t j = 0; j < k_; ++j) {
+                const double val = v[i * k_ + j];
+                if (val != val) continue;
+                const size_t at = slot * k_ + j;
+                nobs_[at] += 1;
+                const double y = val - compensation_[at];
+                const double t = sums_[at] + y;
+                compensation_[at] = t - sums_[at] - y;
+                if (compensation_[at] != compensation_[at]) compensation_[at] = 0;  // +/-inf, as in pandas
+                sums_[at] = t;
+            }
+        }
+    }
+
+    // (groups, sums[m, k], nobs[m, k], counts[m]) in the order groups were first seen.
+    py::tuple result() const {
+        const auto m = static_cast<py::ssize_t>(keys_.size());
+        const auto k = static_cast<py::ssize_t>(k_);
+        py::array_t<uint64_t> keys(m);
+        py::array_t<double> sums({m, k});
+        py::array_t<int64_t> nobs({m, k});
+        py::array_t<int64_t> counts(m);
+        std::copy(keys_.begin(), keys_.end(), keys.mutable_data());
+        std::copy(sums_.begin(), sums_.end(), sums.mutable_data());
+        std::copy(nobs_.begin(), nobs_.end(), nobs.mutable_data());
+        std::copy(counts_.begin(), counts_.end(), counts.mutable_data());
+        return py::make_tuple(keys, sums, nobs, counts);
+    }
+
+    void forget(uint64_t partition) { seen_.erase(partition & partition_mask_); }
+
+    size_t n_groups() const { return keys_.size(); }
+    size_t n_seen() const {
+        size_t n = 0;
+        for (const auto& p : seen_) n += p.second.size();
+        return n;
+    }
+    size_t nbytes() const {
+        size_t seen = 0;
+        for (const auto& p : seen_) seen += p.second.nbytes();
+        return seen + keys_.capacity() * sizeof(uint64_t) + counts_.capacity() * sizeof(int64_t) +
+               (sums_.capacity() + compensation_.capacity()) * sizeof(double) + nobs_.capacity() * sizeof(int64_t) +
+               index_.size() * (sizeof(uint64_t) + sizeof(size_t) + 2 * sizeof(void*)) + index_.bucket_count() * sizeof(void*);
+    }
+
+private:
+    size_t k_;
+    uint64_t partition_mask_;
+    std::unordered_map<uint64_t, KeySet> seen_;
+    std::unordered_map<uint64_t, size_t> index_;
+    std::vector<uint64_t> keys_;
+    std::vector<int64_t> counts_;
+    std::vector<double> sums_, compensation_;
+    std::vector<int64_t> nobs_;
+};
+
 std::vector<std::tuple<int, std::string, std::string>> scan_chunks(
+    const std::vector<std::string>& texts,
+    const std::unordered_map<std::string, std::vector<std::string>>& topic_words,
+    int n_threads) {
+
+    std::unordered_map<std::string, int32_t> keyword_ids;
+    std::vector<std::string> keywords;
+    std::vector<std::vector<std::string>> keyword_topics;
+
+    for (const auto& pair : topic_words) {
+        for (const auto& word : pair.second) {
+            auto it = keyword_ids.emplace(word, static_cast<int32_t>(keywords.size())).first;
+            if (it->second == static_cast<int32_t>(keywords.size())) {
+                keywords.push_back(word);
+                keyword_topics.emplace_back();
+            }
+            keyword_topics[it->second].push_back(pair.first);
+        }
+    }
+
+    const Matcher matcher(keywords);
+    using Results = std::vector<std::tuple<int, std::string, std::string>>;
+    py::gil_scoped_release release;
+
+    return concat(scan_blocks<Results>(texts.size(), n_threads, [&](size_t begin, size_t end, Results& out) {
+        std::vector<Matcher::Hit> hits;
+        for (size_t i = begin; i < end; ++i) {
+            hits.clear();
+            matcher.scan(texts[i], hits);
+            for (const auto& hit : hits) {
+                for (const auto& t : keyword_topics[hit.keyword]) {
+                    out.emplace_back(static_cast<int>(i), t, keywords[hit.keyword]);
+                }
+            }
+        }
+    }));
+}
+
+// Reference n-gram implementation kept for parity tests and benchmarks.
+std::vector<std::tuple<int, std::string, std::string>> scan_chunks_ngram(
     const std::vector<std::string>& texts,
     const std::unordered_map<std::string, std::vector<std::string>>& topic_words) {
-    
+
     std::unordered_map<std::string, std::vector<std::string>> keyword_to_topics;
     size_t max_ngram = 1;
-    
+
     for (const auto& pair : topic_words) {
         for (const auto& word : pair.second) {
             keyword_to_topics[word].push_back(pair.first);
@@ -26,7 +784,7 @@ std::vector<std::tuple<int, std::string, std::string>> scan_chunks(
     }
 
     std::vector<std::tuple<int, std::string, std::string>> results;
-    py::gil_scoped_release release; 
+    py::gil_scoped_release release;
 
     for (size_t i = 0; i < texts.size(); ++i) {
         const std::string& text = texts[i];
@@ -49,7 +807,7 @@ std::vector<std::tuple<int, std::string, std::string>> scan_chunks(
 
         for (size_t j = 0; j < tokens.size(); ++j) {
             std::string ngram(tokens[j]);
-            
+
             auto it = keyword_to_topics.find(ngram);
             if (it != keyword_to_topics.end()) {
                 for (const auto& t : it->second) results.emplace_back(i, t, ngram);
@@ -69,5 +827,38 @@ std::vector<std::tuple<int, std::string, std::string>> scan_chunks(
 }
 
 PYBIND11_MODULE(fast_scanner, m) {
-    m.def("scan_chunks", &scan_chunks, "Zero-Copy O(N) C++ text scanner");
+    m.def("scan_chunks", &scan_chunks, py::arg("texts"), py::arg("topic_words"), py::arg("n_threads") = 1,
+          "Aho-Corasick keyword scanner (single pass, no per-token allocation)");
+    py::class_<Scanner>(m, "Scanner")
+        .def(py::init<const Patterns&>(), py::arg("patterns"))
+        .def(py::init<const std::map<std::string, Patterns>&>(), py::arg("profiles"),
+             "One matcher over the union of several named {topic: keywords} profiles")
+        .def("scan", &Scanner::scan, py::arg("texts"), py::arg("n_threads") = 1, py::arg("fold_case") = false,
+             "Scan texts and return (row_idx, topic_id, word_id) as int32 NumPy arrays; "
+             "n_threads=0 uses every core")
+        .def("scan_arrow", &Scanner::scan_arrow, py::arg("columns"), py::arg("n_threads") = 1,
+             py::arg("fold_case") = true,
+             "Scan Arrow string arrays in place; row i is the columns' values joined by a space, nulls empty. "
+             "Case folds as Python's str.lower(), so 'İ' is 'i' plus a token-ending dot, not Arrow's plain 'i'")
+        .def("scan_buffers", &Scanner::scan_buffers, py::arg("data"), py::arg("offsets"), py::arg("n_threads") = 1,
+             py::arg("fold_case") = true,
+             "Scan a raw UTF-8 data buffer sliced by n_rows + 1 int64 offsets, in place, folding case as scan_arrow does")
+        .def_property_readonly("topics", &Scanner::topics, "Topic names indexed by topic_id")
+        .def_property_readonly("words", &Scanner::words, "Keywords indexed by word_id")
+        .def_property_readonly("profiles", &Scanner::profiles, "Profile names indexed by profile_id ([''] for a single pattern set)")
+        .def_property_readonly("topic_profiles", &Scanner::topic_profiles, "profile_id of every topic_id, non-decreasing");
+    py::class_<GroupAggregator>(m, "GroupAggregator")
+        .def(py::init<size_t, int>(), py::arg("n_values"), py::arg("partition_bits") = 0)
+        .def("add", &GroupAggregator::add, py::arg("groups"), py::arg("items"), py::arg("values"), py::arg("counted"),
+             "Add rows (uint64 group key, item id below 2**32, n_values floats, counted flag), skipping every "
+             "(group, item) pair already added; NaN values are left out of sums and nobs")
+        .def("forget", &GroupAggregator::forget, py::arg("partition"),
+             "Drop the dedup keys of one partition; later rows of it count as new")
+        .def("result", &GroupAggregator::result, "(groups, sums, nobs, counts) in first-seen group order")
+        .def_property_readonly("n_groups", &GroupAggregator::n_groups)
+        .def_property_readonly("n_seen", &GroupAggregator::n_seen, "Distinct (group, item) pairs added so far")
+        .def_property_readonly("nbytes", &GroupAggregator::nbytes, "Approximate memory held");
+    m.def("hash_arrow", &hash_arrow, py::arg("columns"), py::arg("n_threads") = 1,
+          "uint64 hash of every row of equally long Arrow string arrays, over all its column values");
+    m.def("_scan_chunks_ngram", &scan_chunks_ngram, "Reference n-gram scanner kept for parity tests and benchmarks");
 }
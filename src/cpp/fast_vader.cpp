@@ -0,0 +1,435 @@
+// Native port of NLTK's VADER scorer (nltk.sentiment.vader.SentimentIntensityAnalyzer).
+//
+// Every rule below mirrors the Python implementation step by step, including its
+// quirks (a repeated token takes the context of its first occurrence, idioms are
+// matched case-sensitively, "but" shifts weights around its first occurrence), and
+// does its floating point arithmetic in the same order, so compound scores come out
+// the same as polarity_scores(text)["compound"].  VADER leans on Python's str
+// methods (split, lower, isupper); their Unicode tables are handed in by the caller.
+#include <pybind11/pybind11.h>
+#include <pybind11/stl.h>
+#include <pybind11/numpy.h>
+#include <algorithm>
+#include <array>
+#include <atomic>
+#include <cmath>
+#include <cstdint>
+#include <cstdio>
+#include <cstdlib>
+#include <exception>
+#include <limits>
+#include <string>
+#include <string_view>
+#include <thread>
+#include <unordered_map>
+#include <unordered_set>
+#include <vector>
+
+namespace py = pybind11;
+
+namespace {
+
+constexpr double B_INCR = 0.293;
+constexpr double B_DECR = -0.293;
+constexpr double C_INCR = 0.733;
+constexpr double N_SCALAR = -0.74;
+constexpr uint32_t N_CODEPOINTS = 0x110000;
+
+// Per code point flags, as Python's str methods see them.
+enum : uint8_t {
+    SPACE = 1,      // str.isspace()
+    UPPER = 2,      // str.isupper()
+    LOWER = 4,      // lowercase or titlecase: makes str.isupper() false
+    HAS_LOWER = 8,  // str.lower() changes it
+};
+
+const std::unordered_set<std::string> NEGATE = {
+    "aint", "arent", "cannot", "cant", "couldnt", "darent", "didnt", "doesnt",
+    "ain't", "aren't", "can't", "couldn't", "daren't", "didn't", "doesn't",
+    "dont", "hadnt", "hasnt", "havent", "isnt", "mightnt", "mustnt", "neither",
+    "don't", "hadn't", "hasn't", "haven't", "isn't", "mightn't", "mustn't",
+    "neednt", "needn't", "never", "none", "nope", "nor", "not", "nothing", "nowhere",
+    "oughtnt", "shant", "shouldnt", "uhuh", "wasnt", "werent",
+    "oughtn't", "shan't", "shouldn't", "uh-uh", "wasn't", "weren't",
+    "without", "wont", "wouldnt", "won't", "wouldn't", "rarely", "seldom", "despite",
+};
+
+const std::unordered_map<std::string, double> BOOSTER_DICT = {
+    {"absolutely", B_INCR}, {"amazingly", B_INCR}, {"awfully", B_INCR}, {"completely", B_INCR},
+    {"considerably", B_INCR}, {"decidedly", B_INCR}, {"deeply", B_INCR}, {"effing", B_INCR},
+    {"enormously", B_INCR}, {"entirely", B_INCR}, {"especially", B_INCR}, {"exceptionally", B_INCR},
+    {"extremely", B_INCR}, {"fabulously", B_INCR}, {"flipping", B_INCR}, {"flippin", B_INCR},
+    {"fricking", B_INCR}, {"frickin", B_INCR}, {"frigging", B_INCR}, {"friggin", B_INCR},
+    {"fully", B_INCR}, {"fucking", B_INCR}, {"greatly", B_INCR}, {"hella", B_INCR},
+    {"highly", B_INCR}, {"hugely", B_INCR}, {"incredibly", B_INCR}, {"intensely", B_INCR},
+    {"majorly", B_INCR}, {"more", B_INCR}, {"most", B_INCR}, {"particularly", B_INCR},
+    {"purely", B_INCR}, {"quite", B_INCR}, {"really", B_INCR}, {"remarkably", B_INCR},
+    {"so", B_INCR}, {"substantially", B_INCR}, {"thoroughly", B_INCR}, {"totally", B_INCR},
+    {"tremendously", B_INCR}, {"uber", B_INCR}, {"unbelievably", B_INCR}, {"unusually", B_INCR},
+    {"utterly", B_INCR}, {"very", B_INCR},
+    {"almost", B_DECR}, {"barely", B_DECR}, {"hardly", B_DECR}, {"just enough", B_DECR},
+    {"kind of", B_DECR}, {"kinda", B_DECR}, {"kindof", B_DECR}, {"kind-of", B_DECR},
+    {"less", B_DECR}, {"little", B_DECR}, {"marginally", B_DECR}, {"occasionally", B_DECR},
+    {"partly", B_DECR}, {"scarcely", B_DECR}, {"slightly", B_DECR}, {"somewhat", B_DECR},
+    {"sort of", B_DECR}, {"sorta", B_DECR}, {"sortof", B_DECR}, {"sort-of", B_DECR},
+};
+
+const std::unordered_map<std::string, double> SPECIAL_CASE_IDIOMS = {
+    {"the shit", 3}, {"the bomb", 3}, {"bad ass", 1.5}, {"yeah right", -2},
+    {"cut the mustard", 2}, {"kiss of death", -1.5}, {"hand to mouth", -2},
+};
+
+const std::unordered_set<std::string_view> PUNC_LIST = {
+    ".", "!", "?", ",", ";", ":", "-", "'", "\"",
+    "!!", "!!!", "??", "???", "?!?", "!?!", "?!?!", "!?!?",
+};
+
+// string.punctuation
+struct PunctTable {
+    std::array<bool, 256> is{};
+    PunctTable() {
+        for (unsigned char c : std::string_view("!\"#$%&'()*+,-./:;<=>?@[\\]^_`{|}~")) is[c] = true;
+    }
+};
+const PunctTable punct;
+
+// Decodes the code point at p[i] (valid UTF-8, as CPython hands it out) and advances i past it.
+inline uint32_t next_codepoint(const unsigned char* p, size_t& i) {
+    const unsigned char b = p[i];
+    if (b < 0x80) { i += 1; return b; }
+    if (b < 0xE0) { i += 2; return ((b & 0x1Fu) << 6) | (p[i - 1] & 0x3Fu); }
+    if (b < 0xF0) { i += 3; return ((b & 0x0Fu) << 12) | ((p[i - 2] & 0x3Fu) << 6) | (p[i - 1] & 0x3Fu); }
+    i += 4;
+    return ((b & 0x07u) << 18) | ((p[i - 3] & 0x3Fu) << 12) | ((p[i - 2] & 0x3Fu) << 6) | (p[i - 1] & 0x3Fu);
+}
+
+bool has_punct(std::string_view s) {
+    for (unsigned char c : s) if (punct.is[c]) return true;
+    return false;
+}
+
+// Python's round(x, 4): correctly rounded to 4 decimals, then back to the nearest double.
+double round4(double x) {
+    char buf[64];
+    std::snprintf(buf, sizeof(buf), "%.4f", x);
+    return std::strtod(buf, nullptr);
+}
+
+struct Token {
+    std::string text;   // as SentiText keeps it
+    std::string lower;  // text.lower()
+    bool upper;         // text.isupper()
+};
+
+py::array_t<double> to_numpy(std::vector<double>&& values) {
+    auto* owned = new std::vector<double>(std::move(values));
+    py::capsule free_when_done(owned, [](void* p) { delete static_cast<std::vector<double>*>(p); });
+    return py::array_t<double>(static_cast<py::ssize_t>(owned->size()), owned->data(), free_when_done);
+}
+
+// Runs fn(begin, end) over contiguous blocks of [0, n) on a pool of threads.  Must be called without the GIL.
+template <class Fn>
+void parallel_for(size_t n, int n_threads, Fn&& fn) {
+    size_t threads = n_threads > 0 ? static_cast<size_t>(n_threads) : std::max(1u, std::thread::hardware_concurrency());
+    threads = std::min(threads, std::max<size_t>(1, n / 256));
+    if (threads <= 1) {
+        fn(0, n);
+        return;
+    }
+    const size_t block = (n + threads * 8 - 1) / (threads * 8);
+    const size_t n_blocks = (n + block - 1) / block;
+    std::atomic<size_t> next_block{0};
+    std::exception_ptr error;
+    std::atomic<bool> failed{false};
+    auto worker = [&]() {
+        try {
+            for (size_t b = next_block++; b < n_blocks && !failed; b = next_block++) {
+                fn(b * block, std::min(n, (b + 1) * block));
+            }
+        } catch (...) {
+            if (!failed.exchange(true)) error = std::current_exception();
+        }
+    };
+    std::vector<std::thread> pool;
+    pool.reserve(threads - 1);
+    for (size_t t = 1; t < threads; ++t) pool.emplace_back(worker);
+    worker();
+    for (auto& th : pool) th.join();
+    if (error) std::rethrow_exception(error);
+}
+
+class Vader {
+public:
+    Vader(const std::unordered_map<std::string, double>& lexicon, const py::bytes& char_classes,
+          const std::unordered_map<uint32_t, std::string>& lower)
+        : lexicon_(lexicon), lower_(lower) {
+        const std::string classes = char_classes;
+        if (classes.size() != N_CODEPOINTS) throw std::invalid_argument("char_classes needs one byte per code point");
+        classes_.assign(classes.begin(), classes.end());
+        for (const auto& kv : lower) {
+            if (kv.first >= N_CODEPOINTS) throw std::invalid_argument("lowercase mapping outside the Unicode range");
+            classes_[kv.first] |= HAS_LOWER;
+        }
+        for (uint32_t c = 0; c < 0x80; ++c) {
+            const auto it = lower_.find(c);
+            if (it != lower_.end() && it->second.size() != 1) throw std::invalid_argument("ASCII must lowercase to ASCII");
+            ascii_lower_[c] = it != lower_.end() ? it->second[0] : static_cast<char>(c);
+        }
+    }
+
+    // compound score of every text; NaN for items that are not str or cannot be encoded as UTF-8.
+    py::array_t<double> compound(const py::sequence& texts, int n_threads) const {
+        const size_t n = texts.size();
+        std::vector<py::object> items;
+        std::vector<std::string_view> views(n);
+        std::vector<bool> valid(n, false);
+        items.reserve(n);
+        for (size_t i = 0; i < n; ++i) {
+            items.push_back(texts[i]);
+            PyObject* obj = items.back().ptr();
+            if (!PyUnicode_Check(obj)) continue;
+            Py_ssize_t size = 0;
+            const char* data = PyUnicode_AsUTF8AndSize(obj, &size);
+            if (data == nullptr) {
+                PyErr_Clear();
+                continue;
+            }
+            views[i] = std::string_view(data, static_cast<size_t>(size));
+            valid[i] = true;
+        }
+        std::vector<double> out(n, std::numeric_limits<double>::quiet_NaN());
+        {
+            py::gil_scoped_release release;
+            parallel_for(n, n_threads, [&](size_t begin, size_t end) {
+                for (size_t i = begin; i < end; ++i) if (valid[i]) out[i] = score(views[i]);
+            });
+        }
+        return to_numpy(std::move(out));
+    }
+
+    double score(std::string_view text) const {
+        const std::vector<Token> words = words_and_emoticons(text);
+        if (words.empty()) return 0.0;
+        size_t allcaps = 0;
+        for (const auto& w : words) allcaps += w.upper;
+        const bool is_cap_diff = allcaps > 0 && allcaps < words.size();
+
+        // list.index(): a repeated token is scored in the context of its first occurrence.
+        std::unordered_map<std::string_view, size_t> first_index;
+        for (size_t k = 0; k < words.size(); ++k) first_index.emplace(words[k].text, k);
+
+        std::vector<double> sentiments;
+        sentiments.reserve(words.size());
+        for (const auto& item : words) {
+            const size_t i = first_index.at(item.text);
+            if ((i < words.size() - 1 && item.lower == "kind" && words[i + 1].lower == "of") ||
+                BOOSTER_DICT.count(item.lower)) {
+                sentiments.push_back(0.0);
+                continue;
+            }
+            sentiments.push_back(sentiment_valence(words, item, i, is_cap_diff));
+        }
+        but_check(words, sentiments);
+
+        double sum_s = 0.0;
+        for (double s : sentiments) sum_s += s;
+        const double punct_emph_amplifier = punctuation_emphasis(text);
+        if (sum_s > 0) sum_s += punct_emph_amplifier;
+        else if (sum_s < 0) sum_s -= punct_emph_amplifier;
+        return round4(sum_s / std::sqrt(sum_s * sum_s + 15.0));
+    }
+
+private:
+    // SentiText._words_and_emoticons: whitespace-split tokens longer than one character,
+    // with one leading or trailing run from PUNC_LIST stripped off a word.
+    std::vector<Token> words_and_emoticons(std::string_view text) const {
+        const auto* p = reinterpret_cast<const unsigned char*>(text.data());
+        std::vector<Token> words;
+        size_t i = 0;
+        while (i < text.size()) {
+            const size_t start = i;
+            if (classes_[next_codepoint(p, i)] & SPACE) continue;
+            size_t end = i, n_chars = 1;
+            while (i < text.size() && !(classes_[next_codepoint(p, i)] & SPACE)) {
+                end = i;
+                n_chars++;
+            }
+            if (n_chars > 1) words.push_back(make_token(strip_punctuation(text.substr(start, end - start), n_chars)));
+        }
+        return words;
+    }
+
+    // SentiText._words_plus_punc maps "p + w" and "w + p" to w for every p in PUNC_LIST and
+    // every punctuation-free word w of more than one character in the text.  The token
+    // itself supplies that word, so the lookup reduces to checking the token's shape.
+    static std::string_view strip_punctuation(std::string_view we, size_t n_chars) {
+        size_t lead = 0, trail = 0;
+        while (lead < we.size() && punct.is[static_cast<unsigned char>(we[lead])]) lead++;
+        while (trail < we.size() && punct.is[static_cast<unsigned char>(we[we.size() - 1 - trail])]) trail++;
+        if (trail > 0 && lead == 0) {
+            std::string_view w = we.substr(0, we.size() - trail);
+            if (n_chars - trail > 1 && PUNC_LIST.count(we.substr(we.size() - trail)) && !has_punct(w)) return w;
+        } else if (lead > 0 && trail == 0) {
+            std::string_view w = we.substr(lead);
+            if (n_chars - lead > 1 && PUNC_LIST.count(we.substr(0, lead)) && !has_punct(w)) return w;
+        }
+        return we;
+    }
+
+    Token make_token(std::string_view text) const {
+        Token t{std::string(text), std::string(), false};
+        t.lower.reserve(text.size());
+        const auto* p = reinterpret_cast<const unsigned char*>(text.data());
+        bool cased = false, lower = false;
+        size_t i = 0;
+        while (i < text.size()) {
+            const size_t at = i;
+            const uint32_t cp = next_codepoint(p, i);
+            const uint8_t cls = classes_[cp];
+            lower |= (cls & LOWER) != 0;
+            cased |= (cls & UPPER) != 0;
+            if (cp < 0x80) t.lower += ascii_lower_[cp];
+            else if (cls & HAS_LOWER) t.lower += lower_.at(cp);
+            else t.lower.append(text.data() + at, i - at);
+        }
+        t.upper = cased && !lower;
+        return t;
+    }
+
+    bool in_lexicon(const std::string& word) const { return lexicon_.count(word) != 0; }
+
+    static bool negated(const Token& word) {
+        return NEGATE.count(word.lower) || word.lower.find("n't") != std::string::npos;
+    }
+
+    static double scalar_inc_dec(const Token& word, double valence, bool is_cap_diff) {
+        const auto it = BOOSTER_DICT.find(word.lower);
+        if (it == BOOSTER_DICT.end()) return 0.0;
+        double scalar = it->second;
+        if (valence < 0) scalar *= -1;
+        if (word.upper && is_cap_diff) {
+            if (valence > 0) scalar += C_INCR;
+            else scalar -= C_INCR;
+        }
+        return scalar;
+    }
+
+    double sentiment_valence(const std::vector<Token>& words, const Token& item, size_t i, bool is_cap_diff) const {
+        const auto it = lexicon_.find(item.lower);
+        if (it == lexicon_.end()) return 0.0;
+        double valence = it->second;
+        if (item.upper && is_cap_diff) {
+            if (valence > 0) valence += C_INCR;
+            else valence -= C_INCR;
+        }
+        for (size_t start_i = 0; start_i < 3; ++start_i) {
+            if (i > start_i && !in_lexicon(words[i - (start_i + 1)].lower)) {
+                double s = scalar_inc_dec(words[i - (start_i + 1)], valence, is_cap_diff);
+                if (start_i == 1 && s != 0) s = s * 0.95;
+                if (start_i == 2 && s != 0) s = s * 0.9;
+                valence = valence + s;
+                valence = never_check(valence, words, start_i, i);
+                if (start_i == 2) valence = idioms_check(valence, words, i);
+            }
+        }
+        return least_check(valence, words, i);
+    }
+
+    double least_check(double valence, const std::vector<Token>& words, size_t i) const {
+        if (i > 1 && !in_lexicon(words[i - 1].lower) && words[i - 1].lower == "least") {
+            if (words[i - 2].lower != "at" && words[i - 2].lower != "very") valence = valence * N_SCALAR;
+        } else if (i > 0 && !in_lexicon(words[i - 1].lower) && words[i - 1].lower == "least") {
+            valence = valence * N_SCALAR;
+        }
+        return valence;
+    }
+
+    static void but_check(const std::vector<Token>& words, std::vector<double>& sentiments) {
+        size_t bi = 0;
+        while (bi < words.size() && words[bi].lower != "but") bi++;
+        if (bi == words.size()) return;
+        for (size_t sidx = 0; sidx < sentiments.size(); ++sidx) {
+            if (sidx < bi) sentiments[sidx] = sentiments[sidx] * 0.5;
+            else if (sidx > bi) sentiments[sidx] = sentiments[sidx] * 1.5;
+        }
+    }
+
+    static double idioms_check(double valence, const std::vector<Token>& words, size_t i) {
+        const std::string& w0 = words[i].text;
+        const std::string& w1 = words[i - 1].text;
+        const std::string& w2 = words[i - 2].text;
+        const std::string& w3 = words[i - 3].text;
+        const std::string onezero = w1 + " " + w0;
+        const std::string twoonezero = w2 + " " + w1 + " " + w0;
+        const std::string twoone = w2 + " " + w1;
+        const std::string threetwoone = w3 + " " + w2 + " " + w1;
+        const std::string threetwo = w3 + " " + w2;
+        for (const std::string* seq : {&onezero, &twoonezero, &twoone, &threetwoone, &threetwo}) {
+            const auto it = SPECIAL_CASE_IDIOMS.find(*seq);
+            if (it != SPECIAL_CASE_IDIOMS.end()) {
+                valence = it->second;
+                break;
+            }
+        }
+        if (words.size() - 1 > i) {
+            const auto it = SPECIAL_CASE_IDIOMS.find(w0 + " " + words[i + 1].text);
+            if (it != SPECIAL_CASE_IDIOMS.end()) valence = it->second;
+        }
+        if (words.size() - 1 > i + 1) {
+            const auto it = SPECIAL_CASE_IDIOMS.find(w0 + " " + words[i + 1].text + " " + words[i + 2].text);
+            if (it != SPECIAL_CASE_IDIOMS.end()) valence = it->second;
+        }
+        if (BOOSTER_DICT.count(threetwo) || BOOSTER_DICT.count(twoone)) valence = valence + B_DECR;
+        return valence;
+    }
+
+    static double never_check(double valence, const std::vector<Token>& words, size_t start_i, size_t i) {
+        auto so_or_this = [](const std::string& w) { return w == "so" || w == "this"; };
+        if (start_i == 0) {
+            if (negated(words[i - 1])) valence = valence * N_SCALAR;
+        }
+        if (start_i == 1) {
+            if (words[i - 2].text == "never" && so_or_this(words[i - 1].text)) valence = valence * 1.5;
+            else if (negated(words[i - (start_i + 1)])) valence = valence * N_SCALAR;
+        }
+        if (start_i == 2) {
+            if ((words[i - 3].text == "never" && so_or_this(words[i - 2].text)) || so_or_this(words[i - 1].text))
+                valence = valence * 1.25;
+            else if (negated(words[i - (start_i + 1)])) valence = valence * N_SCALAR;
+        }
+        return valence;
+    }
+
+    static double punctuation_emphasis(std::string_view text) {
+        const auto ep_count = std::min<std::ptrdiff_t>(std::count(text.begin(), text.end(), '!'), 4);
+        const auto qm_count = std::count(text.begin(), text.end(), '?');
+        const double ep_amplifier = static_cast<double>(ep_count) * 0.292;
+        double qm_amplifier = 0;
+        if (qm_count > 1) qm_amplifier = qm_count <= 3 ? static_cast<double>(qm_count) * 0.18 : 0.96;
+        return ep_amplifier + qm_amplifier;
+    }
+
+    std::unordered_map<std::string, double> lexicon_;
+    std::vector<uint8_t> classes_;
+    std::unordered_map<uint32_t, std::string> lower_;
+    std::array<char, 0x80> ascii_lower_{};
+};
+
+}  // namespace
+
+PYBIND11_MODULE(fast_vader, m) {
+    m.attr("SPACE") = static_cast<int>(SPACE);
+    m.attr("UPPER") = static_cast<int>(UPPER);
+    m.attr("LOWER") = static_cast<int>(LOWER);
+    py::class_<Vader>(m, "Vader")
+        .def(py::init<const std::unordered_map<std::string, double>&, const py::bytes&,
+                      const std::unordered_map<uint32_t, std::string>&>(),
+             py::arg("lexicon"), py::arg("char_classes"), py::arg("lower"),
+             "lexicon: VADER's word -> valence; char_classes: SPACE/UPPER/LOWER flags for each of the "
+             "0x110000 code points; lower: str.lower() of every code point it changes")
+        .def("compound", &Vader::compound, py::arg("texts"), py::arg("n_threads") = 1,
+             "VADER compound score of every text as a float64 NumPy array, scored without the GIL; "
+             "NaN where an item is not a str or cannot be encoded as UTF-8. n_threads=0 uses every core")
+        .def("score", [](const Vader& v, const std::string& text) { return v.score(text); }, py::arg("text"),
+             "compound score of a single text");
+}
@@ -0,0 +1,231 @@
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+import fast_scanner
+from spotify_sentiment.core.sketches import ShowSketches, show_hashes
+
+_FIELD = 24  # bits per packed key field: up to 16M keywords and 16M distinct dates
+NO_DAY = np.iinfo(np.int32).min
+_COLUMNS = ('topic', 'word', 'day', 'sums', 'nobs', 'counts')
+
+@dataclass
+class EncodedRows:
+    """
+    Rows as the aggregation reads them, columnar and without Python strings:
+    showUri as an int32 code into the accumulator's dictionary (-1 when missing),
+    the date as int32 days since 1970-01-01 (NO_DAY when missing), the chart rank
+    as float32 (exact for chart positions; NaN when missing) and the score as float64.
+    """
+    show: np.ndarray
+    day: np.ndarray
+    rank: np.ndarray
+    score: np.ndarray
+
+    def __len__(self) -> int: return len(self.day)
+
+    def take(self, idx: np.ndarray) -> "EncodedRows":
+        return EncodedRows(self.show[idx], self.day[idx], self.rank[idx], self.score[idx])
+
+    @property
+    def nbytes(self) -> int: return self.show.nbytes + self.day.nbytes + self.rank.nbytes + self.score.nbytes
+
+class ShowCodes:
+    """
+    int32 codes of the showUri values seen in a run, in order of first appearance,
+    with their stable hashes for the sketches (hashed when first asked for).
+    Accumulators sharing one can all add rows that any of them encoded.
+    """
+
+    def __init__(self):
+        self._codes: Dict[str, int] = {}
+        self._hashes = np.empty(0, dtype=np.uint64)
+        self._unhashed: List[str] = []
+
+    def __len__(self) -> int: return len(self._codes)
+
+    def encode(self, shows: pd.Series) -> np.ndarray:
+        codes, uniques = pd.factorize(shows)
+        known = len(self._codes)
+        lookup = np.fromiter((self._codes.setdefault(u, len(self._codes)) for u in uniques), dtype=np.int32, count=len(uniques))
+        if len(self._codes) > known: self._unhashed.extend(np.asarray(uniques, dtype=object)[lookup >= known])
+        return np.append(lookup, np.int32(-1))[codes]  # factorize codes a missing value as -1
+
+    def hashes(self) -> np.ndarray:
+        """show_hashes of every code, indexed by code."""
+        if self._unhashed:
+            self._hashes = np.concatenate([self._hashes, show_hashes(self._unhashed)])
+            self._unhashed = []
+        return self._hashes
+
+class MetricsAccumulator:
+    """
+    Topic and word metrics built up one chunk of matches at a time.
+
+    Equivalent to concatenating every match, dropping duplicate (showUri, topic[, word],
+    date) rows and taking groupby means, down to the last bit. Memory holds one set
+    of running sums per output row plus an 8-byte key per distinct dedup key; when
+    rows arrive in date order, seal() frees the keys of finished dates. Matches come
+    in as EncodedRows, 20 bytes each plus the 8 of their topic and keyword ids.
+    Sums are kept of `rank` rather than popularity: popularity depends on the
+    deepest rank of the whole day, which is only known once every chunk is in,
+    and for integer ranks sum(max + 1 - rank) is exact either way.
+    """
+
+    def __init__(self, topics: List[str], words: List[str], sketch_precision: int = 0, shows: Optional[ShowCodes] = None):
+        if len(topics) >= 1 << 16 or len(words) >= 1 << _FIELD: raise ValueError("too many topics or keywords to pack")
+        self.topics, self.words = topics, words
+        # The date code is the low field of every group key, so it doubles as the dedup partition.
+        self.topic = fast_scanner.GroupAggregator(2, partition_bits=_FIELD)
+        self.word = fast_scanner.GroupAggregator(2, partition_bits=_FIELD)
+        self.date_max: Optional[pd.Series] = None  # deepest rank per day number
+        self.shows = shows if shows is not None else ShowCodes()
+        # Distinct-show sketches per group (see ShowSketches), fed with a stable hash of each show code's showUri.
+        self.sketches = ShowSketches(topics, words, sketch_precision) if sketch_precision else None
+        self._days: List[int] = []  # day number of each date code
+        self._date_codes: Dict[int, int] = {}
+        self._open: Dict[int, int] = {}
+        self._sealed: Optional[int] = None
+        self._loaded: Dict[str, List[Dict[str, np.ndarray]]] = {'topic': [], 'word': []}  # groups of merged partials
+        self.matched = False
+
+    def encode(self, chunk: pd.DataFrame) -> EncodedRows:
+        """EncodedRows of a chunk's date (datetime64), rank, sentiment_score and showUri columns."""
+        show = self.shows.encode(chunk['showUri'])
+        dates = chunk['date'].to_numpy('datetime64[D]')
+        day = np.where(np.isnat(dates), NO_DAY, dates.astype(np.int64)).astype(np.int32)
+        return EncodedRows(show, day, chunk['rank'].to_numpy(np.float32), chunk['sentiment_score'].to_numpy(np.float64))
+
+    def observe(self, rows: EncodedRows) -> None:
+        """Tracks each date's deepest rank over every row, matched or not."""
+        dated = rows.day != NO_DAY
+        self._observe_max(pd.Series(rows.rank[dated]).groupby(rows.day[dated]).max())
+
+    def _observe_max(self, day_max: pd.Series) -> None:
+        self.date_max = day_max if self.date_max is None else pd.concat([self.date_max, day_max]).groupby(level=0).max()
+
+    def add(self, rows: EncodedRows, topic_ids: np.ndarray, word_ids: np.ndarray) -> None:
+        """`rows` are the EncodedRows of every match, in scan order, with its topic and keyword ids."""
+        self.matched = self.matched or len(rows) > 0
+        dated = rows.day != NO_DAY
+        rows, topic_ids, word_ids = rows.take(dated), topic_ids[dated], word_ids[dated]
+        if self._sealed is not None and len(rows) and rows.day.min() < self._sealed:
+            raise ValueError(f"rows dated before {_date(self._sealed):%Y-%m-%d} arrived after that date was sealed")
+        days, inverse = np.unique(rows.day, return_inverse=True)
+        for d in days.tolist():
+            if d not in self._date_codes:
+                self._date_codes[d] = self._open[d] = len(self._days)
+                self._days.append(d)
+        if len(self._days) >= 1 << _FIELD: raise ValueError("too many distinct dates to pack")
+
+        dates = np.fromiter(map(self._date_codes.__getitem__, days.tolist()), dtype=np.uint64, count=len(days))[inverse.ravel()]
+        topics = topic_ids.astype(np.uint64) << np.uint64(2 * _FIELD)
+        words = word_ids.astype(np.uint64) << np.uint64(_FIELD)
+        # Codes are exact and stable for the run; every missing showUri shares one key, as in drop_duplicates.
+        shows = rows.show.astype(np.uint32)
+        values = np.column_stack([rows.score, rows.rank.astype(np.float64)])
+        counted = rows.show >= 0
+        self.topic.add(topics | dates, shows, values, counted)
+        self.word.add(topics | words | dates, shows, values, counted)
+        if self.sketches is not None:
+            hashes, days = self.shows.hashes()[rows.show[counted]], rows.day[counted]
+            self.sketches.add('topic', topic_ids[counted], word_ids[counted], days, hashes)
+            self.sketches.add('word', topic_ids[counted], word_ids[counted], days, hashes)
+
+    def seal(self, before: pd.Timestamp) -> None:
+        """Frees the dedup keys of dates before `before`; rows dated earlier may not be added afterwards."""
+        before = _day(before)
+        self._sealed = before if self._sealed is None else max(self._sealed, before)
+        for d in [d for d in self._open if d < self._sealed]:
+            code = self._open.pop(d)
+            self.topic.forget(code)
+            self.word.forget(code)
+
+    @property
+    def nbytes(self) -> int: return self.topic.nbytes + self.word.nbytes
+
+    def topic_metrics(self) -> pd.DataFrame:
+        return self._frame(self._groups('topic'), ['topic', 'date'])
+
+    def word_metrics(self) -> pd.DataFrame:
+        return self._frame(self._groups('word'), ['topic', 'matched_word', 'date'])
+
+    def save(self, path: Path) -> None:
+        """Writes the metrics so far as a partial that merge() combines with those of other date ranges."""
+        date_max = self.date_max if self.date_max is not None else pd.Series(dtype=np.float64)
+        arrays = {'topics': np.array(self.topics, dtype=str), 'words': np.array(self.words, dtype=str), 'matched': np.array(self.matched),
+                  'max_day': date_max.index.to_numpy(np.int64), 'max_rank': date_max.to_numpy(np.float64)}
+        for level in ('topic', 'word'): arrays.update({f'{level}_{k}': v for k, v in self._groups(level).items()})
+        if self.sketches is not None:
+            arrays['sketch_precision'] = np.array(self.sketches.precision)
+            for level in ('topic', 'word'): arrays.update({f'sketch_{level}_{k}': v for k, v in self.sketches.entries(level).items()})
+        tmp = path.with_name(path.name + '.tmp')
+        with open(tmp, 'wb') as f: np.savez(f, **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def merge(cls, paths: Sequence[Path]) -> "MetricsAccumulator":
+        """
+        The metrics of several partials written by save(). Their groups are taken over
+        as they are, so two partials may not hold the same (topic, date): the
+        compensated sums of one group cannot be merged bit for bit. Deepest ranks
+        and show sketches merge by max, so they may overlap.
+        """
+        merged = None
+        for path in paths:
+            with np.load(path) as part:
+                if merged is None:
+                    merged = cls(part['topics'].tolist(), part['words'].tolist(),
+                                 int(part['sketch_precision']) if 'sketch_precision' in part else 0)
+                elif part['topics'].tolist() != merged.topics or part['words'].tolist() != merged.words:
+                    raise ValueError(f"{Path(path).name} was scanned for other topic keywords")
+                merged.matched = merged.matched or bool(part['matched'])
+                merged._observe_max(pd.Series(part['max_rank'], index=part['max_day']))
+                for level in ('topic', 'word'): merged._loaded[level].append({k: part[f'{level}_{k}'] for k in _COLUMNS})
+                if merged.sketches is not None:
+                    if 'sketch_precision' not in part or int(part['sketch_precision']) != merged.sketches.precision:
+                        raise ValueError(f"{Path(path).name} has no sketches of precision {merged.sketches.precision}")
+                    for level in ('topic', 'word'):
+                        merged.sketches.extend(level, *(part[f'sketch_{level}_{k}'] for k in ('topic', 'word', 'day', 'index', 'rank')))
+        if merged is None: raise ValueError("no partials to merge")
+        topics = merged._groups('topic')
+        if pd.DataFrame({'topic': topics['topic'], 'day': topics['day']}).duplicated().any():
+            raise ValueError("partials share a (topic, date) group; each date has to be aggregated by one partial")
+        return merged
+
+    def _groups(self, level: str) -> Dict[str, np.ndarray]:
+        """Topic id, word id, day number, sums, nobs and counts of every group of `level`, loaded ones included."""
+        groups, sums, nobs, counts = (self.topic if level == 'topic' else self.word).result()
+        mask = np.uint64((1 << _FIELD) - 1)
+        parts = [{'topic': (groups >> np.uint64(2 * _FIELD)).astype(np.int32),
+                  'word': ((groups >> np.uint64(_FIELD)) & mask).astype(np.int32),
+                  'day': np.array(self._days, dtype=np.int64)[(groups & mask).astype(np.int64)],
+                  'sums': sums, 'nobs': nobs, 'counts': counts}] + self._loaded[level]
+        return {k: np.concatenate([p[k] for p in parts]) for k in _COLUMNS}
+
+    def _frame(self, groups: Dict[str, np.ndarray], keys: List[str]) -> pd.DataFrame:
+        topic, word, day, sums, nobs, counts = (groups[k] for k in _COLUMNS)
+        date = pd.DatetimeIndex(day.astype('datetime64[D]').astype('datetime64[ns]'))
+        day_max = pd.Series(day).map(self.date_max).to_numpy(np.float64) if self.date_max is not None else np.full(len(day), np.nan)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            sentiment = np.where(nobs[:, 0] > 0, sums[:, 0] / nobs[:, 0], np.nan)
+            popularity = np.where(nobs[:, 1] > 0, (nobs[:, 1] * (day_max + 1) - sums[:, 1]) / nobs[:, 1], np.nan)
+        order = np.lexsort((date.to_numpy(), word, topic))
+        out = pd.DataFrame({
+            'topic': pd.Categorical.from_codes(topic[order], categories=self.topics),
+            'matched_word': pd.Categorical.from_codes(word[order], categories=self.words),
+            'date': date[order],
+            'avg_sentiment': sentiment[order],
+            'avg_popularity': popularity[order],
+            'sample_size': counts[order],
+        })
+        return out[keys + ['avg_sentiment', 'avg_popularity', 'sample_size']]
+
+def _day(date: pd.Timestamp) -> int:
+    return int(np.datetime64(pd.Timestamp(date).date(), 'D').astype(np.int64))
+
+def _date(day: int) -> pd.Timestamp:
+    return pd.Timestamp(np.datetime64(day, 'D'))
@@ -0,0 +1,160 @@
+import hashlib
+import sqlite3
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Hashable, Iterable, List, Sequence, Tuple
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import fast_scanner
+
+class LRUCache:
+    """Bounded mapping that evicts the least recently used key."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+
+    def __len__(self) -> int: return len(self._data)
+    def __contains__(self, key: Hashable) -> bool: return key in self._data
+
+    def get(self, key: Hashable, default=None):
+        try: self._data.move_to_end(key)
+        except KeyError: return default
+        return self._data[key]
+
+    def __setitem__(self, key: Hashable, value) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize: self._data.popitem(last=False)
+
+class ScanMemo:
+    """
+    Scanner matches per distinct text, for texts that repeat within a run.
+
+    The daily charts list the same episodes day after day, so most rows repeat
+    an (episodeName, description) pair seen before. Each row is keyed by a
+    64-bit hash of its text columns, only texts new to the memo are scanned,
+    and their matches are fanned back out onto every row that carries them.
+    The result equals scanning every row. Each text's matches are kept as packed
+    int32 (topic_id, word_id) pairs; the LRU holds at most `maxsize` texts.
+    """
+
+    def __init__(self, scanner: "fast_scanner.Scanner", maxsize: int):
+        self.scanner = scanner
+        self.memo = LRUCache(maxsize)
+        self.rows = self.unique = self.scanned = 0
+        self.scan_seconds = 0.0
+
+    def scan_arrow(self, columns: Sequence[pa.Array], n_threads: int = 1) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Same (row_idx, topic_id, word_id) arrays as scanner.scan_arrow(columns)."""
+        codes, keys = pd.factorize(fast_scanner.hash_arrow(columns, n_threads))
+        n, k = len(codes), len(keys)
+        first = np.empty(k, dtype=np.int64)
+        first[codes[::-1]] = np.arange(n - 1, -1, -1)
+        keys = keys.tolist()
+        entries = [self.memo.get(h) for h in keys]
+        new = [i for i, e in enumerate(entries) if e is None]
+        if new:
+            t0 = time.perf_counter()
+            rows, topic_ids, word_ids = self.scanner.scan_arrow([c.take(first[new]) for c in columns], n_threads=n_threads)
+            self.scan_seconds += time.perf_counter() - t0
+            pairs = np.column_stack([topic_ids, word_ids]).astype(np.int32)
+            bounds = np.searchsorted(rows, np.arange(len(new) + 1))
+            for j, i in enumerate(new):
+                entries[i] = self.memo[keys[i]] = pairs[bounds[j]:bounds[j + 1]].tobytes()
+        self.rows, self.unique, self.scanned = self.rows + n, self.unique + k, self.scanned + len(new)
+
+        # Fan-out: row r gets the pairs of its text, in the order the scanner found them.
+        counts = np.fromiter(map(len, entries), dtype=np.int64, count=k) // 8
+        pairs = np.frombuffer(b''.join(entries), dtype=np.int32).reshape(-1, 2)
+        row_counts = counts[codes]
+        row_starts = np.cumsum(row_counts) - row_counts
+        offsets = np.arange(row_counts.sum()) + np.repeat((np.cumsum(counts) - counts)[codes] - row_starts, row_counts)
+        return np.repeat(np.arange(n, dtype=np.int32), row_counts), pairs[offsets, 0].copy(), pairs[offsets, 1].copy()
+
+    @property
+    def saved_seconds(self) -> float:
+        """Scan time the memo saved, estimated from the per-text time of the texts it did scan."""
+        return self.scan_seconds / max(self.scanned, 1) * (self.rows - self.scanned)
+
+class SentimentCache:
+    """
+    Sentiment scores that survive between runs.
+
+    Entries are keyed by a 64-bit BLAKE2b hash of the scorer version plus the
+    description, so a new analyzer or lexicon simply stops hitting the old rows.
+    A bounded in-memory LRU sits in front of a SQLite file; the file keeps at
+    most `max_rows` entries and drops the ones least recently used by a run.
+    """
+
+    _BATCH = 900  # stays under SQLite's host-parameter limit
+
+    def __init__(self, path: Path, version: str, memory_items: int, max_rows: int):
+        self.version = version
+        self._seed = hashlib.blake2b(version.encode() + b"\0", digest_size=8)
+        self.max_rows = max_rows
+        self.memory = LRUCache(memory_items)
+        self.hits = self.misses = 0
+        self._run = int(time.time())
+        self._touched: List[int] = []
+        path.parent.mkdir(exist_ok=True, parents=True)
+        self._db = sqlite3.connect(path, timeout=60)  # concurrent shards wait for each other's writes
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS scores (key INTEGER PRIMARY KEY, score REAL NOT NULL, last_used INTEGER NOT NULL)")
+        # Eviction takes the least recently used rows first; without the index that is a full sort of the table.
+        self._db.execute("CREATE INDEX IF NOT EXISTS scores_last_used ON scores(last_used)")
+
+    def key(self, text: str) -> int:
+        h = self._seed.copy()
+        h.update((text if isinstance(text, str) else repr(text)).encode("utf-8", "surrogatepass"))
+        return int.from_bytes(h.digest(), "little", signed=True)
+
+    def lookup(self, texts: Iterable[str]) -> Dict[str, float]:
+        """Returns the cached score of every text that has one."""
+        found, cold, n = {}, {}, 0
+        for t in texts:
+            n += 1
+            k = self.key(t)
+            score = self.memory.get(k)
+            if score is None: cold[k] = t
+            else: found[t] = score
+        keys = list(cold)
+        for i in range(0, len(keys), self._BATCH):
+            part = keys[i:i + self._BATCH]
+            rows = self._db.execute(f"SELECT key, score FROM scores WHERE key IN ({','.join('?' * len(part))})", part)
+            for k, score in rows:
+                found[cold[k]] = score
+                self.memory[k] = score
+                self._touched.append(k)
+        self.hits += len(found)
+        self.misses += n - len(found)
+        return found
+
+    def update(self, scores: Dict[str, float]) -> None:
+        rows = []
+        for t, score in scores.items():
+            k = self.key(t)
+            self.memory[k] = score
+            rows.append((k, score, self._run))
+        self._db.executemany("INSERT OR REPLACE INTO scores VALUES (?, ?, ?)", rows)
+        if self._touched:
+            self._db.executemany("UPDATE scores SET last_used = ? WHERE key = ?", ((self._run, k) for k in self._touched))
+            self._touched.clear()
+        self._db.commit()
+
+    def close(self) -> None:
+        self.update({})
+        n = self._db.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+        if n > self.max_rows:
+            self._db.execute("DELETE FROM scores WHERE key IN (SELECT key FROM scores ORDER BY last_used LIMIT ?)", (n - self.max_rows,))
+            self._db.commit()
+        self._db.close()
+
+    def __enter__(self) -> "SentimentCache": return self
+    def __exit__(self, *exc) -> None: self.close()
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / max(self.hits + self.misses, 1)
@@ -0,0 +1,104 @@
+import gc
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from loguru import logger
+from spotify_sentiment.core.telemetry import rss_mb
+
+class AdaptiveChunker:
+    """
+    Chunk sizes for a chunked step, picked from what the chunks so far cost.
+
+    Starting from `initial` rows, the size doubles while rows/sec keeps improving
+    by more than `gain`, then settles on the fastest size measured. Throughput is
+    wall time from requesting one chunk to requesting the next, so it covers
+    whatever the consumer (or a fused downstream step) does with the chunk. The
+    size is capped so that the rest of the process plus `held` chunks in flight,
+    at `overhead` times their measured bytes per row, stays inside `budget_mb`;
+    when the cap drops below the current size, the size shrinks to it. A full GC
+    only runs once process RSS passes `gc_at` of the budget. A budget of 0 keeps
+    `initial` rows and collects after every chunk.
+    """
+
+    overhead = 3.0  # working copies per chunk: parse buffers, Arrow/pandas conversions, scan results
+    gain = 1.05
+    samples = 2  # full chunks timed at a size before judging it
+    gc_at = 0.8
+
+    def __init__(self, name: str, initial: int, budget_mb: int, held: int = 1,
+                 min_rows: Optional[int] = None, max_rows: int = 1_000_000):
+        self.name, self.budget_mb, self.held = name, budget_mb, held
+        self.rows = initial
+        self.min_rows = min_rows or max(1, initial // 8)
+        self.max_rows = max(initial, max_rows)
+        self.bytes_per_row: Optional[float] = None
+        self.sizes: List[int] = [initial]
+        self.settled = budget_mb <= 0
+        self.collections = 0
+        self._rates: Dict[int, List[float]] = {}
+        self._previous: Optional[int] = None
+        self._warm = False
+
+    def chunks(self, reader, sizeof: Callable[[Any], int]) -> Iterator:
+        """
+        Chunks from `reader.get_chunk(rows)` (pandas' TextFileReader, SentimentStore.reader)
+        at the current size; `sizeof` gives a chunk's bytes in memory.
+        """
+        while True:
+            t0 = time.perf_counter()
+            try: chunk = reader.get_chunk(self.rows)
+            except StopIteration: break
+            rows, nbytes, requested = len(chunk), sizeof(chunk), self.rows
+            yield chunk
+            del chunk
+            self._observe(requested, rows, time.perf_counter() - t0, nbytes)
+        if len(self.sizes) > 1 or self.collections:
+            logger.info(f"Chunk sizes ({self.name}): {' -> '.join(f'{s:,}' for s in self.sizes)} rows"
+                        f"{f', ~{self.bytes_per_row:,.0f} B/row' if self.bytes_per_row else ''}, {self.collections} GC passes")
+
+    def _observe(self, requested: int, rows: int, seconds: float, nbytes: int) -> None:
+        rss = rss_mb()
+        if self.budget_mb <= 0:
+            gc.collect()
+            self.collections += 1
+            return
+        if rows:
+            per_row = nbytes / rows
+            self.bytes_per_row = per_row if self.bytes_per_row is None else 0.5 * (self.bytes_per_row + per_row)
+        # The first chunk also pays for cold caches and lazy imports; partial chunks only come at the end.
+        if self._warm and rows >= requested and seconds > 0: self._rates.setdefault(requested, []).append(rows / seconds)
+        self._warm = True
+
+        size = self.rows
+        if self.bytes_per_row:
+            rest = rss - nbytes / 2**20
+            cap = int((self.budget_mb - rest) * 2**20 / (self.bytes_per_row * self.overhead * self.held))
+            cap = min(self.max_rows, max(self.min_rows, cap))
+        else:
+            cap = self.max_rows
+        if size > cap:
+            size, self.settled = cap, True
+        elif not self.settled and len(self._rates.get(size, ())) >= self.samples:
+            rate = self._rate(size)
+            if self._previous is not None and rate <= self._rate(self._previous) * self.gain:
+                if rate < self._rate(self._previous): size = self._previous
+                self.settled = True
+            elif min(size * 2, cap) > size:
+                self._previous, size = size, min(size * 2, cap)
+            else:
+                self.settled = True
+        if size != self.rows:
+            logger.debug(f"{self.name}: chunk size {self.rows:,} -> {size:,} rows (RSS {rss:,.0f} MB of {self.budget_mb:,} MB)")
+            self.rows = size
+            self.sizes.append(size)
+
+        if rss > self.gc_at * self.budget_mb:
+            gc.collect()
+            self.collections += 1
+
+    def _rate(self, size: int) -> float:
+        rates = sorted(self._rates[size])
+        return rates[len(rates) // 2]
+
+    def summary(self) -> Dict[str, Any]:
+        return {"sizes": self.sizes, "rows": self.rows, "bytes_per_row": self.bytes_per_row,
+                "rows_per_sec": {size: self._rate(size) for size in self._rates}, "gc_passes": self.collections}
@@ -6,17 +6,45 @@ class Settings(BaseSettings):
     BASE_DIR: Path = Path.cwd()
     DATA_DIR: Path = BASE_DIR / "data"
     ASSETS_DIR: Path = BASE_DIR / "assets"
-    RAW_DATA: Path = DATA_DIR / "spotify_podcasts.csv"
-    SENTIMENT_DATA: Path = DATA_DIR / "sentiment_results.csv"
+    RAW_DATA: Path = DATA_DIR / "spotify_podcasts.csv"  # read when present, else streamed out of RAW_ARCHIVE
+    RAW_ARCHIVE: Path = DATA_DIR / "top-spotify-podcasts-daily-updated.zip"  # the dataset as downloaded, never extracted
+    RAW_MEMBER: str = "top_podcasts.csv"  # the CSV inside RAW_ARCHIVE
+    RAW_ARCHIVE_SHA256: str = ""  # expected SHA-256 of RAW_ARCHIVE, checked on download; empty = not checked
+    SENTIMENT_DATA: Path = DATA_DIR / "sentiment_results"  # Parquet dataset, one directory per day
     TOPIC_METRICS: Path = DATA_DIR / "topic_metrics.csv"
     WORD_METRICS: Path = DATA_DIR / "word_metrics.csv"
+    SENTIMENT_CACHE: Path = DATA_DIR / "sentiment_cache.sqlite"
+    MANIFEST: Path = DATA_DIR / "manifest.json"
+    VOCABULARY: Path = DATA_DIR / "expanded_vocabulary.json"  # TOPIC_DEFINITIONS expanded with EMBEDDINGS_MODEL
+    RUN_REPORT: Path = DATA_DIR / "run_report.json"  # per-step timings, memory and row counts of the last run
+    SHARD_DIR: Path = DATA_DIR / "shards"  # partial metrics of sharded runs
+    SHOW_SKETCHES: Path = DATA_DIR / "show_sketches.npz"  # distinct-show sketches per topic/word and date
 
     KAGGLE_USERNAME: str = ""
     KAGGLE_KEY: str = ""
     KAGGLE_DATASET: str = "daniilmiheev/top-spotify-podcasts-daily-updated"
 
     USE_EXACT_MATCH_ONLY: bool = False
-    CHUNK_SIZE: int = 50000
+    EMBEDDINGS_MODEL: str = "glove-wiki-gigaword-50"  # gensim-data name, or a local word2vec-format file
+    EXPANSION_TOPN: int = 5  # nearest neighbours considered per seed keyword
+    EXPANSION_MIN_SIMILARITY: float = 0.65
+    INCREMENTAL: bool = False  # only process rows dated after the manifest watermark
+    PERSIST_SENTIMENT: bool = True  # streaming runs: also write SENTIMENT_DATA
+    CHUNK_SIZE: int = 50000  # rows of the first chunk; later chunks are sized for MEMORY_BUDGET_MB
+    MEMORY_BUDGET_MB: int = 2048  # process RSS the chunked steps stay within, 0 = fixed CHUNK_SIZE and a GC pass per chunk
+    SCAN_THREADS: int = 0  # native scanner threads, 0 = one per CPU core
+    SKETCH_PRECISION: int = 14  # HyperLogLog registers per show sketch as a power of 2 (0.81% error at 14), 0 = no sketches
+    SCAN_MEMO_ITEMS: int = 500000  # distinct episode texts whose matches analyze remembers, 0 = scan every row
+    SENTIMENT_ENGINE: str = "native"  # "native" (fast_vader extension) or "nltk"
+    SENTIMENT_THREADS: int = 0  # native scorer threads per process, 0 = one per CPU core
+    SENTIMENT_WORKERS: int = 1  # VADER worker processes, 1 = score in-process
+    SENTIMENT_BATCH_SIZE: int = 2000  # unique descriptions per worker task
+    SENTIMENT_INFLIGHT_CHUNKS: int = 4  # chunks held in memory while workers score
+    SENTIMENT_CACHE_MEMORY_ITEMS: int = 200000  # in-memory LRU tier in front of SENTIMENT_CACHE
+    SENTIMENT_CACHE_MAX_ROWS: int = 5000000  # on-disk entries kept, least recently used evicted first
+    DASHBOARD_LAYOUT: str = "single"  # "single": one page, local plotly.js, lazily drawn charts; "iframes": one HTML file per chart
+    SHARD_WORKERS: int = 0  # processes running the shards of a sharded run, 0 = one per CPU core
+    VISUALIZE_WORKERS: int = 0  # processes rendering stale dashboard charts, 0 = one per CPU core
 
     TOPIC_DEFINITIONS: Dict[str, List[str]] = {
         "Artificial Intelligence": ["ai", "machine learning", "deep learning", "algorithm", "neural network"],
@@ -25,6 +53,7 @@ class Settings(BaseSettings):
         "Startup": ["startup", "founder", "venture capital", "entrepreneur", "funding"],
         "Nutrition": ["nutrition", "diet", "protein", "vitamins", "healthy eating"]
     }
+    TOPIC_PROFILES: Dict[str, Dict[str, List[str]]] = {}  # named variants of TOPIC_DEFINITIONS, scanned in the same pass into topic_metrics.<name>.csv etc.
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
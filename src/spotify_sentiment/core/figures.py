@@ -0,0 +1,100 @@
+import base64
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+# Bump when the output written for an unchanged spec changes (write_html options, compaction).
+RENDER_VERSION = 1
+HTML_CONFIG = {"responsive": True, "displaylogo": False}
+
+@dataclass
+class FigureSpec:
+    """One dashboard chart: `px.<kind>(data, **kwargs)`, then `update_layout(**layout)`, saved as `filename`."""
+    filename: str
+    kind: str
+    data: pd.DataFrame
+    kwargs: Dict[str, Any]
+    layout: Dict[str, Any] = field(default_factory=dict)
+
+    def key(self) -> str:
+        """Content hash of the data slice and the spec; the filename is not part of it."""
+        import plotly
+        h = hashlib.sha256(json.dumps([RENDER_VERSION, plotly.__version__, self.kind, self.kwargs, self.layout,
+                                       list(map(str, self.data.columns)), list(map(str, self.data.dtypes))],
+                                      sort_keys=True, default=str).encode())
+        h.update(pd.util.hash_pandas_object(self.data, index=False).values.tobytes())
+        return h.hexdigest()
+
+def build_figure(spec: FigureSpec):
+    import plotly.express as px
+    fig = getattr(px, spec.kind)(spec.data, **spec.kwargs)
+    if spec.layout: fig.update_layout(**spec.layout)
+    return fig
+
+def _compact(node):
+    """Plotly's typed arrays ({dtype, bdata}) narrowed: float64 to float32, int64 to int32 when the values fit."""
+    if isinstance(node, list): return [_compact(v) for v in node]
+    if not isinstance(node, dict): return node
+    if node.get("dtype") in ("f8", "i8") and "bdata" in node:
+        values = np.frombuffer(base64.b64decode(node["bdata"]), dtype="<" + node["dtype"])
+        if node["dtype"] == "f8": values, dtype = values.astype("<f4"), "f4"
+        elif len(values) == 0 or np.iinfo(np.int32).min <= values.min() <= values.max() <= np.iinfo(np.int32).max:
+            values, dtype = values.astype("<i4"), "i4"
+        else: return node
+        return {**node, "dtype": dtype, "bdata": base64.b64encode(values.tobytes()).decode()}
+    return {k: _compact(v) for k, v in node.items()}
+
+def render_figure(spec: FigureSpec, path: Path) -> None:
+    """Writes the chart as a standalone `.html` page, or as compact plotly JSON for the single-page dashboard."""
+    fig = build_figure(spec)
+    if path.suffix == ".json":
+        path.write_text(json.dumps(_compact(json.loads(fig.to_json())), separators=(",", ":")))
+        return
+    # Plotly comes from the CDN, so each chart file stays small instead of embedding plotly.js.
+    fig.write_html(path, include_plotlyjs="cdn", full_html=True, config=HTML_CONFIG)
+
+def render_all(specs: Sequence[FigureSpec], out_dir: Path, workers: int = 0, suffix: str = ".html",
+               index: str = "figures.json") -> List[str]:
+    """
+    Write every spec whose output in `out_dir` is not current, named after
+    its filename with `suffix` (see render_figure). `index` maps each
+    filename to the key it was rendered from; a chart whose key is found under
+    another name (topics renumbered) is copied rather than rendered, and charts no
+    spec produces any more are removed. Renders in a process pool of `workers`
+    (0 = one per CPU core); returns the filenames that were rendered.
+    """
+    out_dir.mkdir(exist_ok=True, parents=True)
+    index_path = out_dir / index
+    old = json.loads(index_path.read_text()) if index_path.exists() else {}
+    old = {name: key for name, key in old.items() if (out_dir / name).exists()}
+    named = [(Path(spec.filename).with_suffix(suffix).name, spec) for spec in specs]
+    keys = {name: spec.key() for name, spec in named}
+    stale = [(name, spec) for name, spec in named if old.get(name) != keys[name]]
+
+    # Read everything reusable before writing anything, so renames along a chain can't clobber each other.
+    by_key = {key: name for name, key in old.items()}
+    reused = {name: (out_dir / by_key[keys[name]]).read_bytes() for name, _ in stale if keys[name] in by_key}
+    for name, content in reused.items(): (out_dir / name).write_bytes(content)
+    todo = [(name, spec) for name, spec in stale if name not in reused]
+
+    workers = min(workers or os.cpu_count() or 1, len(todo))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for f in [pool.submit(render_figure, spec, out_dir / name) for name, spec in todo]: f.result()
+    else:
+        for name, spec in todo: render_figure(spec, out_dir / name)
+
+    for name in old.keys() - keys.keys(): (out_dir / name).unlink(missing_ok=True)
+    tmp = index_path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(keys, indent=2))
+    os.replace(tmp, index_path)
+    logger.info(f"Figures: {len(todo)} rendered ({workers or 1} processes), {len(reused)} reused, "
+                f"{len(specs) - len(stale)} current")
+    return [name for name, _ in todo]
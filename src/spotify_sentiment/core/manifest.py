@@ -0,0 +1,51 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+PROBE_BYTES = 1 << 20
+
+def head_checksum(path: Path, n_bytes: int = PROBE_BYTES) -> Optional[str]:
+    """SHA-256 of the first `n_bytes`: stays stable while a file only grows at the end."""
+    if not path.exists(): return None
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read(n_bytes)).hexdigest()
+
+def head_probe_size(path: Path) -> int:
+    return min(PROBE_BYTES, path.stat().st_size)
+
+def fingerprint(path: Path) -> Optional[str]:
+    """SHA-256 over the size, first MiB and last MiB: cheap to compute, and changes when a file is rewritten."""
+    if not path.exists(): return None
+    size = path.stat().st_size
+    h = hashlib.sha256(str(size).encode())
+    with open(path, 'rb') as f:
+        h.update(f.read(PROBE_BYTES))
+        if size > PROBE_BYTES:
+            f.seek(max(PROBE_BYTES, size - PROBE_BYTES))
+            h.update(f.read())
+    return h.hexdigest()
+
+class Manifest:
+    """
+    Per-step state of incremental runs (watermark date, checksums), stored as JSON next to the data.
+    Every call goes to the file, so steps running interleaved in one stream see each other's records.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        return json.loads(self.path.read_text()) if self.path.exists() else {}
+
+    def get(self, step: str) -> Optional[Dict[str, Any]]:
+        return self._load().get(step)
+
+    def set(self, step: str, **record: Any) -> None:
+        steps = self._load()
+        steps[step] = record
+        self.path.parent.mkdir(exist_ok=True, parents=True)
+        tmp = self.path.with_suffix('.tmp')
+        tmp.write_text(json.dumps(steps, indent=2, sort_keys=True))
+        os.replace(tmp, self.path)
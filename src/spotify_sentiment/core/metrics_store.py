@@ -0,0 +1,149 @@
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+import numpy as np
+import pandas as pd
+
+GRANULARITIES = ("day", "week", "month", "all")
+_VALUES = ["avg_sentiment", "avg_popularity"]
+Date = Union[str, pd.Timestamp, None]
+
+def _days(dates: pd.Series) -> np.ndarray:
+    return pd.to_datetime(dates).to_numpy("datetime64[D]").astype(np.int64)
+
+def _day(date: Date) -> Optional[int]:
+    return None if date is None else int(np.datetime64(pd.Timestamp(date).date(), "D").astype(np.int64))
+
+def _bucket(days: np.ndarray, granularity: str) -> np.ndarray:
+    """First day of the week (Monday) or month holding each day number."""
+    if granularity == "week": return days - (days + 3) % 7  # 1970-01-01 was a Thursday
+    if granularity == "month": return days.astype("datetime64[D]").astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+    return days
+
+def _average(sums: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """sums / weights, NaN where nothing was weighed."""
+    with np.errstate(invalid="ignore", divide="ignore"): return sums / weights
+
+class _Level:
+    """
+    One level of the metrics (per topic, or per topic and word) at one granularity:
+    rows sorted by (group, day) with `offsets[g]:offsets[g + 1]` the rows of group g.
+    Sums are weighted by sample size, so any run of rows rolls up exactly. A NaN
+    average adds nothing to its sum or its weight, as groupby().sum() skips it.
+    """
+
+    def __init__(self, group: np.ndarray, day: np.ndarray, sums: np.ndarray, weights: np.ndarray, n: np.ndarray,
+                 n_groups: int, avgs: Optional[np.ndarray] = None):
+        self.group, self.day, self.sums, self.weights, self.n = group, day, sums, weights, n
+        self.avgs = _average(sums, weights) if avgs is None else avgs
+        self.offsets = np.searchsorted(group, np.arange(n_groups + 1))
+
+    def rollup(self, granularity: str, n_groups: int) -> "_Level":
+        bucket = _bucket(self.day, granularity)
+        starts = np.flatnonzero(np.r_[True, (np.diff(self.group) != 0) | (np.diff(bucket) != 0)]) if len(bucket) else np.arange(0)
+        if not len(starts): return _Level(self.group, bucket, self.sums, self.weights, self.n, n_groups)
+        return _Level(self.group[starts], bucket[starts], np.add.reduceat(self.sums, starts),
+                      np.add.reduceat(self.weights, starts), np.add.reduceat(self.n, starts), n_groups)
+
+    def rows(self, groups: range, start: Optional[int], end: Optional[int]) -> np.ndarray:
+        """Row numbers of `groups` dated within [start, end]: a binary search per group, then the matching runs."""
+        runs = []
+        for g in groups:
+            lo, hi = self.offsets[g], self.offsets[g + 1]
+            days = self.day[lo:hi]
+            a = lo + (np.searchsorted(days, start) if start is not None else 0)
+            b = lo + (np.searchsorted(days, end, side="right") if end is not None else hi - lo)
+            if a < b: runs.append(np.arange(a, b))
+        return np.concatenate(runs) if runs else np.arange(0)
+
+class MetricsStore:
+    """
+    Topic and word metrics loaded once and indexed for repeated slicing.
+
+    Rows are kept sorted by (topic, word, date) with per-group offsets, and
+    sample-size weighted sums are rolled up to week and month when the store is
+    built. query() finds each selected group's rows by binary search rather than
+    filtering the whole table, though it still visits every selected group, and
+    "all" sums over their day rows. Day rows keep the averages they were loaded
+    with; coarser rows are weighted sums divided by the sample size behind them.
+    """
+
+    def __init__(self, topic_metrics: pd.DataFrame, word_metrics: Optional[pd.DataFrame] = None):
+        if word_metrics is None: word_metrics = pd.DataFrame(columns=["topic", "matched_word", "date"] + _VALUES + ["sample_size"])
+        self.topics: List[str] = sorted(set(topic_metrics["topic"]) | set(word_metrics["topic"]))
+        self._topic_codes = codes = {t: i for i, t in enumerate(self.topics)}
+
+        pairs = word_metrics[["topic", "matched_word"]].drop_duplicates()
+        pairs = sorted(zip(pairs["topic"].map(codes), pairs["matched_word"]))
+        self.pair_topic = np.array([t for t, _ in pairs], dtype=np.int64)
+        self.pair_word: List[str] = [w for _, w in pairs]
+        self._pairs: Dict[tuple, int] = {(self.topics[t], w): i for i, (t, w) in enumerate(pairs)}
+        self._topic_names, self._word_names = np.array(self.topics, dtype=object), np.array(self.pair_word, dtype=object)
+        self._word_pairs: Dict[str, List[int]] = {}
+        for i, w in enumerate(self.pair_word): self._word_pairs.setdefault(w, []).append(i)
+
+        word_groups = np.fromiter(map(self._pairs.__getitem__, zip(word_metrics["topic"], word_metrics["matched_word"])),
+                                  dtype=np.int64, count=len(word_metrics))
+        self._levels = {
+            "topic": self._build(topic_metrics["topic"].map(codes).to_numpy(np.int64), topic_metrics, len(self.topics)),
+            "word": self._build(word_groups, word_metrics, len(pairs)),
+        }
+
+    @classmethod
+    def load(cls, topic_metrics: Path, word_metrics: Optional[Path] = None) -> "MetricsStore":
+        words = pd.read_csv(word_metrics) if word_metrics is not None and Path(word_metrics).exists() else None
+        return cls(pd.read_csv(topic_metrics), words)
+
+    @staticmethod
+    def _build(group: np.ndarray, df: pd.DataFrame, n_groups: int) -> Dict[str, _Level]:
+        day = _days(df["date"])
+        order = np.lexsort((day, group))
+        n = df["sample_size"].to_numpy(np.int64)[order]
+        avgs = df[_VALUES].to_numpy(np.float64)[order]
+        known = ~np.isnan(avgs)  # e.g. the popularity of a day whose ranks did not parse
+        weights = np.where(known, n[:, None], 0)
+        day_level = _Level(group[order], day[order], np.where(known, avgs, 0.0) * weights, weights, n, n_groups, avgs)
+        return {"day": day_level, "week": day_level.rollup("week", n_groups), "month": day_level.rollup("month", n_groups)}
+
+    def _groups(self, topic: Optional[str], word: Optional[str], by_word: bool) -> List[range]:
+        if not by_word:
+            if topic is None: return [range(len(self.topics))]
+            return [range(self._topic_codes[topic], self._topic_codes[topic] + 1)] if topic in self._topic_codes else []
+        if word is not None:
+            pairs = self._word_pairs.get(word, []) if topic is None else [self._pairs[(topic, word)]] if (topic, word) in self._pairs else []
+            return [range(p, p + 1) for p in pairs]
+        if topic is None: return [range(len(self.pair_word))]
+        if topic not in self._topic_codes: return []
+        t = self._topic_codes[topic]
+        return [range(*np.searchsorted(self.pair_topic, [t, t + 1]))]
+
+    def query(self, topic: Optional[str] = None, word: Optional[str] = None, start: Date = None, end: Date = None,
+              granularity: str = "day", by_word: bool = False) -> pd.DataFrame:
+        """
+        Weighted metrics of one topic (or all), per date bucket between `start` and `end`
+        inclusive. Rows are per keyword (with a matched_word column) when `word` is
+        given or `by_word` is set. Week and month rows are dated by the first day of the
+        bucket and selected by it; "all" sums the selected days into one row per group.
+        """
+        if granularity not in GRANULARITIES: raise ValueError(f"granularity must be one of {GRANULARITIES}")
+        by_word = by_word or word is not None
+        levels = self._levels["word" if by_word else "topic"]
+        level = levels["day" if granularity == "all" else granularity]
+        rows = np.concatenate([level.rows(r, _day(start), _day(end)) for r in self._groups(topic, word, by_word)] or [np.arange(0)])
+
+        group, n = level.group[rows], level.n[rows]
+        if granularity == "all":
+            starts = np.flatnonzero(np.r_[True, np.diff(group) != 0]) if len(rows) else np.arange(0)
+            sums = np.add.reduceat(level.sums[rows], starts) if len(rows) else np.empty((0, 2))
+            weights = np.add.reduceat(level.weights[rows], starts) if len(rows) else np.empty((0, 2))
+            group, n = group[starts], np.add.reduceat(n, starts) if len(rows) else n
+            avgs = _average(sums, weights)
+            out = {}
+        else:
+            avgs = level.avgs[rows]
+            out = {"date": level.day[rows].astype("datetime64[D]").astype("datetime64[ns]")}
+        topics = self.pair_topic[group] if by_word else group
+        frame = {"topic": self._topic_names[topics]}
+        if by_word: frame["matched_word"] = self._word_names[group]
+        frame.update(out)
+        frame.update({"avg_sentiment": avgs[:, 0], "avg_popularity": avgs[:, 1], "sample_size": n})
+        return pd.DataFrame(frame)
@@ -0,0 +1,77 @@
+import hashlib
+import os
+import shutil
+import zipfile
+from pathlib import Path
+from typing import BinaryIO, Optional
+from spotify_sentiment.core.config import settings
+from spotify_sentiment.core.manifest import PROBE_BYTES, head_checksum
+
+_BLOCK = 1 << 20
+
+def sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_BLOCK), b''): h.update(block)
+    return h.hexdigest()
+
+def verify_sha256(path: Path, expected: str) -> None:
+    """Raises ValueError unless the SHA-256 of `path` is `expected` (skipped when `expected` is empty)."""
+    if not expected: return
+    actual = sha256_file(path)
+    if actual != expected.lower(): raise ValueError(f"{path.name} has SHA-256 {actual}, expected {expected}")
+
+class RawData:
+    """
+    The raw chart CSV: `csv` when it exists, otherwise member `member` of the
+    zip `archive`, decompressed as it is read so the CSV never lands on disk.
+    Both forms give the same bytes, so head checksums, and with them incremental
+    runs, carry over from one to the other.
+    """
+
+    def __init__(self, csv: Path, archive: Optional[Path] = None, member: str = ""):
+        self.csv, self.archive, self.member = csv, archive, member
+
+    @classmethod
+    def from_settings(cls) -> "RawData":
+        return cls(settings.RAW_DATA, settings.RAW_ARCHIVE, settings.RAW_MEMBER)
+
+    @property
+    def archived(self) -> bool:
+        return not self.csv.exists() and self.archive is not None and self.archive.exists()
+
+    @property
+    def name(self) -> str: return f"{self.archive.name}:{self.member}" if self.archived else self.csv.name
+
+    def exists(self) -> bool: return self.csv.exists() or self.archived
+
+    def _info(self, zf: zipfile.ZipFile) -> zipfile.ZipInfo:
+        try: return zf.getinfo(self.member)
+        except KeyError: raise FileNotFoundError(f"{self.archive.name} has no {self.member}; it holds {zf.namelist()}") from None
+
+    def size(self) -> int:
+        """Bytes of the CSV, uncompressed."""
+        if not self.archived: return self.csv.stat().st_size
+        with zipfile.ZipFile(self.archive) as zf: return self._info(zf).file_size
+
+    def open(self) -> BinaryIO:
+        """The CSV as a binary file; `tell()` counts uncompressed bytes read."""
+        if not self.archived: return open(self.csv, 'rb')
+        zf = zipfile.ZipFile(self.archive)
+        try: f = zf.open(self._info(zf))
+        finally: zf.close()  # the member keeps the archive file open until it is closed itself
+        return f
+
+    def head_checksum(self, n_bytes: int) -> Optional[str]:
+        if not self.archived: return head_checksum(self.csv, n_bytes)
+        with self.open() as f: return hashlib.sha256(f.read(n_bytes)).hexdigest()
+
+    def head_probe_size(self) -> int: return min(PROBE_BYTES, self.size())
+
+    def extract(self) -> Path:
+        """Writes the CSV out to `csv`, for readers that need to seek in it; returns its path."""
+        if self.archived:
+            tmp = self.csv.with_name(self.csv.name + '.tmp')
+            with self.open() as src, open(tmp, 'wb') as dst: shutil.copyfileobj(src, dst, _BLOCK)
+            os.replace(tmp, self.csv)
+        return self.csv
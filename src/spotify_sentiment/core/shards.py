@@ -0,0 +1,89 @@
+import csv
+import io
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List
+
+_ROW = re.compile(rb"\n(\d{4}-\d{2}-\d{2}),")
+_BLOCK = 1 << 20
+
+@dataclass(frozen=True)
+class Shard:
+    """Bytes [start, end) of the CSV at `path`, holding whole days of rows; `header` is the file's first line."""
+    path: Path
+    index: int
+    start: int
+    end: int
+    header: bytes
+
+    @property
+    def size(self) -> int: return self.end - self.start
+
+    def open(self) -> io.BufferedReader:
+        """The shard as a file of its own: the header line, then its rows."""
+        return io.BufferedReader(_ByteRange(self))
+
+class _ByteRange(io.RawIOBase):
+    def __init__(self, shard: Shard):
+        self._pending, self._left, self._pos = shard.header, shard.size, 0
+        self._file = open(shard.path, 'rb')
+        self._file.seek(shard.start)
+
+    def readable(self) -> bool: return True
+    def tell(self) -> int: return self._pos
+
+    def readinto(self, buffer) -> int:
+        if self._pending:
+            n = min(len(buffer), len(self._pending))
+            buffer[:n], self._pending = self._pending[:n], self._pending[n:]
+        else:
+            n = self._file.readinto(memoryview(buffer)[:min(len(buffer), self._left)]) if self._left else 0
+            self._left -= n
+        self._pos += n
+        return n
+
+    def close(self) -> None:
+        self._file.close()
+        super().close()
+
+def plan_shards(path: Path, n: int) -> List[Shard]:
+    """
+    Splits the CSV at `path` into at most `n` shards of about equal bytes, each
+    boundary moved forward to the first row of a new date, so no day is split.
+    Rows have to be grouped by date (the daily charts are appended day by day)
+    and `date` has to be the first column; boundaries are found by reading a few
+    rows around each split point, never the whole file. The plan only depends on
+    the file, so hosts sharing it compute the same shards.
+    """
+    with open(path, 'rb') as f:
+        header = f.readline()
+        columns = next(csv.reader([header.decode('utf-8-sig')]))
+        if not columns or columns[0] != 'date': raise ValueError(f"sharding by date needs 'date' as the first column of {path.name}")
+        size = os.fstat(f.fileno()).st_size
+        bounds = [len(header)]
+        for k in range(1, n):
+            at = _next_day(f, max(bounds[-1], len(header) + (size - len(header)) * k // n) - 1, len(columns), size)
+            if at > bounds[-1]: bounds.append(at)
+    if bounds[-1] < size: bounds.append(size)
+    return [Shard(Path(path), i, a, b, header) for i, (a, b) in enumerate(zip(bounds, bounds[1:]))]
+
+def _next_day(f, offset: int, n_columns: int, size: int) -> int:
+    """Offset of the first row after `offset` whose date differs from that of the first row after `offset` (`size` if none)."""
+    day, pos = None, offset
+    while pos < size:
+        f.seek(pos)
+        block = f.read(_BLOCK + 2 * 2**16)
+        for m in _ROW.finditer(block, 0, _BLOCK):
+            if m.group(1) == day: continue
+            if not _is_row(block[m.start() + 1:], m.group(1), n_columns): continue  # a line break inside a quoted field
+            if day is not None: return pos + m.start() + 1
+            day = m.group(1)
+        pos += _BLOCK
+    return size
+
+def _is_row(data: bytes, day: bytes, n_columns: int) -> bool:
+    try: record = next(csv.reader(io.StringIO(data[:2**16].decode('utf-8', 'replace'), newline='')))
+    except (StopIteration, csv.Error): return False
+    return len(record) == n_columns and record[0] == day.decode()
@@ -0,0 +1,167 @@
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+
+LEVELS = ("topic", "word")
+_GROUP = ("topic", "word", "day")
+Date = Union[str, pd.Timestamp, None]
+
+def show_hashes(shows) -> np.ndarray:
+    """Stable 64-bit hashes of showUri values (the same in every process and run, so sketches merge)."""
+    return pd.util.hash_array(np.asarray(shows, dtype=object))
+
+def _bit_length(x: np.ndarray) -> np.ndarray:
+    """Bit length of uint64 values, computed exactly in 32-bit halves."""
+    hi, lo = (x >> np.uint64(32)).astype(np.float64), (x & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    return np.where(hi > 0, 32 + np.frexp(hi)[1], np.frexp(lo)[1])
+
+def _day(date: Date) -> Optional[int]:
+    return None if date is None else int(np.datetime64(pd.Timestamp(date).date(), "D").astype(np.int64))
+
+class ShowSketches:
+    """
+    HyperLogLog sketches of the distinct showUri values per (topic, date) and per
+    (topic, word, date), so distinct-show counts can be taken over any date window.
+
+    A sketch has 2**precision registers; each show hash sets register (top
+    `precision` bits) to the position of the first one bit in the remaining bits,
+    and merging sketches is a register-wise max, so a window's sketch is exactly
+    the sketch of all its days' shows. Sketches are stored sparse, as (register,
+    rank) pairs per group, which costs no more than the distinct shows per group.
+
+    Error: the estimate's relative standard error is 1.04 / sqrt(2**precision),
+    0.81% at the default 14 (about 1.6% at 12, 3.3% at 10); 99.7% of estimates lie
+    within three times that. Below 2.5 * 2**precision distinct shows (40,960 at 14)
+    empty registers are counted instead (linear counting), whose error is much
+    smaller still: typically well under 1% for a few thousand shows. Hash
+    collisions of the 64-bit show hashes are negligible.
+    """
+
+    def __init__(self, topics: List[str], words: List[str], precision: int = 14):
+        if not 4 <= precision <= 16: raise ValueError("precision must be in [4, 16]")
+        self.topics, self.words, self.precision = list(topics), list(words), precision
+        self._topic_codes = {t: i for i, t in enumerate(self.topics)}
+        self._word_codes = {w: i for i, w in enumerate(self.words)}
+        self._entries: Dict[str, Dict[str, np.ndarray]] = {level: _empty() for level in LEVELS}
+        self._pending: Dict[str, List[Dict[str, np.ndarray]]] = {level: [] for level in LEVELS}
+        self._pending_rows = 0
+        self._index: Dict[str, Tuple[np.ndarray, ...]] = {}
+
+    def add(self, level: str, topic_ids: np.ndarray, word_ids: np.ndarray, days: np.ndarray, hashes: np.ndarray) -> None:
+        """Adds the show `hashes` of matches to their (topic[, word], day) groups; word ids are ignored at topic level."""
+        p = np.uint64(self.precision)
+        rest = (hashes << p) | (np.uint64(1) << (p - np.uint64(1)))  # the guard bit caps the rank at 64 - p + 1
+        self.extend(level, topic_ids, np.zeros_like(topic_ids) if level == "topic" else word_ids, days,
+                    (hashes >> (np.uint64(64) - p)).astype(np.uint16), (65 - _bit_length(rest)).astype(np.uint8))
+
+    def extend(self, level: str, topic: np.ndarray, word: np.ndarray, day: np.ndarray, index: np.ndarray, rank: np.ndarray) -> None:
+        """Adds raw (register, rank) entries, such as those of another set of sketches."""
+        self._pending[level].append({"topic": topic.astype(np.int32), "word": word.astype(np.int32), "day": day.astype(np.int32),
+                                     "index": index.astype(np.uint16), "rank": rank.astype(np.uint8)})
+        self._pending_rows += len(topic)
+        self._index.clear()
+        if self._pending_rows > max(1 << 20, sum(len(e["rank"]) for e in self._entries.values())): self._compact()
+
+    def update(self, other: "ShowSketches", before: Optional[int] = None) -> None:
+        """Merges `other` in (only its days before day number `before`, when given)."""
+        if other.precision != self.precision: raise ValueError("sketches of different precision do not merge")
+        topics, words = _recode(other.topics, self._topic_codes), _recode(other.words, self._word_codes)
+        for level in LEVELS:
+            e = other.entries(level)
+            keep = e["day"] < before if before is not None else slice(None)
+            self.extend(level, topics[e["topic"][keep]], words[e["word"][keep]] if level == "word" else e["word"][keep],
+                        e["day"][keep], e["index"][keep], e["rank"][keep])
+
+    def entries(self, level: str) -> Dict[str, np.ndarray]:
+        """(topic, word, day, index, rank) columns sorted by group and register, one entry per register set."""
+        if self._pending_rows: self._compact()
+        return self._entries[level]
+
+    def _compact(self) -> None:
+        for level in LEVELS:
+            parts = [self._entries[level]] + self._pending[level]
+            e = {k: np.concatenate([p[k] for p in parts]) for k in self._entries[level]}
+            order = np.lexsort((e["rank"], e["index"], e["day"], e["word"], e["topic"]))
+            e = {k: v[order] for k, v in e.items()}
+            # The last entry of each (group, register) run holds its highest rank.
+            last = np.ones(len(order), dtype=bool)
+            if len(order):
+                last[:-1] = (np.diff(e["index"].astype(np.int32)) != 0) | (np.diff(e["day"]) != 0) | \
+                            (np.diff(e["word"]) != 0) | (np.diff(e["topic"]) != 0)
+            self._entries[level] = {k: v[last] for k, v in e.items()}
+            self._pending[level] = []
+        self._pending_rows = 0
+
+    def save(self, path: Path) -> None:
+        """Writes the sketches as a binary sidecar: groups with entry offsets, then 3 bytes per entry."""
+        arrays = {"precision": np.array(self.precision), "topics": np.array(self.topics, dtype=str), "words": np.array(self.words, dtype=str)}
+        for level in LEVELS:
+            e = self.entries(level)
+            starts = _group_starts(e)
+            arrays.update({f"{level}_{k}": e[k][starts] for k in _GROUP})
+            arrays.update({f"{level}_offsets": np.append(starts, len(e["rank"])).astype(np.int64),
+                           f"{level}_index": e["index"], f"{level}_rank": e["rank"]})
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f: np.savez(f, **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "ShowSketches":
+        with np.load(path) as f:
+            sketches = cls(f["topics"].tolist(), f["words"].tolist(), int(f["precision"]))
+            for level in LEVELS:
+                sizes = np.diff(f[f"{level}_offsets"])
+                sketches._entries[level] = {**{k: np.repeat(f[f"{level}_{k}"], sizes) for k in _GROUP},
+                                            "index": f[f"{level}_index"], "rank": f[f"{level}_rank"]}
+        return sketches
+
+    def _groups(self, level: str) -> Tuple[np.ndarray, ...]:
+        """Per group: its (topic, word) block key and day, sorted, and the offsets of its entries."""
+        if level not in self._index:
+            e = self.entries(level)
+            starts = _group_starts(e)
+            block = e["topic"][starts].astype(np.int64) * (len(self.words) + 1) + e["word"][starts]
+            self._index[level] = (block, e["day"][starts].astype(np.int64), np.append(starts, len(e["rank"])))
+        return self._index[level]
+
+    def registers(self, topic: str, word: Optional[str] = None, start: Date = None, end: Date = None) -> np.ndarray:
+        """The merged sketch of a topic (or one of its words) over the days between `start` and `end` inclusive."""
+        registers = np.zeros(1 << self.precision, dtype=np.uint8)
+        if topic not in self._topic_codes or (word is not None and word not in self._word_codes): return registers
+        level = "topic" if word is None else "word"
+        block, days, offsets = self._groups(level)
+        key = self._topic_codes[topic] * (len(self.words) + 1) + (0 if word is None else self._word_codes[word])
+        lo, hi = np.searchsorted(block, [key, key + 1])
+        a = lo + (np.searchsorted(days[lo:hi], _day(start)) if start is not None else 0)
+        b = lo + (np.searchsorted(days[lo:hi], _day(end), side="right") if end is not None else hi - lo)
+        if a < b:
+            e = self._entries[level]
+            np.maximum.at(registers, e["index"][offsets[a]:offsets[b]], e["rank"][offsets[a]:offsets[b]])
+        return registers
+
+    def distinct(self, topic: str, word: Optional[str] = None, start: Date = None, end: Date = None) -> float:
+        """Estimated number of distinct shows matching `topic` (or `word` of it) between `start` and `end` inclusive."""
+        return estimate(self.registers(topic, word, start, end))
+
+def estimate(registers: np.ndarray) -> float:
+    """HyperLogLog cardinality estimate of a dense register array, with linear counting for small counts."""
+    m = len(registers)
+    alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+    raw = alpha * m * m / np.ldexp(1.0, -registers.astype(np.int64)).sum()
+    zeros = int(np.count_nonzero(registers == 0))
+    return m * np.log(m / zeros) if raw <= 2.5 * m and zeros else float(raw)
+
+def _empty() -> Dict[str, np.ndarray]:
+    return {"topic": np.empty(0, np.int32), "word": np.empty(0, np.int32), "day": np.empty(0, np.int32),
+            "index": np.empty(0, np.uint16), "rank": np.empty(0, np.uint8)}
+
+def _group_starts(e: Dict[str, np.ndarray]) -> np.ndarray:
+    if not len(e["day"]): return np.arange(0)
+    return np.flatnonzero(np.r_[True, (np.diff(e["day"]) != 0) | (np.diff(e["word"]) != 0) | (np.diff(e["topic"]) != 0)])
+
+def _recode(names: List[str], codes: Dict[str, int]) -> np.ndarray:
+    missing = [n for n in names if n not in codes]
+    if missing: raise ValueError(f"sketches cover other topics or keywords: {missing[:3]}")
+    return np.array([codes[n] for n in names], dtype=np.int32).reshape(-1)
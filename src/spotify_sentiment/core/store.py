@@ -0,0 +1,165 @@
+import shutil
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+PARTITION = 'day'
+_NULL_DAY = '__HIVE_DEFAULT_PARTITION__'  # rows without a parseable date; read back as a null day
+
+def partition_days(dates: pd.Series) -> pd.Series:
+    """The `day=` partition of every row, parsed the same way AnalyzeStep parses `date`."""
+    return pd.to_datetime(dates, errors='coerce').dt.strftime('%Y-%m-%d').fillna(_NULL_DAY)
+
+def _day(file_path: str) -> Optional[str]:
+    day = file_path.split('/', 1)[0].split('=', 1)[-1]
+    return None if day == _NULL_DAY else day
+
+class SentimentStore:
+    """
+    Scored rows (SENTIMENT_DATA) as a hive-partitioned Parquet dataset.
+
+    Every date gets a `day=YYYY-MM-DD` directory. A `_metadata` file lists each
+    row group in the order it was written, so readers get the row count and the
+    file list without touching the data, read only the columns they ask for and
+    skip whole days outside a date filter. `_metadata` is written last: files a
+    failed run left behind are not part of the store.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.metadata_path = path / '_metadata'
+
+    def exists(self) -> bool: return self.metadata_path.exists()
+
+    def metadata(self) -> pq.FileMetaData: return pq.read_metadata(self.metadata_path)
+
+    @property
+    def schema(self) -> Optional[pa.Schema]:
+        return self.metadata().schema.to_arrow_schema() if self.exists() else None
+
+    def num_rows(self, after: Optional[str] = None) -> int:
+        """Row count from `_metadata`; with `after`, only rows dated later than that YYYY-MM-DD day."""
+        if not self.exists(): return 0
+        md = self.metadata()
+        if after is None: return md.num_rows
+        groups = (md.row_group(i) for i in range(md.num_row_groups))
+        return sum(g.num_rows for g in groups if (_day(g.column(0).file_path) or '') > after)
+
+    def clear(self) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def writer(self) -> "StoreWriter": return StoreWriter(self)
+
+    def dataset(self) -> ds.Dataset:
+        partitioning = ds.partitioning(pa.schema([(PARTITION, pa.string())]), flavor='hive')
+        return ds.parquet_dataset(str(self.metadata_path), partitioning=partitioning)
+
+    def read(self, columns: List[str], after: Optional[str] = None, rows: int = 50000) -> Iterator[pa.Table]:
+        """
+        Streams `columns` as tables of about `rows` rows, one day after another
+        (rows without a date last) and each day's rows in write order. With
+        `after`, the day partitions up to that YYYY-MM-DD date are never opened.
+        """
+        reader = self.reader(columns, after, batch_rows=rows)
+        while True:
+            try: yield reader.get_chunk(rows)
+            except StopIteration: return
+
+    def reader(self, columns: List[str], after: Optional[str] = None, batch_rows: int = 50000) -> "StoreReader":
+        """Same rows as read(), with the size of each table chosen per call (in steps of `batch_rows`)."""
+        if not self.exists(): return StoreReader(iter(()))
+        dataset = self.dataset()
+        by_day = sorted(dataset.get_fragments(), key=lambda f: (_day(Path(f.path).parent.name) is None, Path(f.path).parent.name))
+        dataset = ds.FileSystemDataset(by_day, dataset.schema, dataset.format, dataset.filesystem)
+        return StoreReader(dataset.to_batches(columns=columns, batch_size=batch_rows,
+                                              filter=ds.field(PARTITION) > after if after else None))
+
+class StoreReader:
+    """Record batches regrouped into tables, like pandas' TextFileReader.get_chunk()."""
+
+    def __init__(self, batches: Iterator[pa.RecordBatch]):
+        self._batches = iter(batches)
+
+    def get_chunk(self, rows: int) -> pa.Table:
+        """The next batches, combined, once they hold at least `rows` rows (fewer at the end)."""
+        pending, n = [], 0
+        for batch in self._batches:
+            pending.append(batch)
+            n += batch.num_rows
+            if n >= rows: break
+        if not n: raise StopIteration
+        return pa.Table.from_batches(pending).combine_chunks()
+
+class StoreWriter:
+    """
+    Appends DataFrame chunks to a SentimentStore. A day's file stays open while
+    consecutive chunks carry that day, so date-sorted input (the daily charts)
+    ends up as one file per day with a row group per chunk.
+    """
+
+    def __init__(self, store: SentimentStore):
+        self.store = store
+        self._base = store.metadata() if store.exists() else None
+        self.schema = store.schema
+        self._files = len({self._base.row_group(i).column(0).file_path for i in range(self._base.num_row_groups)}) if self._base else 0
+        self._open: Dict[str, tuple] = {}
+        self._written: List[pq.FileMetaData] = []
+
+    def write(self, chunk: pd.DataFrame) -> None:
+        if self.schema is None:
+            self.schema = pa.schema([(c, pa.float64() if pd.api.types.is_float_dtype(chunk[c]) else pa.string()) for c in chunk.columns])
+        elif list(chunk.columns) != self.schema.names:
+            raise ValueError(f"Columns {list(chunk.columns)} do not match {self.store.path.name} ({self.schema.names})")
+        table = pa.Table.from_pandas(chunk, schema=self.schema, preserve_index=False)
+        days = partition_days(chunk['date'])
+        groups = days.groupby(days, sort=True).indices
+        for day, rows in groups.items():
+            if day not in self._open:
+                rel = f"{PARTITION}={day}/part-{self._files:05d}.parquet"
+                self._files += 1
+                (self.store.path / rel).parent.mkdir(parents=True, exist_ok=True)
+                self._open[day] = (rel, pq.ParquetWriter(self.store.path / rel, self.schema, compression='zstd'))
+            self._open[day][1].write_table(table.take(rows))
+        for day in [d for d in self._open if d not in groups]: self._close(day)
+
+    def _close(self, day: str) -> None:
+        rel, writer = self._open.pop(day)
+        writer.close()
+        md = pq.read_metadata(self.store.path / rel)
+        md.set_file_path(rel)
+        self._written.append(md)
+
+    def close(self) -> None:
+        for day in list(self._open): self._close(day)
+        if self.schema is None: return
+        self.store.path.mkdir(parents=True, exist_ok=True)
+        md = self._base
+        for part in self._written:
+            if md is None: md = part
+            else: md.append_row_groups(part)
+        if md is None:
+            pq.write_metadata(self.schema, self.store.metadata_path)
+            return
+        tmp = self.store.path / '_metadata.tmp'
+        md.write_metadata_file(tmp)
+        tmp.replace(self.store.metadata_path)
+
+    def __enter__(self) -> "StoreWriter": return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is None: self.close()
+        else:
+            for _, writer in self._open.values(): writer.close()
+
+def convert_csv(csv_path: Path, store: SentimentStore, chunk_size: int) -> int:
+    """Rewrites a sentiment_results.csv from an earlier version as a store; returns the row count."""
+    header = pd.read_csv(csv_path, nrows=0).columns
+    dtype = {c: float if c == 'sentiment_score' else str for c in header}
+    store.clear()
+    with store.writer() as out:
+        for chunk in pd.read_csv(csv_path, chunksize=chunk_size, dtype=dtype, float_precision='round_trip', low_memory=False):
+            out.write(chunk)
+    return store.num_rows()
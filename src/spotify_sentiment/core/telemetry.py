@@ -0,0 +1,171 @@
+import cProfile
+import io
+import pstats
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import psutil
+
+_PROCESS = psutil.Process()
+# Open timers of every step, innermost last. A span leaves out the time of timers
+# opened inside it; a chunk only leaves out other steps' timers, so a fused downstream
+# step is not charged for the upstream work that produced its chunk.
+_ACTIVE: List["_Timer"] = []
+
+def rss_mb() -> float:
+    return _PROCESS.memory_info().rss / 2**20
+
+def peak_rss_mb() -> float:
+    """Highest RSS of this process so far (not just the current step)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (2**20 if sys.platform == "darwin" else 2**10)
+
+class _Timer:
+    def __init__(self, owner: "StepTelemetry", span: bool):
+        self.owner, self.span = owner, span
+        self.start = (time.perf_counter(), time.process_time())
+        self.excluded = [0.0, 0.0]  # subtracted from this timer's own time
+        self.foreign = [0.0, 0.0]  # time inside this timer spent in other steps' timers
+        _ACTIVE.append(self)
+
+    def stop(self) -> Tuple[float, float]:
+        """This timer's own (wall, cpu) seconds."""
+        elapsed = (time.perf_counter() - self.start[0], time.process_time() - self.start[1])
+        i = next(i for i in range(len(_ACTIVE) - 1, -1, -1) if _ACTIVE[i] is self)
+        del _ACTIVE[i]
+        if i:
+            parent = _ACTIVE[i - 1]
+            ours = parent.owner is self.owner
+            for k in (0, 1):
+                foreign = self.foreign[k] if ours else elapsed[k]
+                parent.foreign[k] += foreign
+                parent.excluded[k] += elapsed[k] if parent.span or not ours else foreign
+        return elapsed[0] - self.excluded[0], elapsed[1] - self.excluded[1]
+
+class StepTelemetry:
+    """
+    Wall and CPU time, process RSS and row counts of one step run, per step and
+    per chunk, with named sub-spans (read, score, scan, write, ...). A span's time
+    excludes the spans nested in it, and a chunk's time excludes whatever other steps
+    did meanwhile, such as an upstream step producing the chunk of a stream. CPU time
+    is the whole process's, native worker threads included.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.rows_in = self.rows_out = 0
+        self.spans: Dict[str, Dict[str, float]] = {}
+        self.chunks: List[Dict[str, Any]] = []
+        self.children: List["StepTelemetry"] = []
+        self.extra: Dict[str, Any] = {}
+        self.wall = self.cpu = None
+        self.rss_start = self.rss_end = None
+        self.error: Optional[str] = None
+        self._wall0 = self._cpu0 = None
+        self._chunk: Optional[Dict[str, Any]] = None
+
+    def start(self) -> None:
+        self.rss_start = rss_mb()
+        self._wall0, self._cpu0 = time.perf_counter(), time.process_time()
+
+    def stop(self, error: Optional[BaseException] = None) -> None:
+        self.end_chunk()
+        self.wall, self.cpu = time.perf_counter() - self._wall0, time.process_time() - self._cpu0
+        self.rss_end = rss_mb()
+        if error is not None: self.error = f"{type(error).__name__}: {error}"
+
+    @contextmanager
+    def span(self, name: str):
+        timer = _Timer(self, span=True)
+        try: yield
+        finally: self._record(name, *timer.stop())
+
+    def _record(self, name: str, wall: float, cpu: float) -> None:
+        total = self.spans.setdefault(name, {"wall_s": 0.0, "cpu_s": 0.0, "count": 0})
+        total["wall_s"] += wall; total["cpu_s"] += cpu; total["count"] += 1
+        if self._chunk is not None: self._chunk["spans"][name] = self._chunk["spans"].get(name, 0.0) + wall
+
+    def timed(self, items: Iterable, name: str) -> Iterator:
+        """`items`, with the time spent producing each one recorded as span `name`."""
+        it = iter(items)
+        while True:
+            with self.span(name):
+                try: item = next(it)
+                except StopIteration: return
+            yield item
+
+    def each_chunk(self, items: Iterable, span: Optional[str] = None) -> Iterator:
+        """
+        `items`, each opening a chunk record that end_chunk() closes; time spent
+        producing an item counts towards its chunk (and span `span`). Call end_chunk()
+        before a stream yields, so downstream work stays out of the chunk.
+        """
+        it = iter(items)
+        while True:
+            self.end_chunk()
+            self._chunk = {"rows_in": 0, "rows_out": 0, "spans": {}, "_timer": _Timer(self, span=False)}
+            try: item = self._next(it, span)
+            except StopIteration:
+                self._chunk["_timer"].stop()
+                self._chunk = None
+                return
+            yield item
+
+    def _next(self, it: Iterator, span: Optional[str]):
+        if span is None: return next(it)
+        with self.span(span): return next(it)
+
+    def end_chunk(self, rows_in: Optional[int] = None, rows_out: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Closes the open chunk record and returns it (None when no chunk is open)."""
+        chunk, self._chunk = self._chunk, None
+        if chunk is None: return None
+        chunk["wall_s"], chunk["cpu_s"] = chunk.pop("_timer").stop()
+        if rows_in is not None: chunk["rows_in"] = rows_in
+        if rows_out is not None or rows_in is not None: chunk["rows_out"] = rows_in if rows_out is None else rows_out
+        chunk["rss_mb"] = rss_mb()
+        self.rows_in += chunk["rows_in"]; self.rows_out += chunk["rows_out"]
+        self.chunks.append(chunk)
+        return chunk
+
+    def report(self) -> Dict[str, Any]:
+        # A step fused into a stream is never started on its own; its time is that of its chunks.
+        wall = self.wall if self.wall is not None else sum(c["wall_s"] for c in self.chunks)
+        cpu = self.cpu if self.cpu is not None else sum(c["cpu_s"] for c in self.chunks)
+        out = {"step": self.name, "status": "failed" if self.error else "ok", "wall_s": wall, "cpu_s": cpu,
+               "rows_in": self.rows_in, "rows_out": self.rows_out,
+               "rows_per_sec": self.rows_in / wall if wall else None,
+               "rss_start_mb": self.rss_start, "rss_end_mb": self.rss_end, "peak_rss_mb": peak_rss_mb(),
+               "spans": self.spans, "chunks": self.chunks, **self.extra}
+        if self.error: out["error"] = self.error
+        if self.children: out["steps"] = [c.report() for c in self.children]
+        return out
+
+@contextmanager
+def profiled(telemetry: StepTelemetry, mode: str, dump: Optional[Path] = None, top: int = 25):
+    """Runs the block under cProfile or tracemalloc (`mode`, "" for neither) and adds the hot spots to the report."""
+    if mode == "cprofile":
+        prof = cProfile.Profile()
+        prof.enable()
+        try: yield
+        finally:
+            prof.disable()
+            if dump is not None: prof.dump_stats(dump)
+            stats = pstats.Stats(prof, stream=io.StringIO()).sort_stats("cumulative")
+            rows = sorted(stats.stats.items(), key=lambda kv: kv[1][3], reverse=True)[:top]
+            telemetry.extra["cprofile"] = {"file": str(dump) if dump else None, "top": [
+                {"function": f"{f}:{line}({fn})", "calls": nc, "tottime_s": tt, "cumtime_s": ct}
+                for (f, line, fn), (cc, nc, tt, ct, _) in rows]}
+    elif mode == "tracemalloc":
+        tracemalloc.start()
+        try: yield
+        finally:
+            snapshot, (_, peak) = tracemalloc.take_snapshot(), tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            telemetry.extra["tracemalloc"] = {"peak_mb": peak / 2**20, "top": [
+                {"where": str(s.traceback), "size_mb": s.size / 2**20, "count": s.count}
+                for s in snapshot.statistics("lineno")[:top]]}
+    elif mode: raise ValueError(f"unknown profile mode {mode!r}; use 'cprofile' or 'tracemalloc'")
+    else: yield
@@ -0,0 +1,40 @@
+from functools import lru_cache
+from typing import Dict, Sequence, Tuple
+import numpy as np
+from nltk.sentiment.vader import SentimentIntensityAnalyzer
+import fast_vader
+
+@lru_cache(maxsize=None)
+def unicode_tables() -> Tuple[bytes, Dict[int, str]]:
+    """
+    Whitespace and case flags of every code point, and the lowercase form of those
+    str.lower() changes, taken from this interpreter so the extension splits and
+    case-folds exactly like the str methods NLTK's VADER calls.
+    """
+    chars = ''.join(map(chr, range(0x110000)))
+    flags = lambda method: np.frombuffer(bytes(map(method, chars)), dtype=np.uint8)
+    upper, title = flags(str.isupper), flags(str.istitle)
+    # isupper() of a whole word is False as soon as one character is lowercase or titlecase.
+    lower = flags(str.islower) | (title & ~upper)
+    classes = flags(str.isspace) * fast_vader.SPACE | upper * fast_vader.UPPER | lower * fast_vader.LOWER
+    # Only uppercase and titlecase characters have a lowercase mapping; single-character istitle() covers both.
+    lowered = {int(cp): chars[cp].lower() for cp in np.flatnonzero(title) if chars[cp].lower() != chars[cp]}
+    return classes.astype(np.uint8).tobytes(), lowered
+
+class NativeVader(SentimentIntensityAnalyzer):
+    """
+    NLTK's analyzer plus compound(), which scores a whole batch in the fast_vader
+    extension without the GIL. The lexicon is the one NLTK loaded, so the scores
+    are those of polarity_scores(text)['compound'].
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._native = fast_vader.Vader(self.lexicon, *unicode_tables())
+
+    def compound(self, texts: Sequence[str], n_threads: int = 1) -> np.ndarray:
+        scores = self._native.compound(texts, n_threads)
+        # Strings UTF-8 cannot encode (lone surrogates) go through NLTK; anything else is neutral.
+        for i in np.flatnonzero(np.isnan(scores)):
+            scores[i] = self.polarity_scores(texts[i])['compound'] if isinstance(texts[i], str) else 0.0
+        return scores
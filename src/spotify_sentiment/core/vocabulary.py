@@ -0,0 +1,86 @@
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, List
+import numpy as np
+from loguru import logger
+from spotify_sentiment.core.config import settings
+from spotify_sentiment.core.manifest import fingerprint
+
+def vocabulary_key() -> str:
+    """Hash of everything the expanded keywords depend on: seeds, model and similarity thresholds."""
+    model = Path(settings.EMBEDDINGS_MODEL)
+    inputs = {'topics': settings.TOPIC_DEFINITIONS, 'model': settings.EMBEDDINGS_MODEL,
+              'model_file': fingerprint(model) if model.is_file() else None,
+              'topn': settings.EXPANSION_TOPN, 'min_similarity': settings.EXPANSION_MIN_SIMILARITY}
+    if settings.TOPIC_PROFILES: inputs['profiles'] = settings.TOPIC_PROFILES
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+def load_embeddings(model: str):
+    """A gensim-data model by name, or a local word2vec-format file (`.bin` for binary)."""
+    if Path(model).is_file():
+        from gensim.models import KeyedVectors
+        return KeyedVectors.load_word2vec_format(model, binary=model.endswith('.bin'))
+    import gensim.downloader as api
+    return api.load(model)
+
+def expand_topics(topics: Dict[str, List[str]], vectors, topn: int, min_similarity: float) -> Dict[str, List[str]]:
+    """
+    Every topic's lowercased seeds plus, per single-word seed, those of its `topn`
+    nearest neighbours that clear `min_similarity` and are alphabetic words of four
+    letters or more. Same neighbours as KeyedVectors.most_similar, with one matrix
+    product over all seeds instead of a pass over the vocabulary per seed.
+    """
+    from gensim import matutils
+    seeds = sorted({w.lower() for words in topics.values() for w in words if ' ' not in w and w.lower() in vectors.key_to_index})
+    neighbours = {}
+    if seeds:
+        vectors.fill_norms()
+        means = np.stack([vectors.get_mean_vector([w], pre_normalize=True, post_normalize=True) for w in seeds])
+        dists = (vectors.vectors @ means.T) / vectors.norms[:, np.newaxis]
+        for j, w in enumerate(seeds):
+            own = vectors.get_index(w)
+            best = [i for i in matutils.argsort(dists[:, j], topn=topn + 1, reverse=True) if i != own][:topn]
+            close = (vectors.index_to_key[i] for i in best if float(dists[i, j]) > min_similarity)
+            neighbours[w] = [n for n in close if n.isalpha() and len(n) > 3]
+
+    patterns = {}
+    for topic, words in topics.items():
+        vocab = {w.lower() for w in words}
+        for w in words: vocab.update(neighbours.get(w.lower(), []))
+        patterns[topic] = sorted(vocab)
+    return patterns
+
+def topic_patterns() -> Dict[str, List[str]]:
+    """The keyword lists of TOPIC_DEFINITIONS that AnalyzeStep scans for."""
+    return profile_patterns()['']
+
+def profile_patterns() -> Dict[str, Dict[str, List[str]]]:
+    """
+    The keyword lists of TOPIC_DEFINITIONS under '' and of every TOPIC_PROFILES
+    entry under its name. Expanded lists are kept in VOCABULARY under
+    vocabulary_key(), so the embeddings are only loaded when a seed, the model or
+    a threshold changes.
+    """
+    definitions = {'': settings.TOPIC_DEFINITIONS, **settings.TOPIC_PROFILES}
+    bad = [name for name in settings.TOPIC_PROFILES if not re.fullmatch(r'[A-Za-z0-9_-]+', name)]
+    if bad: raise ValueError(f"topic profile names go into file names and may only hold letters, digits, _ and -: {bad}")
+    if settings.USE_EXACT_MATCH_ONLY:
+        return {name: {topic: sorted({w.lower() for w in words}) for topic, words in topics.items()} for name, topics in definitions.items()}
+    key = vocabulary_key()
+    if settings.VOCABULARY.exists():
+        saved = json.loads(settings.VOCABULARY.read_text())
+        if saved.get('key') == key: return {'': saved['patterns'], **saved.get('profiles', {})}
+    logger.info(f"Expanding topic keywords with {settings.EMBEDDINGS_MODEL}")
+    vectors = load_embeddings(settings.EMBEDDINGS_MODEL)
+    patterns = {name: expand_topics(topics, vectors, settings.EXPANSION_TOPN, settings.EXPANSION_MIN_SIMILARITY)
+                for name, topics in definitions.items()}
+    saved = {'key': key, 'model': settings.EMBEDDINGS_MODEL, 'patterns': patterns['']}
+    if settings.TOPIC_PROFILES: saved['profiles'] = {name: p for name, p in patterns.items() if name}
+    settings.VOCABULARY.parent.mkdir(exist_ok=True, parents=True)
+    tmp = settings.VOCABULARY.with_suffix('.tmp')
+    tmp.write_text(json.dumps(saved, indent=2))
+    os.replace(tmp, settings.VOCABULARY)
+    return patterns
@@ -1,9 +1,14 @@
 from abc import ABC, abstractmethod
-import psutil
-import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, Optional
 from loguru import logger
+from spotify_sentiment.core.telemetry import StepTelemetry, peak_rss_mb, profiled, rss_mb
+if TYPE_CHECKING: import pandas as pd
 
 class PipelineStep(ABC):
+    # Steps that implement stream() can be fused with their neighbours by a streaming PipelineRunner.
+    streams: bool = False
+
     @property
     @abstractmethod
     def step_name(self) -> str: pass
@@ -11,19 +16,41 @@ class PipelineStep(ABC):
     @abstractmethod
     def execute(self) -> None: pass
 
+    def stream(self, chunks: Optional[Iterator["pd.DataFrame"]]) -> Iterator["pd.DataFrame"]:
+        """
+        Chunk-level form of execute(): consumes the previous step's chunks (None
+        when the step is first and reads its own input) and yields its own.
+        """
+        raise NotImplementedError(f"{self.step_name} has no streaming form")
+
+    _telemetry: Optional[StepTelemetry] = None
+
+    @property
+    def telemetry(self) -> StepTelemetry:
+        """Instrumentation of the current (or last) run; see StepTelemetry for spans and chunks."""
+        if self._telemetry is None: self._telemetry = StepTelemetry(self.step_name)
+        return self._telemetry
+
+    def reset_telemetry(self) -> StepTelemetry:
+        self._telemetry = StepTelemetry(self.step_name)
+        return self._telemetry
+
     def log_telemetry(self, ctx: str = ""):
-        mem = psutil.virtual_memory()
-        logger.debug(f"[{self.step_name} RAM] {ctx} | Used: {mem.percent}% ({mem.used / 1024**3:.2f} GB)")
+        logger.debug(f"[{self.step_name} RAM] {ctx} | RSS: {rss_mb() / 1024:.2f} GB (peak {peak_rss_mb() / 1024:.2f} GB)")
 
-    def run(self) -> None:
+    def run(self, profile: str = "", profile_dump: Optional[Path] = None) -> Dict[str, Any]:
+        """Executes the step and returns its telemetry report, profiled with cProfile or tracemalloc if asked."""
         logger.info(f"Starting Phase: {self.step_name}")
-        start_time = time.time()
+        telemetry = self.reset_telemetry()
         self.log_telemetry("Start")
+        telemetry.start()
         try:
-            self.execute()
-            duration = time.time() - start_time
-            logger.success(f"Completed Phase: {self.step_name} in {duration:.2f}s")
-            self.log_telemetry("End")
+            with profiled(telemetry, profile, profile_dump): self.execute()
         except Exception as e:
+            telemetry.stop(e)
             logger.error(f"Failed Phase {self.step_name}: {e}")
             raise
+        telemetry.stop()
+        logger.success(f"Completed Phase: {self.step_name} in {telemetry.wall:.2f}s (CPU {telemetry.cpu:.2f}s)")
+        self.log_telemetry("End")
+        return telemetry.report()
@@ -1,9 +1,72 @@
-from typing import List
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import List, Optional
 from loguru import logger
+from spotify_sentiment.core.config import settings
 from spotify_sentiment.pipeline.base import PipelineStep
 
-class PipelineRunner:
+class FusedStep(PipelineStep):
+    """Consecutive streaming steps run as one generator pipeline, so chunks flow between them without a file in between."""
+
     def __init__(self, steps: List[PipelineStep]): self.steps = steps
+
+    @property
+    def step_name(self) -> str: return " + ".join(s.step_name for s in self.steps) + " (streaming)"
+
+    def execute(self) -> None:
+        # Each fused step keeps its own chunk records; they are reported under this one.
+        self.telemetry.children = [step.reset_telemetry() for step in self.steps]
+        chunks = None
+        for step in self.steps: chunks = step.stream(chunks)
+        for _ in chunks: pass
+
+class PipelineRunner:
+    """
+    Runs the steps in order and writes a JSON run report (each step's telemetry) to
+    `report`, by default RUN_REPORT. `profile` ("cprofile" or "tracemalloc") profiles
+    every step; cProfile stats are also dumped next to the report for pstats/snakeviz.
+    """
+
+    def __init__(self, steps: List[PipelineStep], streaming: bool = False, profile: str = "", report: Optional[Path] = None):
+        self.steps = self._fuse(steps) if streaming else steps
+        self.streaming, self.profile = streaming, profile
+        self.report_path = report if report is not None else settings.RUN_REPORT
+
+    @staticmethod
+    def _fuse(steps: List[PipelineStep]) -> List[PipelineStep]:
+        fused, run = [], []
+        for step in steps + [None]:
+            if step is not None and step.streams:
+                run.append(step)
+                continue
+            fused.extend([FusedStep(run)] if len(run) > 1 else run)
+            run = []
+            if step is not None: fused.append(step)
+        return fused
+
     def execute_all(self):
-        for step in self.steps: step.run()
+        started, t0 = time.strftime("%Y-%m-%dT%H:%M:%S"), time.perf_counter()
+        reports = []
+        try:
+            for step in self.steps:
+                slug = re.sub(r"[^a-z0-9]+", "_", step.step_name.lower()).strip("_")
+                dump = self.report_path.with_name(f"{self.report_path.stem}.{slug}.prof") if self.profile == "cprofile" else None
+                try: reports.append(step.run(self.profile, dump))
+                except Exception:
+                    reports.append(step.telemetry.report())
+                    raise
+        finally:
+            self._write_report({"started": started, "wall_s": time.perf_counter() - t0, "streaming": self.streaming,
+                                "profile": self.profile or None, "chunk_size": settings.CHUNK_SIZE,
+                                "memory_budget_mb": settings.MEMORY_BUDGET_MB, "steps": reports})
         logger.success("All pipeline steps executed successfully.")
+
+    def _write_report(self, report: dict) -> None:
+        self.report_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.report_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(report, indent=2))
+        os.replace(tmp, self.report_path)
+        logger.info(f"Run report written to {self.report_path}")
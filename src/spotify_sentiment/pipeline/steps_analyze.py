@@ -1,81 +1,204 @@
-import gc
-import time
-import math
-import psutil
+import json
+import hashlib
+import itertools
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+import numpy as np
 import pandas as pd
-import gensim.downloader as api
+import pyarrow as pa
 from loguru import logger
 from tqdm import tqdm
 from spotify_sentiment.pipeline.base import PipelineStep
 from spotify_sentiment.core.config import settings
+from spotify_sentiment.core.manifest import Manifest, fingerprint
+from spotify_sentiment.core.store import SentimentStore
+from spotify_sentiment.core.aggregation import MetricsAccumulator, ShowCodes
+from spotify_sentiment.core.sketches import ShowSketches
+from spotify_sentiment.core.chunking import AdaptiveChunker
+from spotify_sentiment.core.cache import ScanMemo
+from spotify_sentiment.core.vocabulary import profile_patterns
 import fast_scanner
 
+TEXT_COLUMNS = ['episodeName', 'description']
+METRIC_COLUMNS = ['date', 'rank', 'sentiment_score', 'showUri']
+COLUMNS = TEXT_COLUMNS + METRIC_COLUMNS
+_SCHEMA = pa.schema([(c, pa.float64() if c == 'sentiment_score' else pa.string()) for c in COLUMNS])
+
+def profile_path(path: Path, profile: str) -> Path:
+    """Where a TOPIC_PROFILES entry's version of an output goes: topic_metrics.csv -> topic_metrics.<profile>.csv."""
+    return path.with_name(f"{path.stem}.{profile}{path.suffix}") if profile else path
+
 class AnalyzeStep(PipelineStep):
+    streams = True
+    # Set by sharded runs: save the metrics of the chunks streamed in here, as a partial, instead of writing the metrics files.
+    partial: Optional[Path] = None
+
     @property
     def step_name(self) -> str: return "C++ Hash Extraction"
 
-    def __init__(self):
-        self.glove = None if settings.USE_EXACT_MATCH_ONLY else api.load('glove-wiki-gigaword-50')
-
     def execute(self) -> None:
-        patterns = {}
-        for topic, seeds in settings.TOPIC_DEFINITIONS.items():
-            vocab = set(w.lower() for w in seeds)
-            if self.glove:
-                for word in seeds:
-                    if ' ' not in word:
-                        try:
-                            sims = self.glove.most_similar(word.lower(), topn=5)
-                            vocab.update(w for w, s in sims if s > 0.65 and w.isalpha() and len(w) > 3)
-                        except: pass
-            patterns[topic] = list(vocab)
-
-        matched_data = []
-        cols = ['date', 'rank', 'episodeName', 'description', 'sentiment_score', 'showUri']
-        
-        with open(settings.SENTIMENT_DATA, 'rb') as f:
-            total_rows = sum(1 for _ in f) - 1
-        total_expected_chunks = math.ceil(total_rows / settings.CHUNK_SIZE)
-        
-        with tqdm(total=total_expected_chunks, desc="C++ Scan Progress", unit="chk", dynamic_ncols=True) as pbar:
-            for chunk in pd.read_csv(settings.SENTIMENT_DATA, chunksize=settings.CHUNK_SIZE, usecols=cols, low_memory=False):
-                t0 = time.time()
-                
-                chunk['date'] = pd.to_datetime(chunk['date'], errors='coerce')
-                chunk['popularity'] = (pd.to_numeric(chunk['rank'], errors='coerce').max() + 1) - pd.to_numeric(chunk['rank'], errors='coerce')
-                chunk['ctx'] = (chunk['episodeName'].fillna('') + " " + chunk['description'].fillna('')).str.lower()
-                
-                texts_list = chunk['ctx'].tolist()
-                cpp_matches = fast_scanner.scan_chunks(texts_list, patterns)
-                
-                if cpp_matches:
-                    df_matches = pd.DataFrame(cpp_matches, columns=['row_idx', 'topic', 'matched_word'])
-                    original_rows = chunk.iloc[df_matches['row_idx']].reset_index(drop=True)
-                    original_rows['topic'] = df_matches['topic']
-                    original_rows['matched_word'] = df_matches['matched_word']
-                    matched_data.append(original_rows)
-
-                del chunk['ctx']
-                del chunk, texts_list, cpp_matches
-                gc.collect()
-                
-                process_time = max((time.time() - t0), 0.001)
-                speed = settings.CHUNK_SIZE / process_time
-                ram_gb = psutil.virtual_memory().used / (1024**3)
-                pbar.set_postfix({"Rows/sec": f"{speed:,.0f}", "RAM": f"{ram_gb:.1f}GB"})
-                pbar.update(1)
-
-        if not matched_data: return
-
-        df_all = pd.concat(matched_data, ignore_index=True)
-        
-        df_all['sentiment_score'] = pd.to_numeric(df_all['sentiment_score'], errors='coerce')
-        df_all['popularity'] = pd.to_numeric(df_all['popularity'], errors='coerce')
-        
-        df_topic = df_all.drop_duplicates(subset=['showUri', 'topic', 'date'])
-        df_topic.groupby(['topic', 'date']).agg({'sentiment_score': 'mean', 'popularity': 'mean', 'showUri': 'count'}
-        ).rename(columns={'sentiment_score':'avg_sentiment', 'popularity':'avg_popularity', 'showUri':'sample_size'}).reset_index().to_csv(settings.TOPIC_METRICS, index=False)
-
-        df_word = df_all.drop_duplicates(subset=['showUri', 'topic', 'matched_word', 'date'])
-        df_word.groupby(['topic', 'matched_word', 'date']).agg({'sentiment_score': 'mean', 'popularity': 'mean', 'showUri': 'count'}
-        ).rename(columns={'sentiment_score':'avg_sentiment', 'popularity':'avg_popularity', 'showUri':'sample_size'}).reset_index().to_csv(settings.WORD_METRICS, index=False)
\ No newline at end of file
+        for _ in self.stream(None): pass
+
+    def stream(self, chunks: Optional[Iterator[pd.DataFrame]]) -> Iterator:
+        """
+        Aggregates SENTIMENT_DATA, or the scored chunks of an upstream step, into
+        the metrics files, yielding each chunk once it has been scanned.
+        """
+        from_store = chunks is None
+        if not from_store:
+            # Only decide on an incremental run once the first chunk is in: by then the
+            # upstream steps have settled whether they rebuild from scratch.
+            chunks = iter(chunks)
+            first = next(chunks, None)
+            chunks = itertools.chain([] if first is None else [first], chunks)
+
+        profiles = profile_patterns()
+
+        manifest, store = Manifest(settings.MANIFEST), SentimentStore(settings.SENTIMENT_DATA)
+        if from_store and not store.exists(): raise FileNotFoundError(f"{store.path} not found; run the sentiment step first")
+        # Without a persisted SENTIMENT_DATA there is nothing a later incremental run could resume from.
+        persisted = (from_store or settings.PERSIST_SENTIMENT) and self.partial is None
+        keywords = {name: {t: sorted(w) for t, w in patterns.items()} for name, patterns in profiles.items()}
+        patterns_checksum = hashlib.sha256(json.dumps(keywords if len(keywords) > 1 else keywords[''], sort_keys=True).encode()).hexdigest()
+        state = self._resume_state(manifest, store, patterns_checksum) if persisted else None
+        watermark = pd.Timestamp(state['watermark']) if state and state['watermark'] else None
+        after = state['watermark'] if state else None
+        if state: logger.info(f"Incremental run: aggregating rows dated after {after}")
+
+        # One matcher over every profile's keywords; each profile's topics are a contiguous range of topic ids.
+        scanner = fast_scanner.Scanner(profiles=profiles)
+        memo = ScanMemo(scanner, settings.SCAN_MEMO_ITEMS) if settings.SCAN_MEMO_ITEMS > 0 else None
+        bounds = np.searchsorted(scanner.topic_profiles, np.arange(len(scanner.profiles) + 1))
+        ranges: Dict[str, Tuple[int, int]] = {name: (int(a), int(b)) for name, a, b in zip(scanner.profiles, bounds, bounds[1:])}
+        shows = ShowCodes()
+        metrics = {name: MetricsAccumulator(scanner.topics[a:b], scanner.words, settings.SKETCH_PRECISION, shows)
+                   for name, (a, b) in ranges.items()}
+        newest = watermark
+
+        if from_store:
+            # Only the needed columns are read, and an incremental run never opens the days it already holds.
+            chunker = AdaptiveChunker("analyze", settings.CHUNK_SIZE, settings.MEMORY_BUDGET_MB)
+            reader = store.reader(COLUMNS, after=after, batch_rows=chunker.min_rows)
+            tables, total = ((t, t) for t in chunker.chunks(reader, sizeof=lambda t: t.nbytes)), store.num_rows(after)
+        else:
+            tables, total = ((self._to_table(c, watermark), c) for c in chunks), None
+
+        telemetry = self.telemetry
+        with tqdm(total=total, desc="C++ Scan Progress", unit="rows", unit_scale=True, dynamic_ncols=True) as pbar:
+            for table, consumed in telemetry.each_chunk(tables, span="read"):
+                # The scanner joins the two columns and folds case itself, straight from the Arrow buffers;
+                # with the memo, only texts not seen earlier in the run get scanned.
+                with telemetry.span("scan"):
+                    texts = [table.column(c).combine_chunks() for c in TEXT_COLUMNS]
+                    if memo is None: row_idx, topic_ids, word_ids = scanner.scan_arrow(texts, n_threads=settings.SCAN_THREADS)
+                    else:
+                        unique, saved = memo.unique, memo.saved_seconds
+                        row_idx, topic_ids, word_ids = memo.scan_arrow(texts, n_threads=settings.SCAN_THREADS)
+                        unique, saved = memo.unique - unique, memo.saved_seconds - saved
+
+                with telemetry.span("aggregate"):
+                    chunk = table.select(METRIC_COLUMNS).to_pandas()
+                    chunk['date'] = pd.to_datetime(chunk['date'], errors='coerce')
+                    chunk['rank'] = pd.to_numeric(chunk['rank'], errors='coerce')
+                    rows = metrics[''].encode(chunk)  # the profiles share show codes, so one encoding serves them all
+                    for m in metrics.values(): m.observe(rows)
+                    if len(chunk) and pd.notna(chunk['date'].max()) and (newest is None or chunk['date'].max() > newest): newest = chunk['date'].max()
+
+                    if len(row_idx):
+                        matched = rows.take(row_idx)
+                        if len(ranges) == 1: metrics[''].add(matched, topic_ids, word_ids)
+                        else:
+                            for name, (a, b) in ranges.items():
+                                own = (topic_ids >= a) & (topic_ids < b)
+                                metrics[name].add(matched.take(own), topic_ids[own] - a, word_ids[own])
+                        del matched
+                    # The store hands over whole days in date order, so every day before this chunk's last one is complete.
+                    if from_store and chunk['date'].notna().any():
+                        for m in metrics.values(): m.seal(chunk['date'].max().normalize())
+
+                n_rows, n_matches = table.num_rows, len(row_idx)
+                # Chunks are sized and collected by the chunker of whichever step reads them.
+                del table, chunk, rows, texts, row_idx, topic_ids, word_ids
+
+                record = telemetry.end_chunk(n_rows, n_matches)
+                postfix = {"Rows/sec": f"{n_rows / max(record['wall_s'], 0.001):,.0f}", "RSS": f"{record['rss_mb'] / 1024:.1f}GB",
+                           "Agg": f"{sum(m.nbytes for m in metrics.values()) / 2**20:.0f}MB"}
+                if memo is not None: postfix.update({"Unique": f"{unique / max(n_rows, 1):.0%}", "Saved": f"{saved:.2f}s"})
+                pbar.set_postfix(postfix)
+                pbar.update(n_rows)
+                yield consumed
+
+        if from_store: telemetry.extra["chunking"] = chunker.summary()
+        if memo is not None and memo.rows:
+            logger.info(f"Scan memo: {memo.scanned:,} of {memo.rows:,} rows scanned ({memo.unique / memo.rows:.1%} unique per chunk), "
+                        f"~{memo.saved_seconds:.1f}s of scanning saved")
+        if self.partial is not None:
+            with telemetry.span("write"):
+                for name, m in metrics.items(): m.save(profile_path(self.partial, name))
+            return
+        with telemetry.span("write"):
+            for name, m in metrics.items():
+                if not m.matched: continue
+                self._write_metrics(profile_path(settings.TOPIC_METRICS, name), watermark, m.topic_metrics())
+                self._write_metrics(profile_path(settings.WORD_METRICS, name), watermark, m.word_metrics())
+                if m.sketches is not None: self._write_sketches(profile_path(settings.SHOW_SKETCHES, name), watermark, m.sketches)
+        if len(metrics) > 1: logger.info(f"Wrote the metrics of {len(metrics) - 1} topic profiles: {', '.join(n for n in metrics if n)}")
+
+        sentiment = manifest.get('sentiment')
+        manifest.set('analyze',
+                     watermark=newest.strftime('%Y-%m-%d') if newest is not None else None,
+                     sentiment_generation=sentiment['generation'] if sentiment and persisted else None,
+                     sentiment_rows=store.num_rows(),
+                     patterns_checksum=patterns_checksum,
+                     topic_checksum=fingerprint(settings.TOPIC_METRICS),
+                     word_checksum=fingerprint(settings.WORD_METRICS),
+                     profile_checksums=self._profile_checksums(profiles))
+
+    def _resume_state(self, manifest: Manifest, store: SentimentStore, patterns_checksum: str) -> Optional[dict]:
+        """Manifest record to continue from, or None to recompute every metric."""
+        state = manifest.get('analyze') if settings.INCREMENTAL else None
+        if state is None: return None
+        sentiment = manifest.get('sentiment')
+        if not sentiment or not store.exists() or sentiment['generation'] != state['sentiment_generation'] or store.num_rows() < state['sentiment_rows']:
+            logger.warning("Sentiment data was rebuilt since the last analyze run; recomputing metrics from scratch.")
+        elif state['patterns_checksum'] != patterns_checksum:
+            logger.warning("Topic keywords changed since the last analyze run; recomputing metrics from scratch.")
+        elif state['topic_checksum'] != fingerprint(settings.TOPIC_METRICS) or state['word_checksum'] != fingerprint(settings.WORD_METRICS) \
+                or state.get('profile_checksums', {}) != self._profile_checksums(state.get('profile_checksums', {})):
+            logger.warning("Metrics files changed outside the pipeline; recomputing them from scratch.")
+        else:
+            return state
+        return None
+
+    @staticmethod
+    def _profile_checksums(profiles) -> Dict[str, list]:
+        return {name: [fingerprint(profile_path(settings.TOPIC_METRICS, name)), fingerprint(profile_path(settings.WORD_METRICS, name))]
+                for name in profiles if name}
+
+    @staticmethod
+    def _to_table(chunk: pd.DataFrame, watermark: Optional[pd.Timestamp]) -> pa.Table:
+        """The columns of a scored chunk that analysis needs, typed as SENTIMENT_DATA stores them."""
+        if watermark is not None: chunk = chunk[pd.to_datetime(chunk['date'], errors='coerce') > watermark]
+        return pa.Table.from_pandas(chunk[COLUMNS], schema=_SCHEMA, preserve_index=False)
+
+    @staticmethod
+    def _write_sketches(path: Path, watermark: Optional[pd.Timestamp], new: ShowSketches) -> None:
+        """Writes the show sketches of `new`, merged after the days an incremental run already holds in `path`."""
+        if watermark is not None:
+            old = ShowSketches.load(path) if path.exists() else None
+            if old is None or old.precision != new.precision:
+                logger.warning(f"{path.name} is missing or of another precision; it only covers the days after {watermark.date()}.")
+            else:
+                new.update(old, before=int(watermark.to_datetime64().astype('datetime64[D]').astype('int64')) + 1)
+        new.save(path)
+
+    @staticmethod
+    def _write_metrics(path: Path, watermark: Optional[pd.Timestamp], new: pd.DataFrame) -> None:
+        """Writes `new`, merged after the days an incremental run already holds in `path`."""
+        if watermark is not None and path.exists():
+            old = pd.read_csv(path, float_precision='round_trip')
+            old['date'] = pd.to_datetime(old['date'])
+            keys = [c for c in ('topic', 'matched_word', 'date') if c in new.columns]
+            new = new.astype({c: str for c in keys if c != 'date'})
+            new = pd.concat([old[old['date'] <= watermark], new], ignore_index=True).sort_values(keys, kind='stable')
+        new.to_csv(path, index=False)
@@ -2,6 +2,7 @@ import os
 from loguru import logger
 from spotify_sentiment.pipeline.base import PipelineStep
 from spotify_sentiment.core.config import settings
+from spotify_sentiment.core.raw import RawData, verify_sha256
 
 class DownloadStep(PipelineStep):
     @property
@@ -9,9 +10,21 @@ class DownloadStep(PipelineStep):
     def execute(self):
         settings.DATA_DIR.mkdir(exist_ok=True, parents=True)
         if settings.RAW_DATA.exists(): return logger.info("Dataset found. Skipping.")
+        if settings.RAW_ARCHIVE.exists():
+            verify_sha256(settings.RAW_ARCHIVE, settings.RAW_ARCHIVE_SHA256)
+            return logger.info(f"Dataset archive {settings.RAW_ARCHIVE.name} found. Skipping.")
         os.environ['KAGGLE_USERNAME'] = settings.KAGGLE_USERNAME
         os.environ['KAGGLE_KEY'] = settings.KAGGLE_KEY
         import kaggle
         kaggle.api.authenticate()
-        kaggle.api.dataset_download_files(settings.KAGGLE_DATASET, path=settings.DATA_DIR, unzip=True)
-        (settings.DATA_DIR / "top_podcasts.csv").rename(settings.RAW_DATA)
+        # Kept zipped: sentiment streams the CSV out of the archive instead of waiting for it to be extracted.
+        kaggle.api.dataset_download_files(settings.KAGGLE_DATASET, path=settings.DATA_DIR, unzip=False)
+        downloaded = settings.DATA_DIR / f"{settings.KAGGLE_DATASET.split('/')[-1]}.zip"
+        if downloaded != settings.RAW_ARCHIVE: downloaded.replace(settings.RAW_ARCHIVE)
+        try: verify_sha256(settings.RAW_ARCHIVE, settings.RAW_ARCHIVE_SHA256)
+        except ValueError:
+            settings.RAW_ARCHIVE.unlink()  # so the next run downloads it again
+            raise
+        source = RawData.from_settings()
+        logger.info(f"Downloaded {settings.RAW_ARCHIVE.name}: {source.size() / 2**20:,.0f} MB of CSV in "
+                    f"{settings.RAW_ARCHIVE.stat().st_size / 2**20:,.0f} MB")
@@ -1,51 +1,221 @@
-import gc
+import hashlib
+from contextlib import nullcontext
 import pandas as pd
-import nltk
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import cached_property
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional
 from loguru import logger
 from tqdm import tqdm
-import time
-import math
+import uuid
 from spotify_sentiment.pipeline.base import PipelineStep
 from spotify_sentiment.core.config import settings
+from spotify_sentiment.core.cache import SentimentCache
+from spotify_sentiment.core.chunking import AdaptiveChunker
+from spotify_sentiment.core.manifest import Manifest, fingerprint
+from spotify_sentiment.core.raw import RawData
+from spotify_sentiment.core.store import SentimentStore
+# nltk takes about a second to import, so it is only imported once something gets scored.
+if TYPE_CHECKING:
+    from nltk.sentiment.vader import SentimentIntensityAnalyzer
+    from spotify_sentiment.core.shards import Shard
+
+def ensure_vader_lexicon() -> None:
+    import nltk
+    try: nltk.data.find('sentiment/vader_lexicon.zip')
+    except: nltk.download('vader_lexicon', quiet=True)
+
+def make_analyzer() -> "SentimentIntensityAnalyzer":
+    """The SENTIMENT_ENGINE analyzer; NLTK's own when the native one is not built."""
+    ensure_vader_lexicon()
+    if settings.SENTIMENT_ENGINE == 'native':
+        try: from spotify_sentiment.core.vader import NativeVader
+        except ImportError: logger.warning("fast_vader extension not built; scoring with NLTK's VADER")
+        else: return NativeVader()
+    from nltk.sentiment.vader import SentimentIntensityAnalyzer
+    return SentimentIntensityAnalyzer()
+
+def normalize_score(analyzer: "SentimentIntensityAnalyzer", text: str) -> float:
+    if not isinstance(text, str) or not text.strip(): return 0.5
+    return (analyzer.polarity_scores(text)['compound'] + 1.0) / 2.0
+
+def score_texts(analyzer: "SentimentIntensityAnalyzer", texts: List[str], n_threads: int = 1) -> Dict[str, float]:
+    """normalize_score of every text, in a single native call when the analyzer has one (NativeVader)."""
+    if not hasattr(analyzer, 'compound'): return {t: normalize_score(analyzer, t) for t in texts}
+    return dict(zip(texts, ((analyzer.compound(texts, n_threads) + 1.0) / 2.0).tolist()))
+
+def scorer_version(analyzer: "SentimentIntensityAnalyzer") -> str:
+    """Identifies the scores a given analyzer produces; part of every cache key."""
+    import nltk
+    lexicon = hashlib.sha1(analyzer.lexicon_file.encode()).hexdigest()[:12]
+    engine = "fast_vader" if hasattr(analyzer, 'compound') else f"nltk-{nltk.__version__}"
+    return f"{engine}/vader-{lexicon}/normalized"
+
+# Each pool worker loads its own analyzer once, in the initializer.
+_worker_analyzer = None
+
+def _init_worker() -> None:
+    global _worker_analyzer
+    _worker_analyzer = make_analyzer()
+
+def _score_batch(texts: List[str]) -> Dict[str, float]:
+    return score_texts(_worker_analyzer, texts)
 
 class SentimentStep(PipelineStep):
+    streams = True
+    # Set by sharded runs: score only these whole days of RAW_DATA, without writing SENTIMENT_DATA.
+    shard: Optional["Shard"] = None
+
     @property
     def step_name(self) -> str: return "Sentiment Analysis"
-    
+
+    @cached_property
+    def analyzer(self) -> "SentimentIntensityAnalyzer": return make_analyzer()
+
     def _normalize_score(self, text: str) -> float:
-        if not isinstance(text, str) or not text.strip(): return 0.5
-        return (self.analyzer.polarity_scores(text)['compound'] + 1.0) / 2.0
+        return normalize_score(self.analyzer, text)
 
-    def execute(self):
-        try: nltk.data.find('sentiment/vader_lexicon.zip')
-        except: nltk.download('vader_lexicon', quiet=True)
-        self.analyzer = SentimentIntensityAnalyzer()
-        
-        cache = {}
-        first_chunk = True
-        
-        with open(settings.RAW_DATA, 'rb') as f:
-            total_rows = sum(1 for _ in f) - 1
-        total_chunks = math.ceil(total_rows / settings.CHUNK_SIZE)
-        
-        with tqdm(total=total_chunks, desc="VADER Progress", unit="chk", dynamic_ncols=True) as pbar:
-            for chunk in pd.read_csv(settings.RAW_DATA, chunksize=settings.CHUNK_SIZE, low_memory=False):
-                t0 = time.time()
+    def _scored_chunks(self, chunks: Iterable[pd.DataFrame], cache: SentimentCache) -> Iterator[pd.DataFrame]:
+        """Yields every chunk with its sentiment_score column, in input order."""
+        if settings.SENTIMENT_WORKERS <= 1:
+            for chunk in chunks:
+                chunk['description'] = chunk['description'].fillna("neutral")
+                uniques = chunk['description'].unique()
+                with self.telemetry.span("cache"): scores = cache.lookup(uniques)
+                with self.telemetry.span("score"):
+                    new = score_texts(self.analyzer, [t for t in uniques if t not in scores], settings.SENTIMENT_THREADS)
+                with self.telemetry.span("cache"): cache.update(new)
+                scores.update(new)
+                chunk['sentiment_score'] = chunk['description'].map(scores)
+                yield chunk
+            return
+
+        # Unscored descriptions go to the pool in batches while the next chunks are read.
+        # Each pending chunk keeps its own score dict, so LRU eviction in the cache never
+        # loses a score a pending chunk still needs, and a description that is already in
+        # flight for an earlier chunk is waited on rather than submitted twice.
+        size = settings.SENTIMENT_BATCH_SIZE
+        with ProcessPoolExecutor(max_workers=settings.SENTIMENT_WORKERS, initializer=_init_worker) as pool:
+            pending, in_flight = deque(), {}
+            for chunk in chunks:
                 chunk['description'] = chunk['description'].fillna("neutral")
                 uniques = chunk['description'].unique()
-                
-                for t in [t for t in uniques if t not in cache]:
-                    cache[t] = self._normalize_score(t)
-                    
-                chunk['sentiment_score'] = chunk['description'].map(cache)
-                chunk.to_csv(settings.SENTIMENT_DATA, mode='a', index=False, header=first_chunk)
-                
-                first_chunk = False
-                speed = settings.CHUNK_SIZE / max((time.time() - t0), 0.001)
-                pbar.set_postfix({"Rows/sec": f"{speed:,.0f}", "Cache": len(cache)})
-                pbar.update(1)
-                
-                if len(cache) > 200000: cache.clear()
-                del chunk, uniques
-                gc.collect()
+                with self.telemetry.span("cache"): scores = cache.lookup(uniques)
+                waits, new = set(), []
+                for t in uniques:
+                    if t in scores: continue
+                    elif t in in_flight: waits.add(in_flight[t])
+                    else: new.append(t)
+                own = []
+                for i in range(0, len(new), size):
+                    fut = pool.submit(_score_batch, new[i:i + size])
+                    in_flight.update(dict.fromkeys(new[i:i + size], fut))
+                    own.append(fut)
+                pending.append((chunk, scores, waits, own))
+                if len(pending) >= settings.SENTIMENT_INFLIGHT_CHUNKS:
+                    yield self._finish_chunk(pending.popleft(), cache, in_flight)
+            while pending:
+                yield self._finish_chunk(pending.popleft(), cache, in_flight)
+
+    def _finish_chunk(self, entry, cache: SentimentCache, in_flight: Dict) -> pd.DataFrame:
+        chunk, scores, waits, own = entry
+        new = {}
+        # Time spent waiting on the workers.
+        with self.telemetry.span("score"):
+            for fut in waits: scores.update(fut.result())
+            for fut in own: new.update(fut.result())
+        for t in new: del in_flight[t]
+        with self.telemetry.span("cache"): cache.update(new)
+        scores.update(new)
+        chunk['sentiment_score'] = chunk['description'].map(scores)
+        return chunk
+
+    def _resume_state(self, manifest: Manifest, store: SentimentStore, raw: RawData) -> Optional[dict]:
+        """Manifest record to continue from, or None for a full rebuild."""
+        state = manifest.get('sentiment') if settings.INCREMENTAL else None
+        if state is None: return None
+        if state['raw_checksum'] != raw.head_checksum(state['raw_checksum_bytes']):
+            logger.warning("Raw data history changed since the last run; rebuilding sentiment from scratch.")
+        elif state['output_checksum'] != fingerprint(store.metadata_path):
+            logger.warning(f"{store.path.name} changed outside the pipeline; rebuilding from scratch.")
+        elif self._columns(raw) + ['sentiment_score'] != store.schema.names:
+            logger.warning("Raw data columns changed since the last run; rebuilding sentiment from scratch.")
+        else:
+            return state
+        return None
+
+    def execute(self):
+        for _ in self._stream(persist=True): pass
+
+    def stream(self, chunks: Optional[Iterator[pd.DataFrame]]) -> Iterator[pd.DataFrame]:
+        if chunks is not None: raise ValueError(f"{self.step_name} reads RAW_DATA itself and has to come first in a stream")
+        return self._stream(persist=settings.PERSIST_SENTIMENT and self.shard is None)
+
+    def _stream(self, persist: bool) -> Iterator[pd.DataFrame]:
+        """Scores RAW_DATA chunk by chunk, appending to SENTIMENT_DATA when `persist`, and yields the scored chunks."""
+        manifest, store, source = Manifest(settings.MANIFEST), SentimentStore(settings.SENTIMENT_DATA), RawData.from_settings()
+        if not persist and settings.INCREMENTAL:
+            logger.warning(f"Incremental runs resume from {store.path.name}, which this run does not write; scoring the full history.")
+        state = self._resume_state(manifest, store, source) if persist else None
+        watermark = pd.Timestamp(state['watermark']) if state and state['watermark'] else None
+        if state is None and persist: store.clear()
+        elif state: logger.info(f"Incremental run: scoring rows dated after {state['watermark']}")
+        newest = watermark
+
+        if settings.SENTIMENT_WORKERS > 1: logger.info(f"Scoring with {settings.SENTIMENT_WORKERS} worker processes")
+        with self.telemetry.span("setup"):  # loads the analyzer and its lexicon
+            cache = SentimentCache(settings.SENTIMENT_CACHE, scorer_version(self.analyzer),
+                                   settings.SENTIMENT_CACHE_MEMORY_ITEMS, settings.SENTIMENT_CACHE_MAX_ROWS)
+
+        # Pool mode keeps up to SENTIMENT_INFLIGHT_CHUNKS chunks in memory while they are scored.
+        held = settings.SENTIMENT_INFLIGHT_CHUNKS if settings.SENTIMENT_WORKERS > 1 else 1
+        chunker = AdaptiveChunker("sentiment", settings.CHUNK_SIZE, settings.MEMORY_BUDGET_MB, held)
+
+        # Progress is tracked by bytes consumed from the raw file, so it needs no counting pass. An archived
+        # file is decompressed as the chunks are read, so scoring starts on the first one.
+        if self.shard is None and source.archived: logger.info(f"Streaming {source.name} without extracting it")
+        raw = source.open() if self.shard is None else self.shard.open()
+        size = source.size() if self.shard is None else len(self.shard.header) + self.shard.size
+        with raw, cache, store.writer() if persist else nullcontext() as out, \
+                tqdm(total=size, desc="VADER Progress", unit="B", unit_scale=True, dynamic_ncols=True) as pbar:
+            # Every raw column is kept as text; only sentiment_score is numeric in the store.
+            reader = chunker.chunks(pd.read_csv(raw, iterator=True, dtype=str, low_memory=False),
+                                    sizeof=lambda chunk: chunk.memory_usage(deep=True).sum())
+            if watermark is not None: reader = self._after(reader, watermark)
+            telemetry = self.telemetry
+            for chunk in telemetry.each_chunk(self._scored_chunks(telemetry.timed(reader, "read"), cache)):
+                if persist:
+                    with telemetry.span("write"): out.write(chunk)
+
+                chunk_max = pd.to_datetime(chunk['date'], errors='coerce').max()
+                if pd.notna(chunk_max) and (newest is None or chunk_max > newest): newest = chunk_max
+                record = telemetry.end_chunk(len(chunk))
+                speed = len(chunk) / max(record['wall_s'], 0.001)
+                pbar.set_postfix({"Rows/sec": f"{speed:,.0f}", "Hits": f"{cache.hits:,}", "Misses": f"{cache.misses:,}"})
+                pbar.update(raw.tell() - pbar.n)
+
+                yield chunk
+                del chunk
+            pbar.update(pbar.total - pbar.n)
+        self.telemetry.extra["chunking"] = chunker.summary()
+        logger.info(f"Sentiment cache: {cache.hits:,} hits, {cache.misses:,} misses ({cache.hit_rate:.1%} hit rate)")
+        if not persist: return
+
+        manifest.set('sentiment',
+                     watermark=newest.strftime('%Y-%m-%d') if newest is not None else None,
+                     rows=store.num_rows(),
+                     generation=state['generation'] if state else uuid.uuid4().hex,
+                     raw_checksum_bytes=source.head_probe_size(),
+                     raw_checksum=source.head_checksum(source.head_probe_size()),
+                     output_checksum=fingerprint(store.metadata_path))
+
+    @staticmethod
+    def _columns(raw: RawData) -> List[str]:
+        with raw.open() as f: return pd.read_csv(f, nrows=0).columns.tolist()
+
+    @staticmethod
+    def _after(chunks: Iterable[pd.DataFrame], watermark: pd.Timestamp) -> Iterator[pd.DataFrame]:
+        """Keeps only rows dated after the watermark; rows without a valid date cannot be placed and are skipped."""
+        for chunk in chunks:
+            new = chunk[pd.to_datetime(chunk['date'], errors='coerce') > watermark]
+            if len(new): yield new.reset_index(drop=True)
@@ -0,0 +1,97 @@
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+from loguru import logger
+from spotify_sentiment.pipeline.base import PipelineStep
+from spotify_sentiment.pipeline.runner import FusedStep
+from spotify_sentiment.pipeline.steps_sentiment import SentimentStep
+from spotify_sentiment.pipeline.steps_analyze import AnalyzeStep, profile_path
+from spotify_sentiment.core.aggregation import MetricsAccumulator
+from spotify_sentiment.core.config import settings
+from spotify_sentiment.core.manifest import fingerprint
+from spotify_sentiment.core.raw import RawData
+from spotify_sentiment.core.shards import Shard, plan_shards
+from spotify_sentiment.core.vocabulary import profile_patterns
+
+def run_shard(shard: Shard, partial: Path, threads: int = 0) -> dict:
+    """Scores and scans one shard, saving its metrics as a partial; returns the shard's run report."""
+    if threads:  # shards share the machine's cores
+        settings.SCAN_THREADS = settings.SCAN_THREADS or threads
+        settings.SENTIMENT_THREADS = settings.SENTIMENT_THREADS or threads
+    sentiment, analyze = SentimentStep(), AnalyzeStep()
+    sentiment.shard, analyze.partial = shard, partial
+    report = FusedStep([sentiment, analyze]).run()
+    report["shard"] = {"index": shard.index, "start": shard.start, "end": shard.end}
+    return report
+
+class ShardedStep(PipelineStep):
+    """
+    Sentiment and analyze as a map/reduce over `shards` whole-day shards of RAW_DATA.
+
+    Each shard is scored and scanned on its own, in a pool of SHARD_WORKERS
+    processes; `only` runs just the listed shards (none with []), so that hosts
+    sharing DATA_DIR can each run some. A shard saves its metrics as a partial in
+    SHARD_DIR; the reduce merges the partials of every shard into the metrics
+    files. Since a day never spans two shards, each (topic, date) group is summed
+    by one shard in file order and the day's deepest rank is known within it, so
+    the metrics equal those of a single run whatever the shard count. A sharded
+    run is a full rebuild and does not write SENTIMENT_DATA. Shards seek into
+    RAW_DATA, so an archived download is extracted first.
+    """
+
+    def __init__(self, shards: int, only: Optional[List[int]] = None, reduce: bool = True):
+        self.shards, self.only, self.reduce = shards, only, reduce
+
+    @property
+    def step_name(self) -> str: return f"Sharded Sentiment + Analysis ({self.shards} shards)"
+
+    def execute(self) -> None:
+        if settings.INCREMENTAL: logger.warning("Sharded runs rebuild the full history; ignoring --incremental.")
+        source = RawData.from_settings()
+        if source.archived:
+            # Shards are byte ranges that each worker seeks into, which a compressed stream does not allow.
+            logger.info(f"Sharding needs {settings.RAW_DATA.name} extracted; extracting it from {source.name}")
+            with self.telemetry.span("extract"): source.extract()
+        plan = plan_shards(settings.RAW_DATA, self.shards)
+        if len(plan) < self.shards: logger.info(f"{settings.RAW_DATA.name} only splits into {len(plan)} shards of whole days")
+        partials = self._partials(plan)
+        if self.only != []: self._map(plan, partials)
+        if self.reduce: self._reduce(partials)
+
+    def _partials(self, plan: List[Shard]) -> List[Path]:
+        # Named after the raw file and the plan, so partials of an earlier run or another split are never merged.
+        key = hashlib.sha256(repr((fingerprint(settings.RAW_DATA), [(s.start, s.end) for s in plan])).encode()).hexdigest()[:16]
+        return [settings.SHARD_DIR / f"{key}-{s.index:03d}-of-{len(plan):03d}.npz" for s in plan]
+
+    def _map(self, plan: List[Shard], partials: List[Path]) -> None:
+        todo = list(range(len(plan))) if self.only is None else self.only
+        if any(not 0 <= k < len(plan) for k in todo): raise ValueError(f"shards are numbered 0 to {len(plan) - 1}")
+        profile_patterns()  # expands and saves the keyword vocabulary once, before the shards read it
+        settings.SHARD_DIR.mkdir(parents=True, exist_ok=True)
+
+        workers = min(settings.SHARD_WORKERS or os.cpu_count() or 1, len(todo))
+        logger.info(f"Running {len(todo)} of {len(plan)} shards in {workers} processes")
+        if workers > 1:
+            threads = max(1, (os.cpu_count() or 1) // workers)
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                reports = [f.result() for f in [pool.submit(run_shard, plan[k], partials[k], threads) for k in todo]]
+        else:
+            reports = [run_shard(plan[k], partials[k]) for k in todo]
+        self.telemetry.extra["shards"] = reports
+
+    def _reduce(self, partials: List[Path]) -> None:
+        # A shard saves one partial per topic profile.
+        profiles = list(profile_patterns())
+        missing = [i for i, p in enumerate(partials) if not all(profile_path(p, name).exists() for name in profiles)]
+        if missing: raise FileNotFoundError(f"Partials of shards {missing} not found in {settings.SHARD_DIR}; run them first")
+        with self.telemetry.span("reduce"):
+            for name in profiles:
+                metrics = MetricsAccumulator.merge([profile_path(p, name) for p in partials])
+                if not metrics.matched: continue
+                AnalyzeStep._write_metrics(profile_path(settings.TOPIC_METRICS, name), None, metrics.topic_metrics())
+                AnalyzeStep._write_metrics(profile_path(settings.WORD_METRICS, name), None, metrics.word_metrics())
+                if metrics.sketches is not None: metrics.sketches.save(profile_path(settings.SHOW_SKETCHES, name))
+        for stale in set(settings.SHARD_DIR.glob("*.npz")) - {profile_path(p, name) for p in partials for name in profiles}: stale.unlink()
+        logger.info(f"Merged {len(partials)} shard partials into {settings.TOPIC_METRICS.name} and {settings.WORD_METRICS.name}")
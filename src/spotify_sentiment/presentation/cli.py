@@ -1,16 +1,55 @@
-import argparse, sys
+import argparse, importlib, sys
+from pathlib import Path
+from typing import Callable, Dict
 from loguru import logger
+from spotify_sentiment.core.config import settings
+from spotify_sentiment.pipeline.base import PipelineStep
 from spotify_sentiment.pipeline.runner import PipelineRunner
-from spotify_sentiment.pipeline.steps_download import DownloadStep
-from spotify_sentiment.pipeline.steps_sentiment import SentimentStep
-from spotify_sentiment.pipeline.steps_analyze import AnalyzeStep
-from spotify_sentiment.pipeline.steps_visualize import VisualizeStep
+
+def _factory(module: str, cls: str) -> Callable[[], PipelineStep]:
+    """Builds the step on demand; its module, and whatever it imports, is only loaded then."""
+    return lambda: getattr(importlib.import_module(f"spotify_sentiment.pipeline.{module}"), cls)()
+
+# Pipeline order; `--step all` builds every step, any other --step just that one.
+STEPS: Dict[str, Callable[[], PipelineStep]] = {
+    "download": _factory("steps_download", "DownloadStep"),
+    "sentiment": _factory("steps_sentiment", "SentimentStep"),
+    "analyze": _factory("steps_analyze", "AnalyzeStep"),
+    "visualize": _factory("steps_visualize", "VisualizeStep"),
+}
 
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument("--step", choices=["download", "sentiment", "analyze", "visualize", "all"], default="all")
+    parser.add_argument("--step", choices=list(STEPS) + ["all"], default="all")
+    parser.add_argument("--incremental", action="store_true", help="only process rows dated after the last run's watermark")
+    parser.add_argument("--streaming", action="store_true", help="push raw chunks through sentiment and analyze in one pass")
+    parser.add_argument("--no-persist", action="store_true", help="with --streaming, do not write SENTIMENT_DATA")
+    parser.add_argument("--shards", type=int, default=0, metavar="N",
+                        help="run sentiment and analyze as N whole-day shards of RAW_DATA in SHARD_WORKERS processes, then merge them")
+    parser.add_argument("--shard", type=int, nargs="+", metavar="K",
+                        help="with --shards, only run shards K (0-based), e.g. one set per host sharing DATA_DIR; merge later with --reduce")
+    parser.add_argument("--reduce", action="store_true", help="with --shards, merge the partials of every shard into the metrics files")
+    parser.add_argument("--profile", choices=["cprofile", "tracemalloc"], default="", help="profile every step into the run report")
+    parser.add_argument("--report", type=Path, default=None, help=f"where to write the JSON run report (default {settings.RUN_REPORT})")
+    parser.add_argument("--convert-csv", nargs="?", const=settings.DATA_DIR / "sentiment_results.csv", type=Path, metavar="CSV",
+                        help="rewrite a sentiment_results.csv from an earlier version as the SENTIMENT_DATA dataset and exit")
     args = parser.parse_args()
-    s = {"download": DownloadStep(), "sentiment": SentimentStep(), "analyze": AnalyzeStep(), "visualize": VisualizeStep()}
-    try: PipelineRunner(list(s.values()) if args.step == "all" else [s[args.step]]).execute_all()
+    if args.incremental: settings.INCREMENTAL = True
+    if args.no_persist: settings.PERSIST_SENTIMENT = False
+    if args.convert_csv:
+        from spotify_sentiment.core.store import SentimentStore, convert_csv
+        rows = convert_csv(args.convert_csv, SentimentStore(settings.SENTIMENT_DATA), settings.CHUNK_SIZE)
+        logger.success(f"Converted {rows:,} rows from {args.convert_csv} into {settings.SENTIMENT_DATA}"); return
+    names = list(STEPS) if args.step == "all" else [args.step]
+    factories = dict(STEPS)
+    if args.shards:
+        # One sharded step stands in for sentiment and analyze.
+        from spotify_sentiment.pipeline.steps_sharded import ShardedStep
+        names = list(dict.fromkeys("sentiment" if name == "analyze" else name for name in names))
+        only = args.shard if args.shard is not None else [] if args.reduce else None
+        factories["sentiment"] = lambda: ShardedStep(args.shards, only, reduce=args.reduce or args.shard is None)
+    elif args.shard is not None or args.reduce: parser.error("--shard and --reduce need --shards")
+    steps = [factories[name]() for name in names]
+    try: PipelineRunner(steps, streaming=args.streaming, profile=args.profile, report=args.report).execute_all()
     except Exception as e: logger.critical(e); sys.exit(1)
 if __name__ == "__main__": main()
@@ -0,0 +1,32 @@
+import pandas as pd
+import pytest
+from spotify_sentiment.core.config import settings
+from spotify_sentiment.core.store import SentimentStore
+
+@pytest.fixture
+def make_raw():
+    """Builds `days` days of 30 raw chart rows, every fourth one about each topic."""
+    def make(days):
+        rows = []
+        for d in range(days):
+            for rank in range(1, 31):
+                topic = ["the economy and inflation", "new ai startup founder", "climate carbon talk", "great music"][(d + rank) % 4]
+                rows.append({"date": f"2024-01-{d + 1:02d}", "rank": rank, "showUri": f"show:{rank % 7}",
+                             "episodeName": f"Episode {rank}", "description": f"A {'great' if rank % 2 else 'awful'} {topic} day {d}"})
+        return pd.DataFrame(rows)
+    return make
+
+@pytest.fixture
+def scored():
+    """Reads back the scored rows in SENTIMENT_DATA."""
+    return lambda: SentimentStore(settings.SENTIMENT_DATA).dataset().to_table().to_pandas()
+
+@pytest.fixture
+def use_dir(tmp_path, monkeypatch):
+    """Points every pipeline output at files in tmp_path prefixed with `name`."""
+    def use(name):
+        for key, file in [("SENTIMENT_DATA", "sentiment"), ("TOPIC_METRICS", "topic.csv"), ("WORD_METRICS", "word.csv"),
+                          ("MANIFEST", "manifest.json"), ("SENTIMENT_CACHE", "cache.sqlite"), ("RUN_REPORT", "run_report.json"),
+                          ("SHOW_SKETCHES", "sketches.npz")]:
+            monkeypatch.setattr(settings, key, tmp_path / f"{name}_{file}")
+    return use
@@ -0,0 +1,67 @@
+import pytest
+import numpy as np
+import pandas as pd
+from spotify_sentiment.core.aggregation import MetricsAccumulator
+
+TOPICS, WORDS = ["Climate", "Economy", "Startup"], ["carbon", "founder", "inflation", "markets"]
+
+def _chunks(n_chunks, rows, seed=0):
+    rng = np.random.default_rng(seed)
+    for _ in range(n_chunks):
+        chunk = pd.DataFrame({
+            "date": pd.to_datetime(rng.choice(["2024-01-01", "2024-01-02", "2024-01-03", None], rows, p=[.3, .3, .3, .1])),
+            "rank": np.where(rng.random(rows) < .05, np.nan, rng.integers(1, 200, rows)),
+            "sentiment_score": np.where(rng.random(rows) < .05, np.nan, rng.random(rows)),
+            "showUri": rng.choice([f"spotify:show:{i}" for i in range(15)] + [None], rows),
+        })
+        n = rows * 2
+        yield chunk, rng.integers(0, rows, n).astype(np.int32), rng.integers(0, len(TOPICS), n).astype(np.int32), rng.integers(0, len(WORDS), n).astype(np.int32)
+
+def _reference(chunks):
+    """The concat / drop_duplicates / groupby pipeline MetricsAccumulator replaces."""
+    matched, date_max = [], []
+    for chunk, rows, topics, words in chunks:
+        date_max.append(chunk.groupby("date")["rank"].max())
+        m = chunk.iloc[rows].reset_index(drop=True)
+        m["topic"] = pd.Categorical.from_codes(topics, categories=TOPICS)
+        m["matched_word"] = pd.Categorical.from_codes(words, categories=WORDS)
+        matched.append(m)
+    df = pd.concat(matched, ignore_index=True)
+    df["popularity"] = (df["date"].map(pd.concat(date_max).groupby(level=0).max()) + 1) - df["rank"]
+    agg = {"sentiment_score": "mean", "popularity": "mean", "showUri": "count"}
+    names = {"sentiment_score": "avg_sentiment", "popularity": "avg_popularity", "showUri": "sample_size"}
+    topic = df.drop_duplicates(subset=["showUri", "topic", "date"]).groupby(["topic", "date"], observed=True).agg(agg)
+    word = df.drop_duplicates(subset=["showUri", "topic", "matched_word", "date"]).groupby(["topic", "matched_word", "date"], observed=True).agg(agg)
+    return topic.rename(columns=names).reset_index(), word.rename(columns=names).reset_index()
+
+def test_accumulated_metrics_are_bit_identical_to_groupby():
+    acc = MetricsAccumulator(TOPICS, WORDS)
+    for chunk, rows, topics, words in _chunks(12, 300):
+        encoded = acc.encode(chunk)
+        acc.observe(encoded)
+        acc.add(encoded.take(rows), topics, words)
+    topic, word = _reference(_chunks(12, 300))
+    for got, want in ((acc.topic_metrics(), topic), (acc.word_metrics(), word)):
+        assert got.to_csv(index=False) == want.to_csv(index=False)
+
+def _daily(days, rows=200, seed=1):
+    rng = np.random.default_rng(seed)
+    for d in range(days):
+        chunk = pd.DataFrame({"date": pd.Timestamp("2024-01-01") + pd.Timedelta(days=d), "rank": rng.integers(1, 200, rows),
+                              "sentiment_score": rng.random(rows), "showUri": rng.choice([f"s{i}" for i in range(50)], rows)})
+        yield chunk, np.arange(rows, dtype=np.int32), rng.integers(0, len(TOPICS), rows).astype(np.int32), rng.integers(0, len(WORDS), rows).astype(np.int32)
+
+def test_sealing_finished_days_frees_dedup_keys_without_changing_results():
+    sealed, plain = MetricsAccumulator(TOPICS, WORDS), MetricsAccumulator(TOPICS, WORDS)
+    peak = 0
+    for chunk, rows, topics, words in _daily(30):
+        for acc in (sealed, plain):
+            encoded = acc.encode(chunk)
+            acc.observe(encoded)
+            acc.add(encoded.take(rows), topics, words)
+        sealed.seal(chunk["date"].max())
+        peak = max(peak, sealed.word.n_seen)
+    assert peak < plain.word.n_seen / 10
+    assert sealed.word_metrics().to_csv(index=False) == plain.word_metrics().to_csv(index=False)
+    with pytest.raises(ValueError):
+        sealed.add(sealed.encode(chunk.iloc[rows].assign(date=pd.Timestamp("2024-01-02"))), topics, words)
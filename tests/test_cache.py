@@ -0,0 +1,61 @@
+import random
+import numpy as np
+import pyarrow as pa
+import fast_scanner
+from spotify_sentiment.core.cache import LRUCache, ScanMemo, SentimentCache
+
+def test_lru_evicts_least_recently_used():
+    lru = LRUCache(2)
+    lru["a"], lru["b"] = 1, 2
+    assert lru.get("a") == 1
+    lru["c"] = 3
+    assert "b" not in lru and "a" in lru and "c" in lru
+    assert len(lru) == 2
+
+def test_sentiment_cache_persists_between_runs(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    with SentimentCache(path, "v1", memory_items=1, max_rows=100) as cache:
+        assert cache.lookup(["good show", "bad show"]) == {}
+        cache.update({"good show": 0.9, "bad show": 0.1})
+        assert cache.misses == 2
+
+    with SentimentCache(path, "v1", memory_items=1, max_rows=100) as cache:
+        assert cache.lookup(["good show", "bad show", "new show"]) == {"good show": 0.9, "bad show": 0.1}
+        assert (cache.hits, cache.misses) == (2, 1)
+
+    with SentimentCache(path, "v2", memory_items=10, max_rows=100) as cache:
+        assert cache.lookup(["good show"]) == {}
+
+def test_sentiment_cache_evicts_oldest_rows_on_disk(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    with SentimentCache(path, "v1", memory_items=10, max_rows=2) as cache:
+        cache._run = 1
+        cache.update({"old": 0.1})
+        cache._run = 2
+        cache.update({"newer": 0.2, "newest": 0.3})
+    with SentimentCache(path, "v1", memory_items=10, max_rows=2) as cache:
+        assert cache.lookup(["old", "newer", "newest"]) == {"newer": 0.2, "newest": 0.3}
+
+def test_sentiment_cache_evicts_through_the_last_used_index(tmp_path):
+    with SentimentCache(tmp_path / "cache.sqlite", "v1", memory_items=10, max_rows=2) as cache:
+        plan = cache._db.execute("EXPLAIN QUERY PLAN SELECT key FROM scores ORDER BY last_used LIMIT 1").fetchall()
+    assert any("scores_last_used" in row[-1] for row in plan)
+
+def test_scan_memo_matches_scanning_every_row():
+    rng = random.Random(3)
+    vocab = ["ai", "Machine", "learning", "economy", "rates", "interest", "show", "the", "daily", "é"]
+    scanner = fast_scanner.Scanner({"AI": ["ai", "machine learning"], "Economy": ["economy", "interest rates", "ai"]})
+    episodes = [(" ".join(rng.choices(vocab, k=3)) if rng.random() < 0.9 else None, " ".join(rng.choices(vocab, k=rng.randint(0, 12))))
+                for _ in range(40)]
+    memo = ScanMemo(scanner, maxsize=15)  # small enough to evict between chunks
+    for _ in range(6):
+        rows = [rng.choice(episodes) for _ in range(rng.randint(0, 300))]
+        columns = [pa.array([r[0] for r in rows], pa.string()), pa.array([r[1] for r in rows], pa.string())]
+        expected = scanner.scan_arrow(columns)
+        for got, want in zip(memo.scan_arrow(columns), expected):
+            assert got.dtype == want.dtype and np.array_equal(got, want)
+    assert memo.scanned < memo.rows and len(memo.memo) == 15
+
+def test_row_hash_keeps_column_boundaries():
+    a = fast_scanner.hash_arrow([pa.array(["ab", "a", None, ""]), pa.array(["c", "bc", "x", "x"])])
+    assert a.dtype == np.uint64 and len(set(a[:2].tolist())) == 2 and a[2] == a[3]
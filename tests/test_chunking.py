@@ -0,0 +1,64 @@
+import time
+import pandas as pd
+import pytest
+from spotify_sentiment.core import chunking
+from spotify_sentiment.core.chunking import AdaptiveChunker
+from spotify_sentiment.core.store import SentimentStore
+
+class _Reader:
+    def __init__(self, n): self.df, self.pos = pd.DataFrame({"x": range(n)}), 0
+    def get_chunk(self, rows):
+        if self.pos >= len(self.df): raise StopIteration
+        self.pos += rows
+        return self.df.iloc[self.pos - rows:self.pos]
+
+def _run(chunker, n, per_chunk_s, bytes_per_row=100, held=None):
+    out = []
+    def sizeof(chunk):
+        if held is not None: held[:] = [len(chunk) * bytes_per_row / 2**20]
+        return len(chunk) * bytes_per_row
+    for chunk in chunker.chunks(_Reader(n), sizeof=sizeof):
+        time.sleep(per_chunk_s)  # fixed per-chunk overhead: bigger chunks are faster until the budget caps them
+        out.append(chunk)
+    return pd.concat(out)
+
+@pytest.fixture
+def gc_passes(monkeypatch):
+    passes = []
+    monkeypatch.setattr(chunking.gc, "collect", lambda: passes.append(1))
+    return passes
+
+def test_grows_while_faster_and_stops_at_the_memory_cap(monkeypatch, gc_passes):
+    held = [0.0]
+    monkeypatch.setattr(chunking, "rss_mb", lambda: 100.0 + held[0])
+    # Besides the chunk, the process holds 100 MB; 50 MB of headroom at 100 B/row x 3 working copies caps chunks at ~175k rows.
+    chunker = AdaptiveChunker("test", 10_000, budget_mb=150, max_rows=10**6)
+    assert _run(chunker, 2_000_000, 0.02, held=held)["x"].tolist() == list(range(2_000_000))
+    assert chunker.sizes[:4] == [10_000, 20_000, 40_000, 80_000] and chunker.rows == chunker.sizes[-1]
+    assert 150_000 < chunker.rows < 180_000 and chunker.settled
+    assert not gc_passes
+
+def test_shrinks_and_collects_when_memory_gets_close_to_the_budget(monkeypatch, gc_passes):
+    rss = iter([100.0] * 3 + [950.0] * 100)
+    monkeypatch.setattr(chunking, "rss_mb", lambda: next(rss))
+    chunker = AdaptiveChunker("test", 50_000, budget_mb=1000, min_rows=1000)
+    _run(chunker, 400_000, 0.0, bytes_per_row=1000)
+    assert chunker.sizes[-1] < 50_000 and len(gc_passes) == chunker.collections > 0
+
+def test_zero_budget_keeps_the_size_and_collects_every_chunk(gc_passes):
+    chunker = AdaptiveChunker("test", 100, budget_mb=0)
+    _run(chunker, 1000, 0.0)
+    assert chunker.sizes == [100] and len(gc_passes) == 10
+
+def test_store_reader_hands_out_tables_of_the_requested_size(tmp_path):
+    store = SentimentStore(tmp_path / "store")
+    df = pd.DataFrame({"date": ["2024-01-01"] * 50 + ["2024-01-02"] * 50, "rank": [str(i) for i in range(100)],
+                       "sentiment_score": [i / 3 for i in range(100)]})
+    with store.writer() as out: out.write(df)
+    reader = store.reader(["rank"], batch_rows=5)
+    sizes = [reader.get_chunk(rows).num_rows for rows in (10, 30, 5)]
+    rest = []
+    while True:
+        try: rest.append(reader.get_chunk(1000).num_rows)
+        except StopIteration: break
+    assert sizes == [10, 30, 5] and rest == [55]
@@ -0,0 +1,16 @@
+import os
+import subprocess
+import sys
+
+def _modules_after(code: str) -> set:
+    probe = f"import sys\n{code}\nprint(' '.join(m for m in ('gensim', 'nltk', 'plotly', 'pandas') if m in sys.modules))"
+    return set(subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True,
+                          env=dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))).stdout.split())
+
+def test_cli_builds_only_the_requested_step_and_imports_lazily():
+    cli = "from spotify_sentiment.presentation.cli import STEPS"
+    assert _modules_after(cli) == set()
+    assert _modules_after(f"{cli}\nSTEPS['download']()") == set()
+    assert _modules_after(f"{cli}\nSTEPS['visualize']()") == {"pandas"}
+    assert _modules_after(f"{cli}\nSTEPS['analyze']()") == {"pandas"}
+    assert _modules_after(f"{cli}\nSTEPS['sentiment']()") == {"pandas"}
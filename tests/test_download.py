@@ -0,0 +1,73 @@
+import sys
+import zipfile
+from types import SimpleNamespace
+import pandas as pd
+import pytest
+from spotify_sentiment.core.config import settings
+from spotify_sentiment.core.raw import sha256_file
+from spotify_sentiment.pipeline.runner import PipelineRunner
+from spotify_sentiment.pipeline.steps_download import DownloadStep
+from spotify_sentiment.pipeline.steps_sentiment import SentimentStep
+from spotify_sentiment.pipeline.steps_analyze import AnalyzeStep
+from spotify_sentiment.pipeline.steps_sharded import ShardedStep
+
+def _archive(path, raw):
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf: zf.writestr(settings.RAW_MEMBER, raw.to_csv(index=False))
+    return path
+
+def _metrics():
+    return pd.read_csv(settings.TOPIC_METRICS), pd.read_csv(settings.WORD_METRICS)
+
+def test_archived_csv_streams_like_the_extracted_one(tmp_path, monkeypatch, make_raw, scored, use_dir):
+    monkeypatch.setattr(settings, "USE_EXACT_MATCH_ONLY", True)
+    monkeypatch.setattr(settings, "CHUNK_SIZE", 50)
+    monkeypatch.setattr(settings, "RAW_DATA", tmp_path / "raw.csv")
+    make_raw(10).to_csv(settings.RAW_DATA, index=False)
+    use_dir("csv")
+    PipelineRunner([SentimentStep(), AnalyzeStep()]).execute_all()
+    expected, expected_scored = _metrics(), scored()
+
+    monkeypatch.setattr(settings, "RAW_DATA", tmp_path / "extracted.csv")
+    monkeypatch.setattr(settings, "RAW_ARCHIVE", _archive(tmp_path / "raw.zip", make_raw(10)))
+    use_dir("zip")
+    PipelineRunner([SentimentStep(), AnalyzeStep()], streaming=True).execute_all()
+    for got, want in zip(_metrics(), expected): pd.testing.assert_frame_equal(got, want)
+    pd.testing.assert_frame_equal(scored(), expected_scored)
+    assert not settings.RAW_DATA.exists()
+
+    # The archive holds the same bytes as the file, so an incremental run can go on from either.
+    monkeypatch.setattr(settings, "INCREMENTAL", True)
+    use_dir("inc")
+    monkeypatch.setattr(settings, "RAW_DATA", tmp_path / "inc.csv")
+    make_raw(7).to_csv(settings.RAW_DATA, index=False)
+    PipelineRunner([SentimentStep(), AnalyzeStep()]).execute_all()
+    settings.RAW_DATA.unlink()
+    PipelineRunner([SentimentStep(), AnalyzeStep()]).execute_all()
+    for got, want in zip(_metrics(), expected): pd.testing.assert_frame_equal(got, want)
+
+    # Shards seek into the CSV, so a sharded run extracts it first.
+    monkeypatch.setattr(settings, "INCREMENTAL", False)
+    use_dir("sharded")
+    monkeypatch.setattr(settings, "SHARD_DIR", tmp_path / "shards")
+    PipelineRunner([ShardedStep(3)]).execute_all()
+    for got, want in zip(_metrics(), expected): pd.testing.assert_frame_equal(got, want)
+    assert settings.RAW_DATA.read_bytes() == make_raw(10).to_csv(index=False).encode()
+
+def test_download_keeps_the_archive_and_checks_its_digest(tmp_path, monkeypatch, make_raw):
+    built = _archive(tmp_path / "built.zip", make_raw(2))
+    def download(dataset, path, unzip):
+        assert not unzip
+        (path / f"{dataset.split('/')[-1]}.zip").write_bytes(built.read_bytes())
+    monkeypatch.setitem(sys.modules, "kaggle", SimpleNamespace(api=SimpleNamespace(authenticate=lambda: None, dataset_download_files=download)))
+    monkeypatch.setattr(settings, "DATA_DIR", tmp_path / "data")
+    monkeypatch.setattr(settings, "RAW_DATA", tmp_path / "data" / "raw.csv")
+    monkeypatch.setattr(settings, "RAW_ARCHIVE", tmp_path / "data" / "raw.zip")
+
+    monkeypatch.setattr(settings, "RAW_ARCHIVE_SHA256", "0" * 64)
+    with pytest.raises(ValueError, match="SHA-256"): DownloadStep().execute()
+    assert not settings.RAW_ARCHIVE.exists()
+
+    monkeypatch.setattr(settings, "RAW_ARCHIVE_SHA256", sha256_file(built))
+    DownloadStep().execute()
+    assert settings.RAW_ARCHIVE.read_bytes() == built.read_bytes() and not settings.RAW_DATA.exists()
+    DownloadStep().execute()  # found, and checked again
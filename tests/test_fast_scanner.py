@@ -17,3 +17,137 @@ def test_scan_chunks_boundaries():
     results = fast_scanner.scan_chunks(texts, topic_words)
     assert len(results) == 1
     assert (2, "AI", "ai") in results
+
+def test_scan_chunks_matches_ngram_reference():
+    import random
+    rng = random.Random(7)
+    vocab = ["ai", "machine", "learning", "deep", "net", "a1", "x", "economy", "rates", "interest"]
+    topic_words = {
+        "AI": ["ai", "machine learning", "deep learning", "machine", "a1 x"],
+        "Economy": ["economy", "interest rates", "ai", "rates"],
+        "Broken": ["", "machine  learning", " net", "net-x", "deep learning machine"],
+    }
+    seps = [" ", "  ", ", ", "-", "\n", "é", "!"]
+    texts = ["".join(rng.choice(vocab) + rng.choice(seps) for _ in range(rng.randint(0, 25))) for _ in range(500)]
+    assert fast_scanner.scan_chunks(texts, topic_words) == fast_scanner._scan_chunks_ngram(texts, topic_words)
+
+def test_scanner_returns_int32_arrays_and_sorted_ids():
+    import numpy as np
+    scanner = fast_scanner.Scanner({"Economy": ["economy", "ai"], "AI": ["machine learning", "ai"]})
+    assert scanner.topics == ["AI", "Economy"]
+    assert scanner.words == ["ai", "economy", "machine learning"]
+
+    rows, topic_ids, word_ids = scanner.scan(["i love machine learning", "ai and the economy", "random text"])
+    for arr in (rows, topic_ids, word_ids):
+        assert arr.dtype == np.int32 and arr.flags["C_CONTIGUOUS"]
+    matches = [(r, scanner.topics[t], scanner.words[w]) for r, t, w in zip(rows, topic_ids, word_ids)]
+    assert matches == [(0, "AI", "machine learning"), (1, "AI", "ai"), (1, "Economy", "ai"), (1, "Economy", "economy")]
+
+
+def test_scanner_agrees_with_scan_chunks():
+    texts = ["deep learning and ai", "ailing economy", "", "machine learning machine"]
+    patterns = {"AI": ["ai", "deep learning", "machine learning"], "Economy": ["economy"]}
+    scanner = fast_scanner.Scanner(patterns)
+    rows, topic_ids, word_ids = scanner.scan(texts)
+    got = sorted((int(r), scanner.topics[t], scanner.words[w]) for r, t, w in zip(rows, topic_ids, word_ids))
+    assert got == sorted(fast_scanner.scan_chunks(texts, patterns))
+
+def test_threaded_scan_is_deterministic():
+    import numpy as np
+    texts = [f"row {i} about ai" if i % 3 else f"machine learning {i} economy" for i in range(20000)]
+    patterns = {"AI": ["ai", "machine learning"], "Economy": ["economy"]}
+    scanner = fast_scanner.Scanner(patterns)
+    serial = scanner.scan(texts)
+    for n in (2, 4, 0):
+        for a, b in zip(serial, scanner.scan(texts, n_threads=n)):
+            np.testing.assert_array_equal(a, b)
+    assert fast_scanner.scan_chunks(texts, patterns, n_threads=4) == fast_scanner.scan_chunks(texts, patterns)
+
+def _fold_corpus():
+    import random
+    rng = random.Random(3)
+    pieces = ["AI", "ai", "Machine", "LEARNING", "Keto", "ketO", "İnflation", "inflation", "économy",
+              "economy", "café", "  ", " ", "-", "’s", "\U0001f3a7", "Deep", "learning", "\u212aETO"]
+    names = [None if rng.random() < 0.1 else " ".join(rng.choice(pieces) for _ in range(rng.randint(0, 4)))
+             for _ in range(400)]
+    descs = [None if rng.random() < 0.1 else " ".join(rng.choice(pieces) for _ in range(rng.randint(0, 12)))
+             for _ in range(400)]
+    patterns = {"AI": ["ai", "machine learning", "deep learning", "s"], "Economy": ["economy", "inflation", "i"],
+                "Diet": ["keto", "nflation"]}
+    return names, descs, patterns
+
+
+def test_fold_case_matches_python_lower():
+    import numpy as np
+    names, descs, patterns = _fold_corpus()
+    scanner = fast_scanner.Scanner(patterns)
+    joined = [(n or "") + " " + (d or "") for n, d in zip(names, descs)]
+    expected = scanner.scan([t.lower() for t in joined])
+    for a, b in zip(expected, scanner.scan(joined, fold_case=True)):
+        np.testing.assert_array_equal(a, b)
+
+    data = "".join(joined).encode()
+    offsets = np.cumsum([0] + [len(t.encode()) for t in joined], dtype=np.int64)
+    for a, b in zip(expected, scanner.scan_buffers(data, offsets)):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_fold_case_follows_python_not_arrow_for_dotted_capital_i():
+    import pytest
+    pa = pytest.importorskip("pyarrow")
+    pc = pytest.importorskip("pyarrow.compute")
+    scanner = fast_scanner.Scanner({"Economy": ["inflation", "nflation", "i"]})
+    text = "İnflation talk"
+    # str.lower() gives "i" plus a combining dot, which ends the token; Arrow's utf8_lower gives a plain "i".
+    assert [scanner.words[w] for w in scanner.scan_arrow([pa.array([text])])[2]] == ["i", "nflation"]
+    assert [scanner.words[w] for w in scanner.scan([text.lower()])[2]] == ["i", "nflation"]
+    assert [scanner.words[w] for w in scanner.scan(pc.utf8_lower(pa.array([text])).to_pylist())[2]] == ["inflation"]
+
+def test_scan_arrow_joins_columns_in_place():
+    import numpy as np
+    import pytest
+    pa = pytest.importorskip("pyarrow")
+    names, descs, patterns = _fold_corpus()
+    scanner = fast_scanner.Scanner(patterns)
+    expected = scanner.scan([((n or "") + " " + (d or "")).lower() for n, d in zip(names, descs)])
+    for string_type in (pa.string(), pa.large_string()):
+        columns = [pa.array(names, type=string_type)[7:], pa.array(descs, type=string_type)[7:]]
+        got = scanner.scan_arrow(columns, n_threads=2)
+        keep = expected[0] >= 7
+        np.testing.assert_array_equal(got[0], expected[0][keep] - 7)
+        np.testing.assert_array_equal(got[1], expected[1][keep])
+        np.testing.assert_array_equal(got[2], expected[2][keep])
+    with pytest.raises(TypeError):
+        scanner.scan_arrow([pa.array([1, 2])])
+
+def test_profile_scanner_matches_a_scanner_per_profile():
+    import random
+    import numpy as np
+    rng = random.Random(11)
+    vocab = ["ai", "machine", "learning", "economy", "interest", "rates", "carbon", "x"]
+    profiles = {"base": {"AI": ["ai", "machine learning"], "Economy": ["economy", "interest rates"]},
+                "client": {"AI": ["machine", "ai"], "Climate": ["carbon", "rates"]},
+                "empty": {}}
+    texts = [" ".join(rng.choice(vocab) for _ in range(rng.randint(0, 12))) for _ in range(400)]
+    union = fast_scanner.Scanner(profiles=profiles)
+    assert union.profiles == ["base", "client", "empty"] and union.topic_profiles.tolist() == [0, 0, 1, 1]
+    rows, topic_ids, word_ids = union.scan(texts)
+    for p, name in enumerate(union.profiles):
+        own, single = union.topic_profiles[topic_ids] == p, fast_scanner.Scanner(profiles[name])
+        first = int(np.searchsorted(union.topic_profiles, p))
+        got = [(r, union.topics[t], union.words[w]) for r, t, w in zip(rows[own], topic_ids[own], word_ids[own])]
+        assert [union.topics[first + t] for t in range(len(single.topics))] == single.topics
+        assert got == [(r, single.topics[t], single.words[w]) for r, t, w in zip(*single.scan(texts))]
+
+def test_group_aggregator_dedups_on_exact_pairs():
+    import numpy as np
+    import pytest
+    agg = fast_scanner.GroupAggregator(1)
+    groups = np.array([1, 2, 1, 2, 1], dtype=np.uint64)
+    items = np.array([0, 0, 0, 7, 2**32 - 1], dtype=np.uint64)
+    agg.add(groups, items, np.arange(5.0)[:, None], np.ones(5, dtype=bool))
+    keys, sums, nobs, counts = agg.result()
+    assert keys.tolist() == [1, 2] and counts.tolist() == [2, 2] and sums[:, 0].tolist() == [4.0, 4.0]
+    assert agg.n_seen == 4
+    with pytest.raises(ValueError):
+        agg.add(groups[:1], np.array([2**32], dtype=np.uint64), np.zeros((1, 1)), np.ones(1, dtype=bool))
@@ -0,0 +1,53 @@
+import random
+import numpy as np
+import pytest
+from spotify_sentiment.pipeline.steps_sentiment import ensure_vader_lexicon, normalize_score, score_texts
+
+fast_vader = pytest.importorskip("fast_vader")
+from spotify_sentiment.core.vader import NativeVader
+
+RULE_WORDS = ["but", "BUT", "least", "at", "very", "never", "so", "this", "not", "isn't", "don't", "cannot", "nope",
+              "kind", "of", "Kind", "sort", "just", "enough", "kinda", "sort-of", "the", "shit", "bomb", "bad", "ass",
+              "yeah", "right", "cut", "mustard", "kiss", "death", "hand", "to", "mouth", "extremely", "barely",
+              "EXTREMELY", "uh-uh", "a", "I", ":)", ":-(", ":D", ":-Þ", ":-þ", "<3", "</3", "(-:"]
+NON_ASCII = ["café", "ÉTÉ", "naïve", "Straße", "İstanbul", "Kind", "ǅemal", "ＧＯＯＤ", "😀", "🔥great🔥",
+             "good’s", "“love”", "—", "niño", "ǈ", "ΣΊΣΥΦΟΣ", "Ⓐⓑ"]
+PUNCT = ["", "", "", ".", "!", "?", ",", "!!", "!!!", "??", "?!?", "...", ":", "'", '"', ")", "-", "!?!?"]
+SPACES = [" ", " ", " ", "  ", "\t", "\n", " ", " ", "\x1c", "　"]
+
+
+def _corpus(n, seed=0):
+    ensure_vader_lexicon()
+    rng = random.Random(seed)
+    lexicon = sorted(NativeVader().lexicon)
+    vocab = lexicon[::7] + RULE_WORDS * 20 + NON_ASCII * 5 + ["podcast", "episode", "show", "talk", "news"] * 40
+
+    def word():
+        w = rng.choice(vocab)
+        w = w.upper() if rng.random() < 0.1 else w.title() if rng.random() < 0.05 else w
+        return rng.choice(PUNCT) + w + rng.choice(PUNCT) if rng.random() < 0.3 else w
+
+    texts = []
+    for _ in range(n):
+        words = [word() for _ in range(rng.randint(0, 30))]
+        text = ""
+        for w in words: text += w + rng.choice(SPACES)
+        texts.append(text.strip() if rng.random() < 0.8 else text)
+    return texts
+
+
+def test_native_scores_match_nltk():
+    texts = _corpus(20000)
+    analyzer = NativeVader()
+    native = analyzer.compound(texts, n_threads=4)
+    reference = np.array([analyzer.polarity_scores(t)["compound"] for t in texts])
+    assert native.dtype == np.float64
+    np.testing.assert_allclose(native, reference, rtol=0, atol=1e-6)
+
+
+def test_native_falls_back_for_texts_it_cannot_take():
+    analyzer = NativeVader()
+    texts = ["great \ud800 show", None, "awful"]
+    scores = analyzer.compound(texts)
+    assert scores[0] == analyzer.polarity_scores(texts[0])["compound"] and scores[1] == 0.0
+    assert score_texts(analyzer, texts) == {t: normalize_score(analyzer, t) for t in texts}
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+from spotify_sentiment.core.config import settings
+from spotify_sentiment.core.sketches import ShowSketches
+from spotify_sentiment.core.store import SentimentStore
+from spotify_sentiment.pipeline.steps_sentiment import SentimentStep
+from spotify_sentiment.pipeline.steps_analyze import AnalyzeStep
+
+def _run(tmp_path, monkeypatch, name, raw, incremental):
+    monkeypatch.setattr(settings, "INCREMENTAL", incremental)
+    monkeypatch.setattr(settings, "RAW_DATA", tmp_path / f"{name}_raw.csv")
+    raw.to_csv(settings.RAW_DATA, index=False)
+    SentimentStep().execute()
+    AnalyzeStep().execute()
+    return pd.read_csv(settings.TOPIC_METRICS), pd.read_csv(settings.WORD_METRICS)
+
+def test_incremental_run_matches_full_rebuild(tmp_path, monkeypatch, make_raw, scored, use_dir):
+    monkeypatch.setattr(settings, "USE_EXACT_MATCH_ONLY", True)
+    monkeypatch.setattr(settings, "CHUNK_SIZE", 50)
+
+    use_dir("full")
+    full_topic, full_word = _run(tmp_path, monkeypatch, "full", make_raw(12), incremental=False)
+    full_sentiment = scored()
+    full_sketches = ShowSketches.load(settings.SHOW_SKETCHES)
+
+    use_dir("inc")
+    _run(tmp_path, monkeypatch, "inc", make_raw(8), incremental=True)
+    inc_topic, inc_word = _run(tmp_path, monkeypatch, "inc", make_raw(12), incremental=True)
+
+    pd.testing.assert_frame_equal(inc_topic, full_topic)
+    pd.testing.assert_frame_equal(inc_word, full_word)
+    pd.testing.assert_frame_equal(scored(), full_sentiment)
+    inc_sketches = ShowSketches.load(settings.SHOW_SKETCHES)
+    for level in ("topic", "word"):
+        for k, v in full_sketches.entries(level).items(): assert np.array_equal(inc_sketches.entries(level)[k], v), k
+
+def test_rerun_without_incremental_does_not_duplicate_rows(tmp_path, monkeypatch, make_raw, use_dir):
+    monkeypatch.setattr(settings, "USE_EXACT_MATCH_ONLY", True)
+    use_dir("rerun")
+    for _ in range(2): _run(tmp_path, monkeypatch, "rerun", make_raw(3), incremental=False)
+    assert SentimentStore(settings.SENTIMENT_DATA).num_rows() == 90
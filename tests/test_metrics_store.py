@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+from spotify_sentiment.core.metrics_store import MetricsStore
+
+def _word_metrics(seed=0):
+    rng = np.random.default_rng(seed)
+    words = [("AI", "ai"), ("AI", "algorithm"), ("Economy", "inflation"), ("Economy", "markets"), ("Startup", "ai")]
+    rows = [(t, w, d, rng.random(), rng.uniform(1, 200), int(rng.integers(1, 50)))
+            for t, w in words for d in pd.date_range("2024-01-01", "2024-03-15") if rng.random() < 0.8]
+    df = pd.DataFrame(rows, columns=["topic", "matched_word", "date", "avg_sentiment", "avg_popularity", "sample_size"])
+    return df.sample(frac=1, random_state=seed).reset_index(drop=True)  # the store must not rely on file order
+
+def _weighted(df, keys):
+    df = df.assign(s=df["avg_sentiment"] * df["sample_size"], p=df["avg_popularity"] * df["sample_size"])
+    agg = df.groupby(keys, as_index=False)[["s", "p", "sample_size"]].sum()
+    return agg.assign(avg_sentiment=agg["s"] / agg["sample_size"], avg_popularity=agg["p"] / agg["sample_size"])
+
+def test_weighted_aggregates():
+    df = pd.DataFrame({'topic': ['AI', 'AI'], 'date': ['2024-01-01', '2024-01-02'], 'avg_sentiment': [1.0, 0.0],
+                       'avg_popularity': [100, 50], 'sample_size': [90, 10]})
+    res = MetricsStore(df).query(granularity="all")
+    assert res['avg_sentiment'].iloc[0] == 0.9
+    assert res['avg_popularity'].iloc[0] == 95.0
+    assert res['sample_size'].iloc[0] == 100
+
+def test_nan_days_are_left_out_of_rollups():
+    df = pd.DataFrame({'topic': 'AI', 'date': ['2024-01-01', '2024-01-02', '2024-01-03', '2024-01-08'],
+                       'avg_sentiment': [1.0, np.nan, 0.5, np.nan], 'avg_popularity': [100, 50, np.nan, 20],
+                       'sample_size': [90, 10, 10, 5]})
+    store = MetricsStore(df)
+    week = store.query(granularity="week")
+    assert week['avg_sentiment'].iloc[0] == 0.95 and np.isnan(week['avg_sentiment'].iloc[1])
+    assert week['avg_popularity'].tolist() == [95.0, 20.0]
+    assert week['sample_size'].tolist() == [110, 5]
+    total = store.query(granularity="all")
+    assert total['avg_sentiment'].iloc[0] == 0.95 and total['avg_popularity'].iloc[0] == 9600 / 105
+
+@pytest.mark.parametrize("granularity,bucket", [("day", "D"), ("week", "W-SUN"), ("month", "M"), ("all", None)])
+@pytest.mark.parametrize("topic,word,start,end", [(None, None, None, None), ("AI", None, "2024-01-10", None),
+                                                  ("Economy", "markets", "2024-02-01", "2024-02-29"), (None, "ai", None, "2024-01-31")])
+def test_query_matches_groupby(granularity, bucket, topic, word, start, end):
+    df = _word_metrics()
+    store = MetricsStore(_weighted(df, ["topic", "date"]).drop(columns=["s", "p"]), df)
+    sel = df.assign(date=pd.to_datetime(df["date"]))
+    if granularity in ("week", "month"): sel["date"] = sel["date"].dt.to_period(bucket).dt.start_time
+    keys = ["topic", "matched_word"] + (["date"] if granularity != "all" else [])
+    if topic is not None: sel = sel[sel["topic"] == topic]
+    if word is not None: sel = sel[sel["matched_word"] == word]
+    if start is not None: sel = sel[sel["date"] >= start]
+    if end is not None: sel = sel[sel["date"] <= end]
+
+    got = store.query(topic, word, start, end, granularity, by_word=True)
+    expected = _weighted(sel, keys)[keys + ["avg_sentiment", "avg_popularity", "sample_size"]]
+    assert len(got) and list(got.columns) == list(expected.columns)
+    pd.testing.assert_frame_equal(got, expected, check_dtype=False, check_exact=False, rtol=1e-12)
+
+def test_topic_level_and_missing_keys():
+    df = _word_metrics()
+    topics = _weighted(df, ["topic", "date"]).drop(columns=["s", "p"])
+    store = MetricsStore(topics, df)
+    day = store.query()
+    expected = topics.sort_values(["topic", "date"], ignore_index=True).assign(date=lambda d: pd.to_datetime(d["date"]))
+    expected = expected[["topic", "date", "avg_sentiment", "avg_popularity", "sample_size"]]
+    pd.testing.assert_frame_equal(day, expected, check_dtype=False)  # day rows are returned as loaded
+    assert store.query("Nutrition").empty and store.query("AI", "inflation").empty
+    assert store.query("AI", start="2030-01-01", granularity="all").empty
+    with pytest.raises(ValueError): store.query(granularity="year")
@@ -16,3 +16,25 @@ def test_sentiment_normalization():
     assert pos_score > 0.5
     assert neg_score < 0.5
     assert step._normalize_score("") == 0.5
+
+def test_parallel_scoring_matches_serial(tmp_path, monkeypatch):
+    import pandas as pd
+    from spotify_sentiment.core.config import settings
+    from spotify_sentiment.core.store import SentimentStore
+    words = ["great", "awful", "not", "very", "podcast", "LOVE", "hate", "!", "but", "okay"]
+    descs = [" ".join(words[(i * j) % len(words)] for j in range(i % 9)) or None for i in range(60)]
+    raw = tmp_path / "raw.csv"
+    pd.DataFrame({"date": "2024-01-01", "rank": range(60), "description": descs}).to_csv(raw, index=False)
+
+    monkeypatch.setattr(settings, "RAW_DATA", raw)
+    monkeypatch.setattr(settings, "MANIFEST", tmp_path / "manifest.json")
+    monkeypatch.setattr(settings, "CHUNK_SIZE", 7)
+    monkeypatch.setattr(settings, "SENTIMENT_BATCH_SIZE", 3)
+    monkeypatch.setattr(settings, "SENTIMENT_INFLIGHT_CHUNKS", 3)
+    for workers in (1, 2):
+        monkeypatch.setattr(settings, "SENTIMENT_WORKERS", workers)
+        monkeypatch.setattr(settings, "SENTIMENT_DATA", tmp_path / f"out_{workers}")
+        monkeypatch.setattr(settings, "SENTIMENT_CACHE", tmp_path / f"cache_{workers}.sqlite")
+        SentimentStep().execute()
+    serial, parallel = (SentimentStore(tmp_path / f"out_{w}").dataset().to_table() for w in (1, 2))
+    assert parallel.equals(serial)
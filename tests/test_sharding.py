@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+from spotify_sentiment.core.aggregation import MetricsAccumulator
+from spotify_sentiment.core.config import settings
+from spotify_sentiment.core.shards import plan_shards
+from spotify_sentiment.pipeline.runner import PipelineRunner
+from spotify_sentiment.pipeline.steps_sentiment import SentimentStep
+from spotify_sentiment.pipeline.steps_analyze import AnalyzeStep, profile_path
+from spotify_sentiment.pipeline.steps_sharded import ShardedStep
+
+def test_shards_hold_whole_days_and_cover_the_file(tmp_path, make_raw):
+    raw = make_raw(9)
+    # A quoted line break that looks like the start of a row of another day.
+    raw.loc[95, "description"] = "part one\n2024-01-09,not,a,row"
+    path = tmp_path / "raw.csv"
+    raw.to_csv(path, index=False)
+    for n in (1, 2, 4, 20):
+        shards = plan_shards(path, n)
+        parts = [pd.read_csv(s.open(), dtype=str) for s in shards]
+        pd.testing.assert_frame_equal(pd.concat(parts, ignore_index=True), pd.read_csv(path, dtype=str))
+        days = [set(p["date"]) for p in parts]
+        assert sum(map(len, days)) == 9 and len(shards) == min(n, 9)
+
+@pytest.mark.parametrize("shards, workers", [(1, 1), (3, 1), (4, 2)])
+def test_sharded_run_matches_single_run(tmp_path, monkeypatch, shards, workers, make_raw, use_dir):
+    monkeypatch.setattr(settings, "USE_EXACT_MATCH_ONLY", True)
+    monkeypatch.setattr(settings, "SHARD_WORKERS", workers)
+    monkeypatch.setattr(settings, "RAW_DATA", tmp_path / "raw.csv")
+    raw = make_raw(7)
+    raw = raw[raw["rank"] <= np.where(raw["date"] < "2024-01-04", 30, 12)]  # days differ in depth, so popularity does
+    raw.to_csv(settings.RAW_DATA, index=False)
+
+    use_dir("single")
+    PipelineRunner([SentimentStep(), AnalyzeStep()]).execute_all()
+    expected = settings.TOPIC_METRICS.read_bytes(), settings.WORD_METRICS.read_bytes()
+
+    use_dir("sharded")
+    monkeypatch.setattr(settings, "SHARD_DIR", tmp_path / "shards")
+    PipelineRunner([ShardedStep(shards)]).execute_all()
+    assert (settings.TOPIC_METRICS.read_bytes(), settings.WORD_METRICS.read_bytes()) == expected
+    assert len(list(settings.SHARD_DIR.glob("*.npz"))) == shards
+
+def test_partials_sharing_a_date_are_not_merged(tmp_path):
+    chunk = pd.DataFrame({"date": pd.to_datetime(["2024-01-01"] * 3), "rank": [1.0, 2.0, 3.0],
+                          "sentiment_score": [0.1, 0.2, 0.3], "showUri": ["a", "b", "c"]})
+    for i in range(2):
+        acc = MetricsAccumulator(["t"], ["w"])
+        rows = acc.encode(chunk)
+        acc.observe(rows)
+        acc.add(rows, np.zeros(3, np.int32), np.zeros(3, np.int32))
+        acc.save(tmp_path / f"{i}.npz")
+    pd.testing.assert_frame_equal(MetricsAccumulator.merge([tmp_path / "0.npz"]).word_metrics(), acc.word_metrics())
+    with pytest.raises(ValueError, match="share"):
+        MetricsAccumulator.merge([tmp_path / "0.npz", tmp_path / "1.npz"])
+
+def test_profiles_scanned_together_match_a_run_per_profile(tmp_path, monkeypatch, make_raw, use_dir):
+    monkeypatch.setattr(settings, "USE_EXACT_MATCH_ONLY", True)
+    monkeypatch.setattr(settings, "RAW_DATA", tmp_path / "raw.csv")
+    make_raw(5).to_csv(settings.RAW_DATA, index=False)
+    client = {"Economy": ["inflation", "founder"], "Tech": ["ai", "startup", "carbon"]}
+    outputs = lambda name: [pd.read_csv(profile_path(p, name)) for p in (settings.TOPIC_METRICS, settings.WORD_METRICS)]
+
+    expected = {}
+    for name, definitions in [("", settings.TOPIC_DEFINITIONS), ("client", client)]:
+        use_dir(f"alone_{name}")
+        with monkeypatch.context() as m:
+            m.setattr(settings, "TOPIC_DEFINITIONS", definitions)
+            PipelineRunner([SentimentStep(), AnalyzeStep()]).execute_all()
+        expected[name] = outputs("")
+
+    monkeypatch.setattr(settings, "TOPIC_PROFILES", {"client": client})
+    monkeypatch.setattr(settings, "SHARD_DIR", tmp_path / "shards")
+    for run, steps in [("together", [SentimentStep(), AnalyzeStep()]), ("sharded", [ShardedStep(2)])]:
+        use_dir(run)
+        PipelineRunner(steps).execute_all()
+        for name, frames in expected.items():
+            for got, want in zip(outputs(name), frames): pd.testing.assert_frame_equal(got, want)
+        assert profile_path(settings.SHOW_SKETCHES, "client").exists()
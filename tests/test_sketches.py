@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+from spotify_sentiment.core.config import settings
+from spotify_sentiment.core.sketches import ShowSketches, estimate, show_hashes
+from spotify_sentiment.pipeline.runner import PipelineRunner
+from spotify_sentiment.pipeline.steps_sentiment import SentimentStep
+from spotify_sentiment.pipeline.steps_analyze import AnalyzeStep
+from spotify_sentiment.pipeline.steps_sharded import ShardedStep
+
+def _matches(seed=0, n=200_000, days=30, shows=60_000):
+    """Synthetic matches: topic 0 draws from every show, topic 1 (keywords 1 and 2) from a tenth of them."""
+    rng = np.random.default_rng(seed)
+    topic = rng.integers(0, 2, n).astype(np.int32)
+    word = np.where(topic == 0, 0, rng.integers(1, 3, n)).astype(np.int32)
+    show = np.where(topic == 0, rng.integers(0, shows, n), rng.integers(0, shows // 10, n))
+    day = rng.integers(19_000, 19_000 + days, n).astype(np.int32)
+    return topic, word, day, np.array([f"spotify:show:{s}" for s in show], dtype=object)
+
+@pytest.mark.parametrize("precision", [10, 14])
+def test_window_estimates_stay_within_the_error_bound(precision):
+    topic, word, day, show = _matches()
+    sketches = ShowSketches(["a", "b"], ["w0", "w1", "w2"], precision)
+    for level in ("topic", "word"): sketches.add(level, topic, word, day, show_hashes(show))
+    bound = 3 * 1.04 / np.sqrt(2 ** precision)
+    dates = pd.to_datetime(day.astype("datetime64[D]"))
+    for t, w in [(0, None), (1, None), (1, 1), (1, 2)]:
+        for start, end in [(0, 29), (0, 0), (5, 11), (20, 40)]:
+            lo, hi = pd.Timestamp(np.datetime64(19_000 + start, "D")), pd.Timestamp(np.datetime64(19_000 + end, "D"))
+            keep = (topic == t) & (dates >= lo) & (dates <= hi) & ((word == w) if w is not None else True)
+            exact = len(set(show[keep]))
+            assert abs(sketches.distinct("ab"[t], None if w is None else f"w{w}", lo, hi) - exact) <= bound * exact
+    assert sketches.distinct("a", start="2030-01-01") == 0 and sketches.distinct("missing") == 0
+
+def test_sketches_merge_and_round_trip(tmp_path):
+    topic, word, day, show = _matches(n=50_000)
+    whole, halves = ShowSketches(["a", "b"], ["w0", "w1", "w2"], 12), [ShowSketches(["b", "a"], ["w2", "w1", "w0"], 12) for _ in range(2)]
+    whole.add("word", topic, word, day, show_hashes(show))
+    for k, part in enumerate(halves):
+        keep = np.arange(len(show)) % 2 == k
+        part.add("word", 1 - topic[keep], 2 - word[keep], day[keep], show_hashes(show[keep]))
+    merged = ShowSketches(["a", "b"], ["w0", "w1", "w2"], 12)
+    for part in halves: merged.update(part)
+    merged.save(tmp_path / "sketches.npz")
+    loaded = ShowSketches.load(tmp_path / "sketches.npz")
+    for args in [("b", "w1"), ("b", "w2", "2022-01-05", "2022-01-20"), ("a", "w0", None, "2022-01-03")]:
+        assert np.array_equal(loaded.registers(*args), whole.registers(*args))
+    assert estimate(np.zeros(16, np.uint8)) == 0
+
+def test_analyze_writes_sketches_for_single_and_sharded_runs(tmp_path, monkeypatch, make_raw, use_dir):
+    monkeypatch.setattr(settings, "USE_EXACT_MATCH_ONLY", True)
+    monkeypatch.setattr(settings, "RAW_DATA", tmp_path / "raw.csv")
+    make_raw(6).to_csv(settings.RAW_DATA, index=False)
+
+    use_dir("single")
+    PipelineRunner([SentimentStep(), AnalyzeStep()]).execute_all()
+    single = ShowSketches.load(settings.SHOW_SKETCHES)
+    words = pd.read_csv(settings.WORD_METRICS)
+    for (topic, word, date), n in words.groupby(["topic", "matched_word", "date"])["sample_size"].sum().items():
+        assert round(single.distinct(topic, word, date, date)) == n  # small counts are exact under linear counting
+
+    use_dir("sharded")
+    monkeypatch.setattr(settings, "SHARD_DIR", tmp_path / "shards")
+    PipelineRunner([ShardedStep(3)]).execute_all()
+    sharded = ShowSketches.load(settings.SHOW_SKETCHES)
+    for topic in words["topic"].unique():
+        assert np.array_equal(sharded.registers(topic), single.registers(topic))
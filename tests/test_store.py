@@ -0,0 +1,44 @@
+import pandas as pd
+from spotify_sentiment.core.store import SentimentStore, convert_csv
+
+def _rows(n, days):
+    return pd.DataFrame({"date": [f"2024-01-{1 + i % days:02d}" if i % 11 != 10 else "not a date" for i in range(n)],
+                         "rank": [str(i) for i in range(n)],
+                         "description": [f"text {i}" if i % 5 else None for i in range(n)],
+                         "sentiment_score": [i / 7 for i in range(n)]})
+
+def _write(store, df, chunk):
+    with store.writer() as out:
+        for i in range(0, len(df), chunk): out.write(df.iloc[i:i + chunk].reset_index(drop=True))
+
+def test_rows_of_a_day_come_back_in_write_order(tmp_path):
+    df, store = _rows(100, 4), SentimentStore(tmp_path / "store")
+    _write(store, df, 13)
+    assert store.num_rows() == 100
+    back = pd.concat(t.to_pandas() for t in store.read(list(df.columns), rows=9))
+    assert len(back) == 100
+    for _, day in df.groupby("date"):
+        pd.testing.assert_frame_equal(back[back["date"] == day["date"].iloc[0]].reset_index(drop=True), day.reset_index(drop=True))
+
+def test_date_filter_skips_earlier_days_and_undated_rows(tmp_path):
+    df, store = _rows(100, 4), SentimentStore(tmp_path / "store")
+    _write(store, df, 30)
+    later = df[df["date"].isin(["2024-01-03", "2024-01-04"])]
+    assert store.num_rows(after="2024-01-02") == len(later)
+    back = pd.concat(t.to_pandas() for t in store.read(["rank"], after="2024-01-02"))
+    assert sorted(back["rank"]) == sorted(later["rank"])
+
+def test_appending_continues_the_store(tmp_path):
+    df, store = _rows(60, 3), SentimentStore(tmp_path / "store")
+    _write(store, df, 25)
+    _write(store, df.assign(date="2024-02-01"), 25)
+    assert store.num_rows() == 120
+    assert store.num_rows(after="2024-01-31") == 60
+
+def test_convert_csv_round_trips_scores(tmp_path):
+    df = _rows(50, 3)
+    df.to_csv(tmp_path / "sentiment_results.csv", index=False)
+    store = SentimentStore(tmp_path / "store")
+    assert convert_csv(tmp_path / "sentiment_results.csv", store, chunk_size=20) == 50
+    back = store.dataset().to_table(columns=["rank", "sentiment_score"]).to_pandas().sort_values("rank", key=lambda r: r.astype(int))
+    assert back["sentiment_score"].tolist() == df["sentiment_score"].tolist()
@@ -0,0 +1,54 @@
+import pandas as pd
+from spotify_sentiment.core.config import settings
+from spotify_sentiment.core.store import SentimentStore
+from spotify_sentiment.pipeline.runner import FusedStep, PipelineRunner
+from spotify_sentiment.pipeline.steps_download import DownloadStep
+from spotify_sentiment.pipeline.steps_sentiment import SentimentStep
+from spotify_sentiment.pipeline.steps_analyze import AnalyzeStep
+from spotify_sentiment.pipeline.steps_visualize import VisualizeStep
+
+def _outputs():
+    store = SentimentStore(settings.SENTIMENT_DATA)
+    scored = store.dataset().to_table().to_pandas() if store.exists() else None
+    return pd.read_csv(settings.TOPIC_METRICS), pd.read_csv(settings.WORD_METRICS), scored
+
+def _run(tmp_path, monkeypatch, name, raw, streaming, incremental=False):
+    monkeypatch.setattr(settings, "INCREMENTAL", incremental)
+    monkeypatch.setattr(settings, "RAW_DATA", tmp_path / f"{name}_raw.csv")
+    raw.to_csv(settings.RAW_DATA, index=False)
+    PipelineRunner([SentimentStep(), AnalyzeStep()], streaming=streaming).execute_all()
+    return _outputs()
+
+def test_only_consecutive_streaming_steps_are_fused(monkeypatch):
+    monkeypatch.setattr(settings, "USE_EXACT_MATCH_ONLY", True)
+    steps = PipelineRunner([DownloadStep(), SentimentStep(), AnalyzeStep(), VisualizeStep()], streaming=True).steps
+    assert [type(s) for s in steps] == [DownloadStep, FusedStep, VisualizeStep]
+    assert [type(s) for s in steps[1].steps] == [SentimentStep, AnalyzeStep]
+
+def test_streamed_run_matches_step_by_step_run(tmp_path, monkeypatch, make_raw, use_dir):
+    monkeypatch.setattr(settings, "USE_EXACT_MATCH_ONLY", True)
+    monkeypatch.setattr(settings, "CHUNK_SIZE", 70)
+    use_dir("steps")
+    expected = _run(tmp_path, monkeypatch, "steps", make_raw(6), streaming=False)
+
+    use_dir("fused")
+    for got, want in zip(_run(tmp_path, monkeypatch, "fused", make_raw(6), streaming=True), expected):
+        pd.testing.assert_frame_equal(got, want)
+
+    use_dir("transient")
+    monkeypatch.setattr(settings, "PERSIST_SENTIMENT", False)
+    topic, word, scored = _run(tmp_path, monkeypatch, "transient", make_raw(6), streaming=True)
+    pd.testing.assert_frame_equal(topic, expected[0])
+    pd.testing.assert_frame_equal(word, expected[1])
+    assert scored is None
+
+def test_incremental_streamed_run_matches_full_rebuild(tmp_path, monkeypatch, make_raw, use_dir):
+    monkeypatch.setattr(settings, "USE_EXACT_MATCH_ONLY", True)
+    monkeypatch.setattr(settings, "CHUNK_SIZE", 50)
+    use_dir("full")
+    expected = _run(tmp_path, monkeypatch, "full", make_raw(10), streaming=False)
+
+    use_dir("inc")
+    _run(tmp_path, monkeypatch, "inc", make_raw(7), streaming=False, incremental=True)
+    for got, want in zip(_run(tmp_path, monkeypatch, "inc", make_raw(10), streaming=True, incremental=True), expected):
+        pd.testing.assert_frame_equal(got, want)
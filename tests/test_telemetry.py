@@ -0,0 +1,49 @@
+import json
+import time
+import pytest
+from spotify_sentiment.core.telemetry import StepTelemetry
+from spotify_sentiment.pipeline.base import PipelineStep
+from spotify_sentiment.pipeline.runner import PipelineRunner
+
+def test_fused_steps_are_only_charged_their_own_time():
+    up, down = StepTelemetry("up"), StepTelemetry("down")
+    def upstream():
+        for i in up.each_chunk(range(3), span="read"):
+            with up.span("score"):
+                with up.span("lookup"): time.sleep(0.01)
+                time.sleep(0.02)
+            up.end_chunk(10)
+            yield i
+    for _ in down.each_chunk(upstream(), span="read"):
+        with down.span("scan"): time.sleep(0.01)
+        down.end_chunk(10, 2)
+
+    assert [c["rows_in"] for c in up.chunks] == [10] * 3 and down.rows_out == 6
+    assert all(c["wall_s"] >= 0.03 for c in up.chunks)
+    assert 0.06 <= up.spans["score"]["wall_s"] < 0.085 and up.spans["lookup"]["count"] == 3
+    # The downstream read span waited on upstream chunks, which are not its own time.
+    assert down.spans["read"]["wall_s"] < 0.02 and all(0.01 <= c["wall_s"] < 0.02 for c in down.chunks)
+
+class _Step(PipelineStep):
+    def __init__(self, name, fail=False): self.name, self.fail = name, fail
+    @property
+    def step_name(self): return self.name
+    def execute(self):
+        for n in self.telemetry.each_chunk([4, 5]):
+            with self.telemetry.span("work"): data = [0] * 100000 * n
+            self.telemetry.end_chunk(n)
+        if self.fail: raise RuntimeError("boom")
+
+@pytest.mark.parametrize("profile", ["", "cprofile", "tracemalloc"])
+def test_runner_writes_a_report_even_when_a_step_fails(tmp_path, profile):
+    report = tmp_path / "run_report.json"
+    with pytest.raises(RuntimeError):
+        PipelineRunner([_Step("first"), _Step("second", fail=True), _Step("never")], profile=profile, report=report).execute_all()
+    steps = json.loads(report.read_text())["steps"]
+    assert [(s["step"], s["status"], s["rows_in"]) for s in steps] == [("first", "ok", 9), ("second", "failed", 9)]
+    assert steps[1]["error"] == "RuntimeError: boom" and steps[0]["spans"]["work"]["count"] == 2
+    assert steps[0]["peak_rss_mb"] >= steps[0]["rss_end_mb"] > 0
+    if profile == "cprofile":
+        assert any("execute" in f["function"] for f in steps[0]["cprofile"]["top"])
+        assert (tmp_path / "run_report.first.prof").exists()
+    if profile == "tracemalloc": assert steps[0]["tracemalloc"]["peak_mb"] > 3
@@ -1,15 +1,51 @@
+import base64
+import json
+import re
+import numpy as np
 import pandas as pd
+from spotify_sentiment.core.config import settings
+from spotify_sentiment.core.figures import render_all
+from spotify_sentiment.core.metrics_store import MetricsStore
 from spotify_sentiment.pipeline.steps_visualize import VisualizeStep
 
-def test_weighted_aggregates():
+def _metrics(topics):
+    dates = pd.date_range("2024-01-01", periods=3)
+    rows = [(t, f"{t.lower()}{k}", d, 0.1 * k, 10.0 + k, k + 1) for t in topics for k in range(3) for d in dates]
+    df_w = pd.DataFrame(rows, columns=["topic", "matched_word", "date", "avg_sentiment", "avg_popularity", "sample_size"])
+    df_t = df_w.groupby(["topic", "date"], as_index=False)[["avg_sentiment", "avg_popularity", "sample_size"]].mean()
+    return df_t, df_w
+
+def test_only_stale_figures_are_rendered(tmp_path):
     step = VisualizeStep()
-    df = pd.DataFrame({
-        'topic': ['AI', 'AI'],
-        'avg_sentiment': [1.0, 0.0],
-        'avg_popularity': [100, 50],
-        'sample_size': [90, 10]
-    })
-    res = step._calculate_weighted_aggregates(df, ['topic'])
-    assert res['avg_sentiment'].iloc[0] == 0.9
-    assert res['avg_popularity'].iloc[0] == 95.0
-    assert res['sample_size'].iloc[0] == 100
+    specs = step._figure_specs(MetricsStore(*_metrics(["Economy", "Startup"])))
+    assert len(render_all(specs, tmp_path, workers=2)) == len(specs) == 6 + 3 + 2 * 5
+    assert render_all(specs, tmp_path) == []
+
+    # A topic sorting first renumbers the others: their charts are carried over, only its own five are drawn.
+    renumbered = lambda f: f"{int(f.name[:2]) + 1:02d}{f.name[2:]}"
+    before = {renumbered(f): f.read_bytes() for f in tmp_path.glob("0[78]*.html")}
+    specs = step._figure_specs(MetricsStore(*_metrics(["Climate", "Economy", "Startup"])))
+    rendered = render_all(specs, tmp_path, workers=1)
+    topic_charts = [f for f in rendered if f[:2].isdigit() and int(f[:2]) >= 7]
+    assert sorted(topic_charts) == sorted(s.filename for s in specs if "_climate_" in s.filename)
+    assert {f.name: f.read_bytes() for f in tmp_path.glob("0[89]*.html")} == before
+    assert sorted(f.name for f in tmp_path.glob("*.html")) == sorted(s.filename for s in specs)
+
+def test_single_page_dashboard(tmp_path, monkeypatch):
+    df_t, df_w = _metrics(["Economy", "Startup"])
+    df_t.to_csv(tmp_path / "topic_metrics.csv", index=False)
+    df_w.to_csv(tmp_path / "word_metrics.csv", index=False)
+    for name, value in (("TOPIC_METRICS", tmp_path / "topic_metrics.csv"), ("WORD_METRICS", tmp_path / "word_metrics.csv"),
+                        ("ASSETS_DIR", tmp_path / "assets"), ("DASHBOARD_LAYOUT", "single"), ("VISUALIZE_WORKERS", 1)):
+        monkeypatch.setattr(settings, name, value)
+    VisualizeStep().execute()
+
+    page = (tmp_path / "assets" / "index.html").read_text()
+    assert (tmp_path / "assets" / "plotly.min.js").exists() and "cdn.plot.ly" not in page and "<iframe" not in page
+    payload = json.loads(re.search(r'id="figures">(.*?)</script>', page, re.S).group(1))
+    assert len(payload["figures"]) == page.count('class="chart"') == 19 and len(payload["templates"]) == 1
+
+    matrix = payload["figures"][0]["data"][0]  # 01: topic averages, sentiment on x
+    assert matrix["x"]["dtype"] == "f4"
+    x = np.frombuffer(base64.b64decode(matrix["x"]["bdata"]), dtype="<f4")
+    assert np.array_equal(x, MetricsStore(df_t).query(granularity="all")["avg_sentiment"].to_numpy(np.float32))
@@ -0,0 +1,57 @@
+import json
+import numpy as np
+import pytest
+from spotify_sentiment.core import vocabulary
+from spotify_sentiment.core.config import settings
+
+TOPICS = {"Economy": ["economy", "interest rates", "Markets"], "Food": ["diet", "protein", "unknownword"]}
+
+
+def _embeddings(path, seed=0):
+    rng = np.random.default_rng(seed)
+    words = ["economy", "markets", "diet", "protein", "inflation", "stocks", "bonds", "nutrition", "vitamins",
+             "meal", "rates", "gdp", "snacks", "recipes", "u.s.", "lunch", "dinner", "banks", "trade", "budget"]
+    centers = rng.normal(size=(2, 8))
+    vectors = centers[[i % 2 for i in range(len(words))]] + 0.3 * rng.normal(size=(len(words), 8))
+    path.write_text(f"{len(words)} 8\n" + "".join(f"{w} {' '.join(f'{x:.6f}' for x in v)}\n" for w, v in zip(words, vectors)))
+    return path
+
+
+@pytest.fixture
+def local_model(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "USE_EXACT_MATCH_ONLY", False)
+    monkeypatch.setattr(settings, "TOPIC_DEFINITIONS", TOPICS)
+    monkeypatch.setattr(settings, "EMBEDDINGS_MODEL", str(_embeddings(tmp_path / "tiny.txt")))
+    monkeypatch.setattr(settings, "VOCABULARY", tmp_path / "vocabulary.json")
+    return tmp_path
+
+
+def test_expansion_matches_most_similar(local_model):
+    vectors = vocabulary.load_embeddings(settings.EMBEDDINGS_MODEL)
+    for topn, threshold in ((5, 0.65), (3, 0.2), (10, 0.9)):
+        expected = {}
+        for topic, seeds in TOPICS.items():
+            vocab = {w.lower() for w in seeds}
+            for word in seeds:
+                if " " in word or word.lower() not in vectors.key_to_index: continue
+                sims = vectors.most_similar(word.lower(), topn=topn)
+                vocab.update(w for w, s in sims if s > threshold and w.isalpha() and len(w) > 3)
+            expected[topic] = sorted(vocab)
+        assert vocabulary.expand_topics(TOPICS, vectors, topn, threshold) == expected
+
+
+def test_artifact_is_reused_until_its_inputs_change(local_model, monkeypatch):
+    patterns = vocabulary.topic_patterns()
+    assert json.loads(settings.VOCABULARY.read_text())["patterns"] == patterns
+    assert set(patterns["Economy"]) > {"economy", "interest rates", "markets"}
+
+    loads = []
+    load = vocabulary.load_embeddings
+    monkeypatch.setattr(vocabulary, "load_embeddings", lambda model: loads.append(model) or load(model))
+    assert vocabulary.topic_patterns() == patterns and loads == []
+
+    monkeypatch.setattr(settings, "EXPANSION_MIN_SIMILARITY", 0.99)
+    assert vocabulary.topic_patterns()["Economy"] == ["economy", "interest rates", "markets"]
+    _embeddings(local_model / "tiny.txt", seed=1)
+    vocabulary.topic_patterns()
+    assert len(loads) == 2